@@ -1,13 +1,14 @@
 import datetime
 from typing import Optional, Union
 from uuid import UUID
-from Crud.auth import authenticate_user, get_current_user, get_token_data_by_user_id
+from Crud.auth import authenticate_user, get_current_user, get_token_data_by_user_id, global_security
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect, UploadFile, Query, BackgroundTasks, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database.db_session import get_db
 from Models.models import User, Token 
 from notification.socket import manager
+from Service.auth_session import revoke_token
 
 
 
@@ -73,6 +74,7 @@ async def logout_user(
         Token.user_id == current_user["id"],
         Token.organization_id == current_user["user"].organization_id).delete()
     db.commit()
+    revoke_token(token_str)
 
     # close all WS for this org/user
     await manager.unregister_user(str(current_user["user"].organization_id), str(current_user["id"]))
@@ -80,6 +82,13 @@ async def logout_user(
 
 
 
+@router.get("/token-cache-metrics", tags=["Auth"])
+def get_token_cache_metrics(current_user: dict = Depends(get_current_user)):
+    """Hit/miss/eviction counters of the decoded-token cache (this worker only)."""
+    return global_security.token_cache.metrics()
+
+
+
 # --------------------------------------------------------------------
 # LOGIN API ENDPOINT
 # --------------------------------------------------------------------
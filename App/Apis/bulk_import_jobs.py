@@ -0,0 +1,93 @@
+# Apis/bulk_import_jobs.py
+from uuid import UUID
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+from database.db_session import get_db
+from Crud.auth import get_current_user
+from Models.bulk_import_job import BulkImportJob
+from Models.dynamic_models import BulkUploadError
+from Service.bulk_import_jobs import create_import_job, submit_import_job, job_payload
+from Service.account_mailer import get_batch_summary
+
+
+router = APIRouter(prefix="/jobs", tags=["Bulk Import Jobs"])
+
+
+def _organization_id(current_user: dict) -> UUID:
+    principal = current_user.get("principal")
+    org_id = getattr(principal, "org_id", None)
+    if org_id is None:
+        raise HTTPException(status_code=403, detail="No organization for the current user.")
+    return UUID(str(org_id))
+
+
+def _get_job(db: Session, job_id: UUID, organization_id: UUID) -> BulkImportJob:
+    job = db.query(BulkImportJob).filter(
+        BulkImportJob.id == job_id,
+        BulkImportJob.organization_id == organization_id,
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found.")
+    return job
+
+
+@router.post("/bulk-import", status_code=status.HTTP_202_ACCEPTED)
+def start_bulk_import(
+    file: UploadFile = File(...),
+    organization_id: str = Form(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Store the upload and queue it; returns at once with the job id.
+    The job runs the same import as POST /bulk_insert_employee_data_api
+    (UserCRUD.bulk_insert_crud: accounts, account emails, employee SMS).
+    Poll GET /jobs/{job_id} or follow /ws/jobs/{job_id} for progress.
+    """
+    org_id = _organization_id(current_user)
+    if organization_id and str(organization_id) != str(org_id):
+        raise HTTPException(status_code=403, detail="Cannot import into another organization.")
+
+    job = create_import_job(db, org_id, file, created_by=current_user.get("id"))
+    submit_import_job(job.id)
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "progress_ws": f"/ws/jobs/{job.id}",
+    }
+
+
+@router.get("/email-batches/{batch_id}")
+def get_account_email_batch(
+    batch_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Sent/failed counts of an import's account emails (batches started by this worker)."""
+    summary = get_batch_summary(batch_id)
+    if not summary or summary["organization_id"] != str(_organization_id(current_user)):
+        raise HTTPException(status_code=404, detail="Email batch not found.")
+    return summary
+
+
+@router.get("/{job_id}")
+def get_bulk_import_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    return job_payload(_get_job(db, job_id, _organization_id(current_user)))
+
+
+@router.get("/{job_id}/errors")
+def get_bulk_import_job_errors(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Row-level failures of a finished job (its BulkUploadError entry)."""
+    job = _get_job(db, job_id, _organization_id(current_user))
+    if not job.error_log_id:
+        return {"job_id": str(job.id), "errors": []}
+    err_log = db.query(BulkUploadError).get(job.error_log_id)
+    return {"job_id": str(job.id), "errors": err_log.error_details if err_log else []}
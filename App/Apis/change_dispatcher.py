@@ -0,0 +1,84 @@
+# src/api/change_dispatcher.py
+import asyncio
+import logging
+from typing import Callable, Dict, Hashable, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+_INFO_KEY = "post_commit_changes"
+
+
+class PostCommitDispatcher:
+    """
+    Collects change keys (org ids, (employee_id, org_id) pairs, ...) while a
+    Session flushes and hands them to their handlers only once that Session
+    commits. Rolled-back work is discarded.
+
+    Mapper listeners call mark() with the row being flushed; nothing is read
+    or broadcast mid-transaction. Handlers run on the bound event loop and
+    must do their own DB work on a fresh session.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handlers: Dict[str, Callable[[Set[Hashable]], None]] = {}
+        self._installed = False
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop or asyncio.get_running_loop()
+
+    def register_handler(self, kind: str, handler: Callable[[Set[Hashable]], None]):
+        self._handlers[kind] = handler
+        self.install()
+
+    def install(self):
+        if self._installed:
+            return
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+        self._installed = True
+
+    def mark(self, target, kind: str, key: Hashable) -> None:
+        """
+        Record `key` under `kind` on the session that is flushing `target`
+        (an ORM instance, or the Session itself for Core statements).
+        """
+        if key is None:
+            return
+        session = target if isinstance(target, Session) else object_session(target)
+        if session is None:
+            return
+        session.info.setdefault(_INFO_KEY, {}).setdefault(kind, set()).add(key)
+
+    def _after_commit(self, session: Session):
+        pending = session.info.pop(_INFO_KEY, None)
+        if not pending:
+            return
+        for kind, keys in pending.items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                continue
+            self._dispatch(handler, keys)
+
+    def _after_rollback(self, session: Session):
+        session.info.pop(_INFO_KEY, None)
+
+    def _dispatch(self, handler, keys):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        loop = self._loop or running
+        if loop is None or loop.is_closed():
+            logger.warning("Post-commit dispatcher has no event loop; dropping %s change(s)", len(keys))
+            return
+        if running is loop:
+            loop.call_soon(handler, keys)
+        else:
+            # Sync endpoints commit on threadpool workers; hop onto the loop.
+            loop.call_soon_threadsafe(handler, keys)
+
+
+post_commit_dispatcher = PostCommitDispatcher()
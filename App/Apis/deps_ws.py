@@ -11,8 +11,8 @@ from Models.Tenants.role import Role
 from Crud.auth import _decode_and_validate_token, get_current_user    # your HTTP function
 from database.db_session import get_db
 from jose import jwt, JWTError
-from Models import models
 from Utils.config import ProductionConfig
+from Service.auth_session import auth_user_cache, principal_cache
 
 settings = ProductionConfig()
 
@@ -58,7 +58,9 @@ async def get_current_user_ws(token: str, db: Session):
     except JWTError:
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    # Principal + user from the auth caches (no query when cached)
+    principal = principal_cache.resolve(token, user_id)
+    user = auth_user_cache.get(db, principal.user_id) if principal else None
     if not user:
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
     return user
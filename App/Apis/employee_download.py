@@ -37,15 +37,14 @@ from Models.models import (
     EmergencyContact,
     NextOfKin,
     EmployeePaymentDetail,
-    EmployeeType,
-    Department,
     PromotionRequest,
     SalaryPayment,
     User,
 )
 from Models.Tenants.role import Role 
-from Models.Tenants.organization import Organization, Branch, Rank
+from Models.Tenants.organization import Organization, Rank
 from functools import lru_cache
+from Service.employee_aggregator import employee_record_options
 
 
 router = APIRouter()
@@ -1038,84 +1037,40 @@ def download_employee_pdf(
     # ---------------------------------------
     # 3) Fetch Employee
     # ---------------------------------------
+    # Relationships are batch-loaded with the employee (same loader as the
+    # employee record aggregator) instead of one query per section.
     employee: Employee = db.query(Employee).filter(
         Employee.id == employee_id,
         Employee.organization_id == organization_id
-    ).first()
+    ).options(*employee_record_options()).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found.")
 
     # ---------------------------------------
-    # 4) Fetch Related Data
+    # 4) Related Data
     # ---------------------------------------
-    emp_type = None
-    if employee.employee_type_id:
-        emp_type = db.query(EmployeeType).filter(
-            EmployeeType.id == employee.employee_type_id,
-            EmployeeType.organization_id == organization_id
-        ).first()
-
-    rank_obj = None
-    if employee.rank_id:
-        rank_obj = db.query(Rank).filter(
-            Rank.id == employee.rank_id,
-            Rank.organization_id == organization_id
-        ).first()
-
-    dept_obj = None
-    if employee.department_id:
-        dept_obj = db.query(Department).filter(
-            Department.id == employee.department_id,
-            Department.organization_id == organization_id
-        ).first()
-
-    branch_obj = None
-    if dept_obj and dept_obj.branch_id:
-        branch_obj = db.query(Branch).filter(
-            Branch.id == dept_obj.branch_id,
-            Branch.organization_id == organization_id
-        ).first()
-
-    academic_qs: List[AcademicQualification] = db.query(AcademicQualification).filter(
-        AcademicQualification.employee_id == employee_id
-    ).all()
-
-    prof_qs: List[ProfessionalQualification] = db.query(ProfessionalQualification).filter(
-        ProfessionalQualification.employee_id == employee_id
-    ).all()
-
-    employment_hist: List[EmploymentHistory] = db.query(EmploymentHistory).filter(
-        EmploymentHistory.employee_id == employee_id
-    ).all()
-
-    emergency_cts: List[EmergencyContact] = db.query(EmergencyContact).filter(
-        EmergencyContact.employee_id == employee_id
-    ).all()
-
-    next_of_kin_qs: List[NextOfKin] = db.query(NextOfKin).filter(
-        NextOfKin.employee_id == employee_id
-    ).all()
-
-    payment_details: List[EmployeePaymentDetail] = db.query(EmployeePaymentDetail).filter(
-        EmployeePaymentDetail.employee_id == employee_id
-    ).all()
+    def _same_org(obj):
+        return obj if obj is not None and obj.organization_id == organization_id else None
+
+    emp_type = _same_org(employee.employee_type)
+    rank_obj = _same_org(employee.rank)
+    dept_obj = _same_org(employee.department)
+    branch_obj = _same_org(dept_obj.branch) if dept_obj else None
+
+    academic_qs: List[AcademicQualification] = employee.academic_qualifications
+    prof_qs: List[ProfessionalQualification] = employee.professional_qualifications
+    employment_hist: List[EmploymentHistory] = employee.employment_history
+    emergency_cts: List[EmergencyContact] = employee.emergency_contacts
+    next_of_kin_qs: List[NextOfKin] = employee.next_of_kins
+    payment_details: List[EmployeePaymentDetail] = employee.payment_details
+    promotion_reqs: List[PromotionRequest] = employee.promotion_requests
+    salary_payments: List[SalaryPayment] = employee.salary_payments
+    dynamic_data_list: List[EmployeeDynamicData] = employee.dynamic_data
 
     data_inputs: List[EmployeeDataInput] = db.query(EmployeeDataInput).filter(
         EmployeeDataInput.employee_id == employee_id
     ).all()
 
-    promotion_reqs: List[PromotionRequest] = db.query(PromotionRequest).filter(
-        PromotionRequest.employee_id == employee_id
-    ).all()
-
-    salary_payments: List[SalaryPayment] = db.query(SalaryPayment).filter(
-        SalaryPayment.employee_id == employee_id
-    ).all()
-
-    dynamic_data_list: List[EmployeeDynamicData] = db.query(EmployeeDynamicData).filter(
-        EmployeeDynamicData.employee_id == employee_id
-    ).all()
-
     # ---------------------------------------
     # 5) Determine logo paths (up to two)
     # ---------------------------------------
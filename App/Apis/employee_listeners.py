@@ -1,82 +1,153 @@
 # src/api/employee_listeners.py
 import asyncio
 import json
-from sqlalchemy import event
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
 
 # List all models whose changes should trigger employee data updates
 # We'll import these lazily to avoid circular imports
 EMPLOYEE_RELATED_MODELS = None
+# Shared lookups that appear inside every employee record of an organization;
+# a change to one of these invalidates the org's cached records.
+EMPLOYEE_LOOKUP_MODELS = None
 
-async def broadcast_employee_update(employee_id: str, organization_id: str, db: Session):
+def _load_employee_records(employee_ids):
+    """Assemble the employees' records on a fresh pooled session (runs in a worker thread)."""
+    from database.db_session import SessionLocal
+    from Service.employee_aggregator import get_employee_full_records
+
+    with SessionLocal() as db:
+        return dict(get_employee_full_records(db, employee_ids))
+
+async def broadcast_employee_updates(changed):
     """
-    Rebuild the employee data for employee_id and broadcast an 'update' to all connected sockets.
+    Rebuild the employee data for every (employee_id, organization_id) in
+    changed and broadcast an 'update' to the sockets watching each one.
+    Runs after the change has committed, on its own session; all records are
+    assembled in one batch.
     """
     try:
         # Lazy import to avoid circular imports
-        from Service.employee_aggregator import get_employee_full_record
         from notification.socket import manager
-        
-        # Get the updated employee data
-        updated_data = get_employee_full_record(db, employee_id)
-        
-        # Create the update message
-        message = {
-            "type": "update", 
-            "payload": updated_data,
-            "employee_id": employee_id
-        }
-        
-        # Broadcast to all users in the organization who are connected to this employee's data
-        # We'll broadcast to the organization and let the client filter by employee_id
-        await manager.broadcast_json(organization_id, message)
-        
-        print(f"✅ Broadcasted employee update for employee_id: {employee_id} to org: {organization_id}")
-        
+
+        # Nobody is watching an employee → skip its rebuild entirely
+        watched = [
+            (employee_id, organization_id)
+            for employee_id, organization_id in changed
+            if manager.has_employee_subscribers(organization_id, employee_id)
+        ]
+        if not watched:
+            return
+
+        # Get the updated employee data without blocking the event loop
+        records = await asyncio.to_thread(_load_employee_records, [e for e, _ in watched])
+
+        # Send only to the sockets opened on /ws/employee/{org}/{employee_id};
+        # each gets a patch with just the sections that changed
+        for employee_id, organization_id in watched:
+            await manager.publish_employee_record(organization_id, employee_id, records.get(str(employee_id), {}))
+            print(f"✅ Broadcasted employee update for employee_id: {employee_id} to org: {organization_id}")
+
     except Exception as e:
-        print(f"❌ Error broadcasting employee update for {employee_id}: {e}")
+        print(f"❌ Error broadcasting employee updates for {[e_id for e_id, _ in changed]}: {e}")
+
+async def broadcast_employee_update(employee_id: str, organization_id: str):
+    """Rebuild and broadcast a single employee; see broadcast_employee_updates."""
+    await broadcast_employee_updates([(employee_id, organization_id)])
+
+def _on_commit(changed):
+    """
+    Called once per committed transaction with every (employee_id, organization_id)
+    touched in it, so a row edited several times in one commit is rebuilt once.
+    """
+    asyncio.create_task(_refresh_employees(changed))
+
+async def _refresh_employees(changed):
+    from Service.employee_record_cache import employee_record_cache
+
+    # Drop the cached records first, so the rebuilds below see the commit
+    await asyncio.to_thread(employee_record_cache.invalidate_employees, {e for e, _ in changed})
+    await broadcast_employee_updates(changed)
+
+def _on_lookup_commit(org_ids):
+    from Service.employee_record_cache import employee_record_cache
+
+    asyncio.create_task(asyncio.to_thread(employee_record_cache.invalidate_organizations, org_ids))
+
+def _after_lookup_change(mapper, connection, target):
+    """
+    A department, rank, branch, employee type, role or organization changed:
+    every cached record in that organization may embed it.
+    """
+    from Models.Tenants.organization import Organization
+    from .change_dispatcher import post_commit_dispatcher
+
+    org_id = target.id if mapper.class_ is Organization else getattr(target, "organization_id", None)
+    post_commit_dispatcher.mark(target, "employee_org", str(org_id) if org_id else None)
+
+def _mark_user_employee(connection, target):
+    """Queue a rebuild of the employee whose record shows this user's role."""
+    from Models.models import Employee
+    from .change_dispatcher import post_commit_dispatcher
+
+    employee_id = connection.execute(
+        select(Employee.id).where(
+            Employee.email == target.email,
+            Employee.organization_id == target.organization_id,
+        )
+    ).scalar()
+    if employee_id:
+        post_commit_dispatcher.mark(target, "employee", (str(employee_id), str(target.organization_id)))
+
+def _after_user_change(mapper, connection, target):
+    """
+    The record's Role section comes from the User matched by email; only a
+    change of role or email affects it.
+    """
+    from sqlalchemy import inspect
+
+    state = inspect(target)
+    if not (state.attrs.role_id.history.has_changes() or state.attrs.email.history.has_changes()):
+        return
+    _mark_user_employee(connection, target)
+
+def _after_user_insert_or_delete(mapper, connection, target):
+    """
+    A user appearing or disappearing always changes the Role section. (Inside
+    after_insert/after_delete the instance state carries no pending/deleted
+    flag or attribute history to test, so there is no guard here.)
+    """
+    _mark_user_employee(connection, target)
 
 def _after_employee_change(mapper, connection, target):
     """
-    This handler runs when any employee-related data changes.
-    It triggers a broadcast of the updated employee data.
+    This handler runs mid-flush when any employee-related data changes.
+    It only records the employee; the broadcast happens after commit.
     """
     try:
-        # Get the session from connection info
-        db: Session = connection.info.get("session")
-        if db is None:
-            print("❌ No session found in connection.info, cannot broadcast employee update")
-            return
-            
+        from Models.models import Employee
+        from .change_dispatcher import post_commit_dispatcher
+
         # Determine the employee_id and organization_id
         employee_id = None
         organization_id = None
         
-        if mapper.class_ == Employee:
+        if mapper.class_ is Employee:
             # Direct employee update
             employee_id = str(target.id)
             organization_id = str(target.organization_id)
-        else:
+        elif getattr(target, "employee_id", None):
             # Related model update - get employee_id from the relationship
-            if hasattr(target, 'employee_id'):
-                employee_id = str(target.employee_id)
-                # Get organization_id from the employee
-                emp_result = connection.execute(
-                    f"SELECT organization_id FROM employees WHERE id = '{employee_id}'"
-                ).first()
-                if emp_result:
-                    organization_id = str(emp_result[0])
-            elif hasattr(target, 'employee'):
-                # If it's a relationship object
-                if target.employee:
-                    employee_id = str(target.employee.id)
-                    organization_id = str(target.employee.organization_id)
+            employee_id = str(target.employee_id)
+            organization_id = getattr(target, "organization_id", None)
+            if organization_id is None:
+                # Get organization_id from the employee (same connection, same transaction)
+                organization_id = connection.execute(
+                    select(Employee.organization_id).where(Employee.id == target.employee_id)
+                ).scalar()
+            organization_id = str(organization_id) if organization_id else None
         
         if employee_id and organization_id:
-            # Broadcast the update without blocking the current transaction
-            asyncio.get_event_loop().create_task(
-                broadcast_employee_update(employee_id, organization_id, db)
-            )
+            post_commit_dispatcher.mark(target, "employee", (employee_id, organization_id))
         else:
             print(f"❌ Could not determine employee_id or organization_id for {mapper.class_.__name__}")
             
@@ -88,7 +159,7 @@ def register_employee_listeners():
     Register database event listeners for all employee-related models.
     This should be called during application startup.
     """
-    global EMPLOYEE_RELATED_MODELS
+    global EMPLOYEE_RELATED_MODELS, EMPLOYEE_LOOKUP_MODELS
     
     # Lazy import to avoid circular imports
     from Models.models import (
@@ -100,10 +171,20 @@ def register_employee_listeners():
         NextOfKin,
         EmployeeDataInput,
         SalaryPayment,
-        PromotionRequest
+        PromotionRequest,
+        EmployeePaymentDetail,
+        EmployeeType,
+        Department,
+        User,
     )
     from Models.dynamic_models import EmployeeDynamicData
+    from Models.Tenants.organization import Organization, Branch, Rank
+    from Models.Tenants.role import Role
     
+    from .change_dispatcher import post_commit_dispatcher
+    post_commit_dispatcher.register_handler("employee", _on_commit)
+    post_commit_dispatcher.register_handler("employee_org", _on_lookup_commit)
+
     EMPLOYEE_RELATED_MODELS = [
         Employee,
         AcademicQualification,
@@ -114,14 +195,24 @@ def register_employee_listeners():
         EmployeeDataInput,
         SalaryPayment,
         PromotionRequest,
-        EmployeeDynamicData
+        EmployeeDynamicData,
+        EmployeePaymentDetail,
     ]
+    EMPLOYEE_LOOKUP_MODELS = [Organization, Branch, Department, Rank, EmployeeType, Role]
     
     for model in EMPLOYEE_RELATED_MODELS:
         # Listen for insert, update, and delete events
         event.listen(model, "after_insert", _after_employee_change)
         event.listen(model, "after_update", _after_employee_change)
         event.listen(model, "after_delete", _after_employee_change)
+
+    for model in EMPLOYEE_LOOKUP_MODELS:
+        event.listen(model, "after_update", _after_lookup_change)
+        event.listen(model, "after_delete", _after_lookup_change)
+
+    event.listen(User, "after_update", _after_user_change)
+    event.listen(User, "after_insert", _after_user_insert_or_delete)
+    event.listen(User, "after_delete", _after_user_insert_or_delete)
         
     print(f"✅ Registered employee listeners for {len(EMPLOYEE_RELATED_MODELS)} models")
 
@@ -137,5 +228,14 @@ def unregister_employee_listeners():
             event.remove(model, "after_insert", _after_employee_change)
             event.remove(model, "after_update", _after_employee_change)
             event.remove(model, "after_delete", _after_employee_change)
+
+    if EMPLOYEE_LOOKUP_MODELS:
+        from Models.models import User
+        for model in EMPLOYEE_LOOKUP_MODELS:
+            event.remove(model, "after_update", _after_lookup_change)
+            event.remove(model, "after_delete", _after_lookup_change)
+        event.remove(User, "after_update", _after_user_change)
+        event.remove(User, "after_insert", _after_user_insert_or_delete)
+        event.remove(User, "after_delete", _after_user_insert_or_delete)
             
     print("✅ Unregistered all employee listeners")
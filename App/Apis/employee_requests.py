@@ -18,6 +18,7 @@ from Schemas import schemas
 from Utils.storage_utils import get_storage_service
 from Utils.util import extract_attachments
 from notification.socket import manager
+from Utils.serialize_4_json import dumps_json
 import json
 
 router = APIRouter(prefix="/employee-data-inputs", tags=["Employee Data Inputs"])
@@ -130,7 +131,7 @@ async def list_data_inputs(
         if user.organization_id != organization_id:
             raise HTTPException(403, "Not your organization")
         
-        ensure_hr_dashboard_ws(user)
+        ensure_hr_dashboard_ws(current_user["principal"])
     except HTTPException as e:
         raise e
     except Exception:
@@ -272,7 +273,7 @@ def update_input(
             manager.send_personal_message,
             str(db_obj.organization_id),
             str(db_obj.employee_id),
-            json.dumps(update_msg, default=lambda o: str(o)),
+            dumps_json(update_msg),
         )
 
 
@@ -1,6 +1,5 @@
 from datetime import date, datetime
 import re
-from passlib.context import CryptContext
 import secrets
 from dateutil.relativedelta import relativedelta
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request, status, UploadFile, File, Form
@@ -95,7 +94,7 @@ next_of_kin_crud = CRUDBase(NextOfKin)
 system_setting_crud = CRUDBase(SystemSetting)
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from Utils.password_service import password_service
 
 
 
@@ -518,7 +517,7 @@ PASSWORD_LENGTH = 12
 
 
 def hash_password(password: str) -> str:
-        return pwd_context.hash(password)
+        return password_service.hash(password)
 
 
 
@@ -671,7 +670,7 @@ async def create_organization(
     # Generate user account for contact person (organization administrator)
     username = contact_email
     plain_password = generate_random_string(6)
-    hashed_pw = hash_password(plain_password)
+    hashed_pw = await password_service.hash_async(plain_password)
 
     # 1) Extract title + clean name
     m = TITLE_PATTERN.match(contact_person.strip())
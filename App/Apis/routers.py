@@ -28,6 +28,8 @@ from .ws_employee import router as emp_ws
 from .UserBase import router as user_base
 from .employee_download import router as employee_download
 from .ws_summary import router as summary_ws
+from .bulk_import_jobs import router as bulk_import_jobs
+from .ws_bulk_import_jobs import router as bulk_import_jobs_ws
 # from notification.socket import router as notif
 
 api =APIRouter()
@@ -36,6 +38,8 @@ api =APIRouter()
 api.include_router(summary, prefix="/api")
 api.include_router(summary_ws)
 api.include_router(emp_ws)
+api.include_router(bulk_import_jobs_ws)
+api.include_router(bulk_import_jobs, prefix="/api")
 api.include_router(super_auth, prefix="/api/super-auth", tags=["Super Auth"])
 api.include_router(uploadfile, prefix="/api/uploadfile", tags=["UploadFile"])
 api.include_router(download_sample, prefix="/api/download", tags=["Download Sample File"])
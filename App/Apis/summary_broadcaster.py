@@ -1,19 +1,147 @@
 # src/api/summary_broadcaster.py
-import asyncio, json
-from fastapi.encoders import jsonable_encoder
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Optional, Set
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from .ws_summary import _build_summary_payload
+from database.db_session import SessionLocal
 from notification.socket import manager
+from Service.summary_counters import read_organization_counts
+from Utils.config import config
+from Utils.serialize_4_json import dumps_json
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_update(payload) -> str:
+    # Sorted keys so equal payloads hash equal (see SummaryDebouncer)
+    return dumps_json({"type": "update", "payload": payload}, sort_keys=True)
+
 
 async def broadcast_summary(org_id: str, db: Session):
     """
     Rebuild the summary for org_id and broadcast an 'update' to all sockets.
+    Prefer summary_debouncer.notify(org_id) from change handlers; this is the
+    immediate, uncoalesced path.
     """
     org_uuid = UUID(org_id)
-    schema = await _build_summary_payload(db, org_uuid)
-    payload = jsonable_encoder(schema)
-    message = json.dumps({"type": "update", "payload": payload})
+    payload = read_organization_counts(db, org_uuid)
+    if payload is None:
+        return
+    message = _encode_update(payload)
     # fire-and-forget
     asyncio.create_task(manager.broadcast(org_id, message))
+
+
+class SummaryDebouncer:
+    """
+    Per-organization debouncing broadcaster.
+
+    Every change notification for an org inside `window` seconds is coalesced
+    into a single summary rebuild, run on its own session once the window
+    closes. The broadcast is skipped when the rebuilt payload hashes the same
+    as the last one sent for that org.
+
+    At most one rebuild per org runs at a time, so an older, slower rebuild
+    can never broadcast (or record as last sent) counts that a newer one
+    has already superseded. Changes arriving while a rebuild runs only
+    accumulate; when it finishes they open one more window.
+
+    notify() is safe to call from SQLAlchemy listeners on any thread; the
+    timers themselves live on the loop bound via bind_loop().
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, int] = {}              # org_id → events seen in the open window
+        self._timers: Dict[str, asyncio.Task] = {}      # org_id → scheduled flush
+        self._rebuilding: Set[str] = set()              # org_ids with a rebuild in flight
+        self._last_hash: Dict[str, str] = {}            # org_id → hash of last payload sent
+        self._stats = {"events": 0, "rebuilds": 0, "broadcasts": 0, "skipped_unchanged": 0, "errors": 0}
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop or asyncio.get_running_loop()
+
+    def notify(self, org_id) -> None:
+        """Record a change for org_id; returns immediately."""
+        if org_id is None:
+            return
+        org_id = str(org_id)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if self._loop is None and running is not None:
+            self._loop = running
+        if self._loop is None or self._loop.is_closed():
+            logger.warning("Summary debouncer has no event loop; dropping change for org %s", org_id)
+            return
+
+        if running is self._loop:
+            self._mark(org_id)
+        else:
+            # Sync endpoints flush on threadpool workers; hop onto the loop.
+            self._loop.call_soon_threadsafe(self._mark, org_id)
+
+    def _mark(self, org_id: str) -> None:
+        self._stats["events"] += 1
+        self._pending[org_id] = self._pending.get(org_id, 0) + 1
+        # A rebuild in flight schedules the next window itself when it ends.
+        if org_id not in self._timers and org_id not in self._rebuilding:
+            self._timers[org_id] = self._loop.create_task(self._flush_after_window(org_id))
+
+    async def _flush_after_window(self, org_id: str) -> None:
+        await asyncio.sleep(self.window)
+        # Close the window before rebuilding: events that land during the
+        # rebuild are kept in _pending for the follow-up flush.
+        self._timers.pop(org_id, None)
+        self._rebuilding.add(org_id)
+        events = self._pending.pop(org_id, 0)
+        try:
+            payload = await asyncio.to_thread(self._rebuild, org_id)
+            self._stats["rebuilds"] += 1
+            if payload is None:
+                return
+
+            message = _encode_update(payload)
+            digest = hashlib.sha1(message.encode("utf-8")).hexdigest()
+            if self._last_hash.get(org_id) == digest:
+                self._stats["skipped_unchanged"] += 1
+                return
+            self._last_hash[org_id] = digest
+            await manager.broadcast(org_id, message)
+            self._stats["broadcasts"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.exception("Error broadcasting summary for org %s: %s", org_id, e)
+        finally:
+            self._rebuilding.discard(org_id)
+            if self._pending.get(org_id) and org_id not in self._timers:
+                self._timers[org_id] = self._loop.create_task(self._flush_after_window(org_id))
+            logger.debug("Summary flush for org %s coalesced %s events (ratio %.1f)", org_id, events, self.coalescing_ratio())
+
+    @staticmethod
+    def _rebuild(org_id: str):
+        with SessionLocal() as db:
+            return read_organization_counts(db, UUID(org_id))
+
+    def coalescing_ratio(self) -> float:
+        """Change events received per summary rebuild (1.0 = no coalescing)."""
+        rebuilds = self._stats["rebuilds"]
+        return self._stats["events"] / rebuilds if rebuilds else 0.0
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            **self._stats,
+            "pending_orgs": len(self._timers),
+            "rebuilding_orgs": len(self._rebuilding),
+            "coalescing_ratio": round(self.coalescing_ratio(), 2),
+            "window_ms": int(self.window * 1000),
+        }
+
+
+summary_debouncer = SummaryDebouncer(window=config.SUMMARY_BROADCAST_DEBOUNCE_MS / 1000)
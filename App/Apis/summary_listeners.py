@@ -1,29 +1,34 @@
 # src/api/summary_listeners.py
 
-import asyncio
 from sqlalchemy import event
-from sqlalchemy.orm import Session
-from Models.Tenants.organization import Branch, PromotionPolicy, Tenancy, Bill, Payment
+from Models.Tenants.organization import Branch, Rank, PromotionPolicy, Tenancy, Bill, Payment
 from Models.models import Department, User, Employee
 from Models.Tenants.role import Role
-from .summary_broadcaster import broadcast_summary
+from .summary_broadcaster import summary_debouncer
+from .change_dispatcher import post_commit_dispatcher
+from Service.summary_counters import register_counter_listeners, resolve_organization_id
 
 # List all models whose INSERT/UPDATE/DELETE should trigger a summary refresh:
-TARGET_MODELS = [Branch, Department, Role, PromotionPolicy, Tenancy, Bill, Payment, User, Employee]
+TARGET_MODELS = [Branch, Department, Rank, Role, PromotionPolicy, Tenancy, Bill, Payment, User, Employee]
 
 def _after_change(mapper, connection, target):
-    # This handler runs inside SQLAlchemy’s sync world; but
-    # SQLAlchemy 1.4+ gives us .info["session"] to retrieve the Session
-    db: Session = connection.info.get("session")
-    if db is None:
-        # Fallback: new Session(bind=connection) — but better to attach Session into connection.info.
-        print("❌ No session found in connection.info, cannot broadcast summary")
-        return
-    org_id = str(target.organization_id)
-    # Broadcast without blocking the current transaction
-    asyncio.get_event_loop().create_task(broadcast_summary(org_id, db))
+    # This handler runs mid-flush, inside the request's transaction. It only
+    # records which organization changed; the dispatcher hands it over once
+    # the session commits (see _on_commit).
+    org_id = resolve_organization_id(connection, target)
+    post_commit_dispatcher.mark(target, "summary", str(org_id) if org_id else None)
+
+def _on_commit(org_ids):
+    # The debouncer rebuilds and broadcasts once per organization per
+    # window, on its own session.
+    for org_id in org_ids:
+        summary_debouncer.notify(org_id)
 
 def register_summary_listeners():
+    # Keep organization_counters in step first (same transaction), so the
+    # broadcast below reads the updated counts.
+    register_counter_listeners(TARGET_MODELS)
+    post_commit_dispatcher.register_handler("summary", _on_commit)
     for model in TARGET_MODELS:
         # after_insert, after_update, and after_delete all fire
         event.listen(model, 'after_insert', _after_change)
@@ -6,7 +6,7 @@ from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from Crud.sup_dependencies import get_current_superadmin, get_refresh_token
 from Schemas.schemas import TokenResponse
-from Utils.sup_security import create_access_token, create_refresh_token, verify_password
+from Utils.sup_security import create_access_token, create_refresh_token, verify_password_async
 from Crud.auth import get_current_user
 from database.db_session import get_async_db, get_db
 from Models.superadmin import RefreshToken, SuperAdmin
@@ -82,7 +82,7 @@ async def login_for_tokens(
         select(SuperAdmin).where(SuperAdmin.username == form_data.username)
     )
     admin = result.scalars().first()
-    if not admin or not verify_password(form_data.password, admin.hashed_password):
+    if not admin or not await verify_password_async(form_data.password, admin.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
     # 2) create access & refresh tokens
@@ -5,7 +5,7 @@ import uuid
 import pandas as pd
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, BackgroundTasks, Query, Form, status
 from pydantic import EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Optional, List, Dict
 from uuid import UUID
@@ -41,7 +41,7 @@ from Crud.async_base import CRUDBase as AsyncCRUDBase
 # from Crud.base import CRUDBase
 from Service.storage_service import BaseStorage
 from Service.sms_service import BaseSMSService
-from Service.employee_aggregator import get_employee_full_record
+from Service.employee_aggregator import get_employee_full_record, employee_record_options
 import uuid
 
 
@@ -494,14 +494,16 @@ def get_employees_by_organization_id(
 
     # Get all active users (the User model flag 'is_active' is enforced here).
     # We assume the Employee record is linked to a User via email.
-    users = db.query(User).filter(User.organization_id == organization_id).all()
+    users = db.query(User).filter(User.organization_id == organization_id).options(joinedload(User.role)).all()
     users_dict = {user.email: user for user in users}
 
     
-    # Query employees using pagination.
+    # Query employees using pagination; relationships are batch-loaded for
+    # the whole page (same loader as the employee record aggregator).
     employees = (
         db.query(Employee)
         .filter(Employee.organization_id == organization_id)
+        .options(*employee_record_options())
         .offset(skip)
         .limit(limit)
         .all()
@@ -565,7 +567,7 @@ def get_employees_by_organization_id(
         user_obj = users_dict.get(emp.email)
         status = "Active" if user_obj and user_obj.is_active else "Inactive"
 
-        role = db.query(Role).filter(Role.id == user_obj.role_id).first()
+        role = user_obj.role
 
         print(f"""
             "user ID: {user_obj.id}\n
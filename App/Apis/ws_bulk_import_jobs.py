@@ -0,0 +1,60 @@
+# Apis/ws_bulk_import_jobs.py
+import asyncio
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import Session
+from database.db_session import get_db
+from .deps_ws import get_current_user_ws
+from Service.bulk_import_jobs import load_job_payload, TERMINAL_STATUSES
+from Utils.config import config
+
+router = APIRouter()
+
+
+@router.websocket("/ws/jobs/{job_id}")
+async def websocket_bulk_import_job(
+    websocket: WebSocket,
+    job_id: str,
+    token: str = Query(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Progress of one bulk-import job: a "progress" message whenever the job
+    row changes (rows/sec, success/error counts, ETA), closed after the
+    terminal "succeeded"/"failed" message. The worker may live in another
+    process, so the row is polled every BULK_IMPORT_PROGRESS_INTERVAL_SECONDS.
+    """
+    # 1) Authenticate + tenant check
+    try:
+        user = await get_current_user_ws(token, db)
+        job_uuid = UUID(job_id)
+    except Exception:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    organization_id = user.organization_id
+    db.close()
+
+    payload = await asyncio.to_thread(load_job_payload, job_uuid, organization_id)
+    if payload is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # 2) Stream changes until the job finishes
+    await websocket.accept()
+    last = None
+    try:
+        while True:
+            snapshot = {k: v for k, v in payload.items() if k not in ("rows_per_second", "eta_seconds")}
+            if snapshot != last:
+                await websocket.send_json({"type": "progress", "payload": payload})
+                last = snapshot
+            if payload["status"] in TERMINAL_STATUSES:
+                await websocket.close()
+                return
+            await asyncio.sleep(config.BULK_IMPORT_PROGRESS_INTERVAL_SECONDS)
+            payload = await asyncio.to_thread(load_job_payload, job_uuid, organization_id) or payload
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        if websocket.client_state.name != "CLOSED":
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
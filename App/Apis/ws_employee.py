@@ -1,11 +1,10 @@
 # src/api/ws_employee.py
 import asyncio
-import json
 from typing import Optional
 from fastapi import APIRouter, Query, WebSocket, Depends, WebSocketDisconnect, status
 from .deps_ws import get_current_user_ws
 from Service.employee_aggregator import get_employee_full_record
-from Crud.auth import require_permissions
+from Service.auth_session import Principal
 from sqlalchemy.orm import Session
 from database.db_session import get_db
 from Models.models import Employee
@@ -59,21 +58,21 @@ async def employee_ws(
 
     # If the email doesn’t match, require HR permission
     if emp_obj.email != user.email:
-        try:
-            require_permissions(user, ["staff:dashboard"])
-        except Exception:
+        if not Principal.from_user(user).has_any(["staff:dashboard"]):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
 
     # 4) All checks pass → accept the WebSocket and register it
     await websocket.accept()
     await manager.register(organization_id, str(user.id), websocket)
+    # Only this employee's updates are routed to this socket
+    await manager.subscribe_employee(organization_id, employee_id, websocket)
 
     try:
-        # 5) Send the “initial” snapshot
+        # 5) Send the “initial” snapshot (version 1 of this socket's stream;
+        #    later changes arrive as section-level "patch" messages)
         initial_payload = get_employee_full_record(db, employee_id)
-        wrapped = {"type": "initial", "payload": initial_payload}
-        await websocket.send_text(json.dumps(wrapped, default=lambda o: str(o)))
+        await manager.send_employee_snapshot(websocket, employee_id, initial_payload, "initial")
 
         # 6) Enter heartbeat loop with token revalidation
         try:
@@ -81,11 +80,11 @@ async def employee_ws(
                 # Wait up to 60 seconds for client ping or automatic wake-up
                 try:
                     msg = await asyncio.wait_for(websocket.receive_text(), timeout=60.0)
-                    # Client sent a message - handle refresh requests
-                    if msg == "refresh":
+                    # Client sent a message - handle refresh requests, and resync
+                    # requests from clients that missed a patch (version gap)
+                    if msg in ("refresh", "resync"):
                         updated_payload = get_employee_full_record(db, employee_id)
-                        update_msg = {"type": "update", "payload": updated_payload}
-                        await websocket.send_text(json.dumps(update_msg, default=lambda o: str(o)))
+                        await manager.send_employee_snapshot(websocket, employee_id, updated_payload, "update")
                 except asyncio.TimeoutError:
                     # No ping from client, but that's okay - we'll validate token
                     pass
@@ -105,6 +104,8 @@ async def employee_ws(
 
         except WebSocketDisconnect:
             pass  # Client disconnected normally
+        finally:
+            await manager.unregister(organization_id, str(user.id), websocket)
 
     except WebSocketDisconnect:
         # 7) Clean up
@@ -8,7 +8,7 @@ from .deps_ws import get_current_user_ws
 from notification.socket import manager
 import json
 from uuid import UUID
-from .summary import _build_summary_payload
+from Service.summary_counters import read_organization_counts
 from Models.Tenants.role import Role
 from fastapi.encoders import jsonable_encoder
 from Utils.security import Security
@@ -54,14 +54,12 @@ async def websocket_summary(
             await manager.unregister(organization_id, user_id, websocket)
             return
 
-        org = db.query(Organization).filter(Organization.id == org_uuid).first()
-        if not org:
+        # 5) Build & send initial summary (counter row read; None → org missing)
+        payload = read_organization_counts(db, org_uuid)
+        if payload is None:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             await manager.unregister(organization_id, user_id, websocket)
             return
-
-        # 5) Build & send initial summary
-        payload = await _build_summary_payload(db, org_uuid)
         message = {"type": "initial", "payload": payload}
         await websocket.send_json(message)
 
@@ -10,8 +10,8 @@ from Utils.rate_limiter import RateLimiter
 from database.db_session import get_db
 from Models.models import User, Token, Dashboard, Employee
 from Models.Tenants.organization import Organization
-from Models.Tenants.role import Role
 from Utils.security import Security  # contains verify_password and generate_token
+from Service.auth_session import Principal, activity_store, auth_user_cache, principal_cache, record_activity, revoke_token
 from Service.email_service import EmailService, send_email_notification
 from Utils.config import DevelopmentConfig
 from email_validator import EmailNotValidError
@@ -111,13 +111,18 @@ def expire_old_tokens(db: Session, user_id: UUID, org_id: UUID) -> None:
     Remove all tokens for this user/org whose expiration_period has passed.
     Call this BEFORE you check for concurrent logins.
     """
-    now = datetime.utcnow()
-    db.query(Token).filter(
+    now = datetime.datetime.utcnow()
+    expired = db.query(Token).filter(
         Token.user_id == user_id,
         Token.organization_id == org_id,
         Token.expiration_period <= now,
-    ).delete(synchronize_session="fetch")
+    )
+    tokens = [token for (token,) in expired.with_entities(Token.token).all()]
+    expired.delete(synchronize_session="fetch")
     db.commit()
+    # Drop any cached payload/principal for the removed tokens (all workers)
+    for token in tokens:
+        revoke_token(token)
 
 
 # ==============================
@@ -195,7 +200,7 @@ async def authenticate_user(
         # Apply rate limit before authentication
         rate_limiter.check_rate_limit(db, user, request)
 
-        authenticate_password =  global_security.verify_password(password, user.hashed_password)
+        authenticate_password = await global_security.verify_password_async(password, user.hashed_password)
         print("\nauthenticate password: ", authenticate_password)
         if not authenticate_password:
             # (Optionally log failed attempt in rate limiter)
@@ -356,6 +361,63 @@ async def resize_image(image_file: UploadFile, width: int, height: int) -> Uploa
 
 security = HTTPBearer()
 
+
+def _expire_session(db: Session, token_str: str, detail: str):
+    """Delete the token row and reject the request."""
+    db.query(Token).filter(Token.token == token_str).delete()
+    db.commit()
+    revoke_token(token_str)
+    raise HTTPException(status_code=401, detail=detail)
+
+
+def _validate_session(db: Session, token_str: str, token_data: Dict[str, Any], inactivity_minutes: int) -> None:
+    """
+    Enforce token expiry and the inactivity window, then record this request.
+    Last activity lives in the session activity store (batched to the tokens
+    table), so a valid request performs no database write here.
+    """
+    current_ts = datetime.datetime.utcnow().timestamp()
+    exp = token_data.get("exp")
+    if not exp or current_ts > exp:
+        _expire_session(db, token_str, "Token expired")
+
+    # Inactivity: last request seen by the store, else the login time in the token.
+    last_seen = activity_store.last_seen(token_str)
+    if last_seen is not None:
+        inactivity = datetime.timedelta(seconds=datetime.datetime.now().timestamp() - last_seen)
+    elif token_data.get("last_activity"):
+        inactivity = datetime.datetime.utcnow() - datetime.datetime.fromtimestamp(token_data["last_activity"])
+    else:
+        inactivity = datetime.timedelta(0)
+    if inactivity > datetime.timedelta(minutes=inactivity_minutes):
+        # Log out the user by deleting the token.
+        _expire_session(db, token_str, "Logged out due to inactivity")
+
+    record_activity(db, token_str)
+
+
+def _resolve_principal(token_str: str, token_data: Dict[str, Any]) -> Principal:
+    """The token's Principal (user, org, role and permission snapshot), from memory when cached."""
+    user_id = token_data.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    try:
+        principal = principal_cache.resolve(token_str, UUID(user_id))
+    except Exception:
+        raise HTTPException(status_code=401, detail="User not found")
+    if not principal:
+        raise HTTPException(status_code=401, detail="User not found")
+    return principal
+
+
+def _resolve_user(db: Session, principal: Principal) -> User:
+    """The principal's User, served from the auth user cache and bound to db."""
+    user = auth_user_cache.get(db, principal.user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
 # ============================================
 # 2. GET CURRENT USER DEPENDENCY (TOKEN CHECK)
 # ============================================
@@ -387,47 +449,17 @@ async def get_current_user(
     if not token_data:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    # Check token expiration.
-    current_ts = datetime.datetime.utcnow().timestamp()
-    exp = token_data.get("exp")
-    print("exp: ", exp)
-    if not exp or current_ts > exp:
-        db.query(Token).filter(Token.token == token_str).delete()
-        db.commit()
-        raise HTTPException(status_code=401, detail="Token expired")
+    # Check expiration and inactivity; record this request's activity.
+    _validate_session(db, token_str, token_data, inactivity_minutes=180)
     
-    # Check inactivity: if last_activity is older than 60 minutes.
-    last_activity_ts = token_data.get("last_activity")
-    if last_activity_ts:
-        inactivity = datetime.datetime.utcnow() - datetime.datetime.fromtimestamp(last_activity_ts)
-        if inactivity > datetime.timedelta(minutes=180):  # 60 minutes of inactivity
-            # Log out the user by deleting the token.
-            db.query(Token).filter(Token.token == token_str).delete()
-            db.commit()
-            raise HTTPException(status_code=401, detail="Logged out due to inactivity")
+    # Resolve the principal, then the user (and its role) from the auth caches.
+    principal = _resolve_principal(token_str, token_data)
+    user = _resolve_user(db, principal)
     
-    # Update token's last_activity timestamp.
-    new_last_activity = datetime.datetime.utcnow()
-    db.query(Token).filter(Token.token == token_str).update({"last_activity": new_last_activity})
-    db.commit()
-    
-    # Retrieve the user.
-    user_id = token_data.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid token payload")
-    try:
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        print("user obj: ", user.id)
-    except Exception:
-        raise HTTPException(status_code=401, detail="User not found")
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    # Retrieve the user's role.
-    role_id = token_data.get("role_id")
-    if not role_id:
+    # The user's role.
+    if not token_data.get("role_id"):
         raise HTTPException(status_code=401, detail="Token missing role information")
-    role_obj = db.query(Role).filter(Role.id == UUID(role_id)).first()
+    role_obj = user.role
     if not role_obj:
         raise HTTPException(status_code=400, detail="Unable to fetch user privileges")
     
@@ -435,7 +467,8 @@ async def get_current_user(
         "id":user.id,
         "user": user,
         "role": role_obj.name,
-        "permissions": role_obj.permissions
+        "permissions": role_obj.permissions,
+        "principal": principal,
     }
 
 
@@ -462,41 +495,11 @@ async def get_current_user_for_others(
     if not token_data:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    # Check token expiration.
-    current_ts = datetime.datetime.utcnow().timestamp()
-    exp = token_data.get("exp")
-    print("exp: ", exp)
-    if not exp or current_ts > exp:
-        db.query(Token).filter(Token.token == token_str).delete()
-        db.commit()
-        raise HTTPException(status_code=401, detail="Token expired")
-    
-    # Check inactivity: if last_activity is older than 60 minutes.
-    last_activity_ts = token_data.get("last_activity")
-    if last_activity_ts:
-        inactivity = datetime.datetime.utcnow() - datetime.datetime.fromtimestamp(last_activity_ts)
-        if inactivity > datetime.timedelta(minutes=60):  # 60 minutes of inactivity
-            # Log out the user by deleting the token.
-            db.query(Token).filter(Token.token == token_str).delete()
-            db.commit()
-            raise HTTPException(status_code=401, detail="Logged out due to inactivity")
+    # Check expiration and inactivity; record this request's activity.
+    _validate_session(db, token_str, token_data, inactivity_minutes=60)
     
-    # Update token's last_activity timestamp.
-    new_last_activity = datetime.datetime.utcnow()
-    db.query(Token).filter(Token.token == token_str).update({"last_activity": new_last_activity})
-    db.commit()
-    
-    # Retrieve the user.
-    user_id = token_data.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid token payload")
-    try:
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        print("user obj: ", user.id)
-    except Exception:
-        raise HTTPException(status_code=401, detail="User not found")
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    # Retrieve the user from the auth caches.
+    user = _resolve_user(db, _resolve_principal(token_str, token_data))
     
     return user
     # # Retrieve the user's role.
@@ -527,24 +530,7 @@ async def _decode_and_validate_token(
     if not token_data:
         raise HTTPException(401, "Invalid token")
 
-    now_ts = datetime.utcnow().timestamp()
-    exp    = token_data.get("exp")
-    if not exp or now_ts > exp:
-        db.query(Token).filter(Token.token == token_str).delete()
-        db.commit()
-        raise HTTPException(401, "Token expired")
-
-    last_act = token_data.get("last_activity")
-    if last_act and (datetime.utcnow() - datetime.fromtimestamp(last_act)) > datetime.timedelta(minutes=60):
-        db.query(Token).filter(Token.token == token_str).delete()
-        db.commit()
-        raise HTTPException(401, "Logged out due to inactivity")
-
-    # update last_activity
-    db.query(Token).filter(Token.token == token_str).update(
-        {"last_activity": datetime.utcnow()}
-    )
-    db.commit()
+    _validate_session(db, token_str, token_data, inactivity_minutes=60)
 
     return token_data
 
@@ -556,8 +542,7 @@ def require_permissions(required: List[str]):
     Usage: Inject as a dependency on protected endpoints.
     """
     def permission_checker(current_user: Dict = Depends(get_current_user)) -> Dict:
-        user_permissions = current_user.get("permissions") or []
-        if not any(perm in user_permissions for perm in required):
+        if not current_user["principal"].has_any(required):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Insufficient permissions. Missing at least one of: {', '.join(required)}"
@@ -565,25 +550,14 @@ def require_permissions(required: List[str]):
         return current_user
     return permission_checker
 
-def require_hr_dashboard(user: User = Depends(get_current_user)):
-    print("\n\n\nuser in require hr dashboard permission in utils.security::: ", user)
-    print(f"\n\n perm then:: {user.role}")
+def require_hr_dashboard(current_user: Dict = Depends(get_current_user)) -> User:
     """
-    Checks user.role.permissions for 'hr:dashboard', supporting both:
-    - list of strings:    ["hr:dashboard", ...]
-    - dict of flags:      { "hr:dashboard": true, ... }
+    Checks the principal's permission snapshot for 'hr:dashboard' (role
+    permissions may be stored as a list of strings or a dict of flags).
     """
-    perms = user.role.permissions or {}
-    allowed = False
-
-    if isinstance(perms, dict):
-        allowed = bool(perms.get("hr:dashboard"))
-    elif isinstance(perms, list):
-        allowed = "hr:dashboard" in perms
-
-    if not allowed:
+    if not current_user["principal"].has_permission("hr:dashboard"):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return user
+    return current_user["user"]
 
 
 def get_token_data_by_user_id( userid: UUID, db: Session = Depends(get_db)) -> dict:
@@ -616,17 +590,12 @@ def get_token_data_by_user_id( userid: UUID, db: Session = Depends(get_db)) -> d
 
 
 
-def ensure_hr_dashboard_ws(user: User):
+def ensure_hr_dashboard_ws(user: Union[Principal, User]):
     """
     Raise WebSocketDisconnect if user lacks 'hr:dashboard' permission.
+    Accepts a Principal or a User with its role loaded; checked in memory.
     """
-    print("\n\nuser object:: ", user)
-    perms = user.role.permissions or {}
-    ok = False
-    if isinstance(perms, dict):
-        ok = bool(perms.get("hr:dashboard"))
-    elif isinstance(perms, list):
-        ok = "hr:dashboard" in perms
-    if not ok:
+    principal = user if isinstance(user, Principal) else Principal.from_user(user)
+    if not principal.has_permission("hr:dashboard"):
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
-    return True
\ No newline at end of file
+    return True
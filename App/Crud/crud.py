@@ -6,14 +6,10 @@ from typing import Type, TypeVar, Optional, List, Any
 from pydantic import BaseModel
 from uuid import UUID 
 from datetime import datetime
-from passlib.context import CryptContext
 import secrets
-from smtplib import SMTPException
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
 import logging
 from Service.email_service import build_account_email_html, EmailService
+from Service.email_outbox import enqueue_email
 from Service.gcs_service import GoogleCloudStorage
 from Utils.config import DevelopmentConfig, get_config
 from email_service import *
@@ -23,7 +19,8 @@ from Schemas.schemas import *
 from sqlalchemy.orm import joinedload
 from Utils.serialize_4_json import serialize_for_json
 import json 
-from Utils.security import pwd_context, Security
+from Utils.security import Security
+from Utils.password_service import password_service
 from Utils.util import get_organization_acronym, extract_items
 from Utils.config import DevelopmentConfig
 from Utils.sms_utils import get_sms_service
@@ -74,7 +71,7 @@ class CRUDBase:
         self.model = model
     
     def hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return password_service.hash(password)
 
     def get(
         self, db: Session, id: UUID
@@ -375,7 +372,7 @@ class CRUDBase:
                     # username = user_data.get("username", "").strip() or generate_random_string()
                     username = employee_data["email"].strip() or  employee_data["first_name"].strip() + "-" + generate_random_string(4)
                     password = user_data.get("hashed_password", "").strip() or  generate_random_string(12)
-                    hashed_password = self.hash_password(password)
+                    hashed_password = await password_service.hash_async(password)
                     
                     
                     user_obj = User(
@@ -1315,7 +1312,7 @@ class CRUDBase:
         :param db: Database session
         :param organization: Created organization instance
         :param obj_data: Original data for creating the organization
-        :param email_smtp_config: SMTP settings for sending emails
+        :param email_smtp_config: Unused; the credentials email goes through the organization's email settings
         """
         # Generate a random username and password
         username = generate_random_string(USERNAME_LENGTH)
@@ -1338,7 +1335,7 @@ class CRUDBase:
 
             # Send email with credentials
             self.send_credentials_email(
-                smtp_config=email_smtp_config,
+                organization_id=organization.id,
                 to_email=obj_data["email"],
                 username=username,
                 password=password,
@@ -1357,31 +1354,21 @@ class CRUDBase:
             )
 
 
-    def send_credentials_email(self, smtp_config, to_email, username, password):
-        """Sends an email with login credentials."""
-        if not smtp_config:
-            raise HTTPException(
-                status_code=500,
-                detail="SMTP configuration is not provided.",
-            )
-
-        msg = MIMEText(
+    def send_credentials_email(self, organization_id, to_email, username, password):
+        """Queues an email with login credentials, sent through the organization's email settings."""
+        body = (
             f"Welcome to the system!\n\nYour login credentials are:\nUsername: {username}\nPassword: {password}\n\nPlease change your password after logging in."
         )
-        msg["Subject"] = "Welcome to the System"
-        msg["From"] = smtp_config["from_email"]
-        msg["To"] = to_email
-
+        # Queued on the email outbox; the worker sends it with the tenant's own
+        # server and From address (the application's when the organization has
+        # none), so the sender always matches the server that relays it.
         try:
-            with smtplib.SMTP(smtp_config["host"], smtp_config["port"]) as server:
-                server.starttls()
-                server.login(smtp_config["username"], smtp_config["password"])
-                server.send_message(msg)
-
+            enqueue_email(to_email, "Welcome to the System", body, subtype="plain",
+                          organization_id=organization_id, transport="tenant")
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to send email: {str(e)}",
+                detail=f"Failed to queue email: {str(e)}",
             )
 
 
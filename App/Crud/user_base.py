@@ -2,15 +2,15 @@ import asyncio
 import json
 import random
 import string
+from functools import lru_cache
 from fastapi import HTTPException, Depends, BackgroundTasks, UploadFile, HTTPException
 from fastapi.responses import FileResponse
 import requests
 from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List, Tuple
 from uuid import UUID
-from passlib.context import CryptContext
 import secrets
 from pydantic import EmailStr
 from smtplib import SMTPException
@@ -20,7 +20,6 @@ import smtplib
 import logging
 from jinja2 import Template
 import pandas as pd
-import io
 
 import urllib.parse
 
@@ -48,8 +47,11 @@ from Utils.security import Security
 import aiohttp
 from Service.gcs_service import GoogleCloudStorage
 from Service.email_service import EmailService, get_email_template, get_update_notification_email_template
+from Service.lookup_resolver import LookupResolver
+from Service.account_mailer import ACCOUNT_EMAIL_FIELDS, AccountEmailBatch
+from Utils.email_templates import RenderedTemplate, email_templates, org_key
 from aiohttp import ClientTimeout, FormData
-from rapidfuzz import process, fuzz
+from Utils.header_matcher import SynonymIndex
 
 
 rate_limiter = RateLimiter(max_attempts=5, period=60)  # 5 attempts per 60 seconds
@@ -85,8 +87,9 @@ global_security = Security(secret_key=settings.SECRET_KEY, algorithm=settings.AL
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Constants for Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing runs on the shared bcrypt worker pool
+from Utils.password_service import password_service
+from Utils.upload_reader import UploadReader, open_upload
 
 # Secure Email Configuration
 # SMTP_CREDENTIALS = {
@@ -277,6 +280,7 @@ SYNONYMS_MAP = {
 
 
 # --- Helper: Normalize Column Name ---
+@lru_cache(maxsize=4096)
 def normalize_column_name(col_name: str) -> str:
     """
     Lowercase, trim, and remove non-alphanumeric characters (except space).
@@ -286,17 +290,8 @@ def normalize_column_name(col_name: str) -> str:
     col_name = re.sub(r'\s+', ' ', col_name)
     return col_name
 
-# --- Helper: Get Flat List of Synonyms ---
-def get_flat_synonyms():
-    flat = []
-    for synonyms in SYNONYMS_MAP.values():
-        for s in synonyms:
-            flat.append(normalize_column_name(s))
-    
-    # print("flat: ", flat)
-    return flat
-
-FLAT_SYNONYMS = get_flat_synonyms()
+# --- Helper: Compiled Synonym Index ---
+HEADER_INDEX = SynonymIndex(SYNONYMS_MAP, DATE_SYNONYMS, model_field_map["employee"], normalize_column_name)
 
 # --- Helper: Fuzzy Matching for Column Names ---
 def find_standard_concept(col_name: str, threshold: int = 85) -> str:
@@ -305,24 +300,16 @@ def find_standard_concept(col_name: str, threshold: int = 85) -> str:
     Steps:
       1. Normalize the name.
       2. Check DATE_SYNONYMS.
-      3. Fuzzy-match using RapidFuzz against our flat synonyms.
+      3. Exact match against the normalized synonyms, else fuzzy-match using RapidFuzz.
       4. As fallback, if the normalized name exactly matches an expected employee field, use that.
+    Results are memoized per header (see Utils.header_matcher.SynonymIndex).
     """
-    norm = normalize_column_name(col_name)
-    if norm in DATE_SYNONYMS:
-        return DATE_SYNONYMS[norm]
-    best, score, _ = process.extractOne(norm, FLAT_SYNONYMS, scorer=fuzz.ratio)
-    if best and score >= threshold:
-        for concept, synonyms in SYNONYMS_MAP.items():
-            norm_syns = {normalize_column_name(s) for s in synonyms}
-            if best in norm_syns:
-                return concept
-    for field in model_field_map["employee"]:
-        if normalize_column_name(field) == norm:
-            # print("\n\nreturned stanadardized flattened column name: ", field)
-            return field
-    # print("\n\nreturned stanadardized normalized column name: ", norm)
-    return norm
+    return HEADER_INDEX.resolve(col_name, threshold)
+
+
+def find_standard_concepts(col_names, threshold: int = 85) -> List[str]:
+    """find_standard_concept for a whole header row, fuzzy-matched in one batch."""
+    return HEADER_INDEX.resolve_many(col_names, threshold)
 
 
 # ------------------------------------------------------------------------------
@@ -574,7 +561,13 @@ class UserCRUD:
 
 
     def hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return password_service.hash(password)
+
+    @staticmethod
+    def _generate_hashed_passwords(count: int, length: int = 6) -> List[Tuple[str, str]]:
+        """`count` random (password, bcrypt hash) pairs, hashed in parallel."""
+        passwords = [generate_random_string(length) for _ in range(count)]
+        return list(zip(passwords, password_service.hash_many(passwords)))
 
     def log_audit(
         self,
@@ -762,22 +755,14 @@ class UserCRUD:
         (case-insensitive). If not found, create a new record with provided defaults.
         Return the record's id as a string.
         """
-        value = value.strip()
-        obj = db.query(table).filter(
-            getattr(table, lookup_field).ilike(value),
-            table.organization_id == organization_id
-        ).first()
-        if not obj:
-            data = {lookup_field: value, "organization_id": organization_id}
-            data.update(defaults)
-            obj = table(**data)
-            db.add(obj)
-            db.commit()
-            db.refresh(obj)
-        
+        # Served from the import's LookupResolver: one query per table, not per row.
+        resolver = LookupResolver.for_session(db, organization_id)
+        created = resolver.stats["created"]
+        obj_id = resolver.resolve(value, table, lookup_field, defaults)
+        if resolver.stats["created"] > created:
             background_tasks.add_task(push_summary_update, db, str(organization_id))
             # asyncio.create_task(asyncio.create_task(push_summary_update(db, str(organization_id))))
-        return str(obj.id)
+        return str(obj_id)
 
     # --------------------------
     # Helper: Get Primary Logo URL
@@ -907,20 +892,32 @@ class UserCRUD:
 
    
 
-    def bulk_insert_crud(self, organization_id: str, file: UploadFile, background_tasks: BackgroundTasks, db: Session, sms_svc: BaseSMSService = Depends(get_sms_service), conf: BaseConfig = Depends(get_config)  ) -> dict:
-        # (1) Validate file extension.
-        if not allowed_file(file.filename):
-            raise HTTPException(status_code=400, detail="Only CSV or Excel files are allowed.")
-
-        # (2) Read file contents.
+    def bulk_insert_crud(self, organization_id: str, file: UploadFile, background_tasks: BackgroundTasks, db: Session, sms_svc: BaseSMSService = Depends(get_sms_service), conf: BaseConfig = Depends(get_config), progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Import employees (and their related sheets) from a CSV/Excel upload.
+        `progress`, if given, is called after every chunk with the running
+        total_rows (estimate), processed_rows, success_count and error_count
+        (used by the bulk-import jobs, Service/bulk_import_jobs.py).
+        """
+        # (1) Validate file extension and open a chunked reader.
+        reader = open_upload(file, ALLOWED_EXTENSIONS)
         try:
-            contents = file.file.read()
-            file_stream = io.BytesIO(contents)
-            if file.filename.lower().endswith("csv"):
-                df = pd.read_csv(file_stream)
-                sheets = {"default": df}
-            else:
-                sheets = pd.read_excel(file_stream, sheet_name=None)
+            return self._bulk_insert_sheets(reader, organization_id, file, background_tasks, db, sms_svc, conf,
+                                            progress)
+        finally:
+            # Also on failure: close the workbook and end the import's lookup scope.
+            reader.close()
+            LookupResolver.release(db)
+
+    def _bulk_insert_sheets(self, reader: UploadReader, organization_id: str, file: UploadFile,
+                            background_tasks: BackgroundTasks, db: Session, sms_svc: BaseSMSService,
+                            conf: BaseConfig, progress: Optional[Callable[[dict], None]] = None) -> dict:
+        # (2) Read only the sheet headers; rows are streamed chunk by chunk in each pass.
+        try:
+            sheets = {
+                sheet_name: [str(col).strip().lower() for col in reader.columns(sheet_name)]
+                for sheet_name in reader.sheet_names()
+            }
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
@@ -928,414 +925,439 @@ class UserCRUD:
         error_records = []
         failed_rows_by_sheet: Dict[str, List[int]] = {}
 
+        counts = {"total_rows": None, "processed_rows": 0, "success_count": 0, "error_count": 0}
+        if progress:
+            estimates = [reader.count_rows(sheet_name) for sheet_name in sheets]
+            counts["total_rows"] = None if None in estimates else sum(estimates)
+            progress(dict(counts))
+
+        def report_progress(rows: int) -> None:
+            if progress:
+                counts.update(processed_rows=counts["processed_rows"] + rows,
+                              success_count=len(success_records), error_count=len(error_records))
+                progress(dict(counts))
+
         # (3) Retrieve organization record.
         org = db.query(Organization).filter(Organization.id == organization_id).first()
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found.")
 
-        logo_url = self.get_primary_logo(org.logos or {})
-        logo_url = extract_items(logo_url)
-        print(f"\norganization logo source: {logo_url}")
-        org_acronym = get_organization_acronym(org.name)  # Or a function to get acronym.
-        login_href = f"{org.access_url}/signin" if org.access_url else "https://example.com/login"
 
         # (4) Build an employee_map (lowercase email → employee ID) for linking related sheets.
         employee_map = {}   # email (lowercase) -> employee_id
         employee_list = []  # list of employee IDs in processing order
         emp_contacts = []
 
+        # Account emails: the organization's shell (logo, acronym, login link) is
+        # rendered once per org version; sent as one batch after pass 1.
+        def account_email_shell() -> RenderedTemplate:
+            logo_url = extract_items(self.get_primary_logo(org.logos or {}))
+            org_acronym = get_organization_acronym(org.name)
+            login_href = f"{org.access_url}/signin" if org.access_url else "https://example.com/login"
+            return RenderedTemplate(
+                lambda fields: self.build_account_email_html(fields, org_acronym, logo_url, login_href,
+                                                             fields["password"]),
+                ACCOUNT_EMAIL_FIELDS,
+            )
+
+        account_emails = AccountEmailBatch(
+            email_templates.cached_shell(org_key(org, "user_base.account_created"), account_email_shell),
+            "Account Created Successfully",
+            organization_id,
+        )
+
         # (5) Determine processing order: process sheets with highest employee field overlap first.
         sheet_order = sorted(
             sheets.items(),
-            key=lambda item: len(set(item[1].columns.str.lower()).intersection(model_field_map["employee"])),
+            key=lambda item: len(set(item[1]).intersection(model_field_map["employee"])),
             reverse=True
         )
         # print("\n\nordered sheets: ", sheet_order)
 
         total_employee_rows = 0
         # ------------- PASS 1: Process Employee Records -------------
-        for sheet_name, df in sheet_order:
-            # print(f"\n\nsheet: {sheet_order}\nsheet_name: ", f"{sheet_name}\ncolumns: {df.columns}")
+        for sheet_name, columns in sheet_order:
+            # print(f"\n\nsheet: {sheet_order}\nsheet_name: ", f"{sheet_name}\ncolumns: {columns}")
             sheet_lower = sheet_name.strip().lower()
-            if sheet_lower in {"employee", "employees"} or len(set(df.columns.str.lower()).intersection(model_field_map["employee"])) >= 5:
-                df.columns = [col.strip().lower() for col in df.columns]
-                total_employee_rows += len(df)
-                for index, row in df.iterrows():
-                    row_data = {k: row[k] for k in df.columns}
-                    row_data = sanitize_row_data(row_data)
-                    try:
-                        expected_fields = model_field_map["employee"]
-                        ModelClass = model_classes["employee"]
-                        model_data = {}
-                        extra_data = {}
-                        # Process each column using fuzzy matching.
-                        for col_name, val in row_data.items():
-                            concept = find_standard_concept(col_name)
-                            # Map the concept to an expected field if possible.
-                            for field in expected_fields:
-                                if normalize_column_name(field) == normalize_column_name(concept):
-                                    concept = field
-                                    break
-                            if concept in expected_fields and val is not None:
-                                model_data[concept] = val
-                            else:
-                                if any(x in concept for x in ["address", "phone", "home address", "residential address","contact", "gps", "number", "mobile", "phone_number", "contact_number", "mobile_number", "telephone", "telephone_number"]):
-                                    if concept in ["phone", "contact", "number", "mobile", "phone_number", "contact_number", "mobile_number", "telephone", "telephone_number"]:
-                                        emp_contacts.append(val)
+            if sheet_lower in {"employee", "employees"} or len(set(columns).intersection(model_field_map["employee"])) >= 5:
+                for df in reader.iter_chunks(sheet_name):
+                    df.columns = [str(col).strip().lower() for col in df.columns]
+                    total_employee_rows += len(df)
+                    # Temporary passwords for the whole sheet, hashed in parallel on the bcrypt pool
+                    sheet_passwords = iter(self._generate_hashed_passwords(len(df)))
+                    for index, row in df.iterrows():
+                        row_data = {k: row[k] for k in df.columns}
+                        row_data = sanitize_row_data(row_data)
+                        try:
+                            expected_fields = model_field_map["employee"]
+                            ModelClass = model_classes["employee"]
+                            model_data = {}
+                            extra_data = {}
+                            # Process each column using fuzzy matching.
+                            for col_name, val in row_data.items():
+                                concept = find_standard_concept(col_name)
+                                # Map the concept to an expected field if possible.
+                                for field in expected_fields:
+                                    if normalize_column_name(field) == normalize_column_name(concept):
+                                        concept = field
+                                        break
+                                if concept in expected_fields and val is not None:
+                                    model_data[concept] = val
+                                else:
+                                    if any(x in concept for x in ["address", "phone", "home address", "residential address","contact", "gps", "number", "mobile", "phone_number", "contact_number", "mobile_number", "telephone", "telephone_number"]):
+                                        if concept in ["phone", "contact", "number", "mobile", "phone_number", "contact_number", "mobile_number", "telephone", "telephone_number"]:
+                                            emp_contacts.append(val)
 
-                                    extra_data[concept] = val
+                                        extra_data[concept] = val
                                     
-                        if extra_data:
-                            model_data["contact_info"] = extra_data
-                            # emp_contacts = extra_data
+                            if extra_data:
+                                model_data["contact_info"] = extra_data
+                                # emp_contacts = extra_data
                         
-                        print("\n\nemp_contact:: ", emp_contacts)
-                        # Convert date fields.
-                        for dcol in ["date_of_birth", "hire_date", "termination_date"]:
-                            if dcol in model_data and model_data[dcol] is not None:
-                                model_data[dcol] = parse_date_value(model_data[dcol])
-                        # Add organization_id.
-                        model_data["organization_id"] = organization_id
-                        salary_value = None
-                        transient_role_id = None
-
-                        # --- Process Branch & Department ---
-                        # Process branch from raw row data (not from model_data)
-                        branch_id = None
-                        branch_key = None
-                        for key in row_data.keys():
-                            if find_standard_concept(key).lower() == "branch":
-                                branch_key = key
-                                break
-                        if branch_key:
-                            branch_val = row_data.get(branch_key)
-                            if branch_val:
-                                branch_val = str(branch_val).strip()
-                                branch_location = str(row_data.get("location", branch_val)).strip()
-                                if org.nature.strip().lower() == "single managed":
-                                    row_data.pop(branch_key, None)
-                                    print(f"After pop {branch_key} from {row_data}")
-                                    branch_id = None
-                                    # model_data.pop(branch_key, None)
-                                    # print(f"\n\nAfter {model_data} pop {branch_key}")
-                                    # raise HTTPException(
-                                    #     status_code=400,
-                                    #     detail=f"Organization '{org.name}' is single managed; branch data is not allowed."
-                                    # )
-                                else:
-                                    # Import Branch model from your organization module.
-                                    from Models.Tenants.organization import Branch
-                                    branch_id = self.process_related_field(db, background_tasks, organization_id, branch_val, Branch, "name", {"location": branch_location, "manager_id": None})
+                            print("\n\nemp_contact:: ", emp_contacts)
+                            # Convert date fields.
+                            for dcol in ["date_of_birth", "hire_date", "termination_date"]:
+                                if dcol in model_data and model_data[dcol] is not None:
+                                    model_data[dcol] = parse_date_value(model_data[dcol])
+                            # Add organization_id.
+                            model_data["organization_id"] = organization_id
+                            salary_value = None
+                            transient_role_id = None
+
+                            # --- Process Branch & Department ---
+                            # Process branch from raw row data (not from model_data)
+                            branch_id = None
+                            branch_key = None
+                            for key in row_data.keys():
+                                if find_standard_concept(key).lower() == "branch":
+                                    branch_key = key
+                                    break
+                            if branch_key:
+                                branch_val = row_data.get(branch_key)
+                                if branch_val:
+                                    branch_val = str(branch_val).strip()
+                                    branch_location = str(row_data.get("location", branch_val)).strip()
+                                    if org.nature.strip().lower() == "single managed":
+                                        row_data.pop(branch_key, None)
+                                        print(f"After pop {branch_key} from {row_data}")
+                                        branch_id = None
+                                        # model_data.pop(branch_key, None)
+                                        # print(f"\n\nAfter {model_data} pop {branch_key}")
+                                        # raise HTTPException(
+                                        #     status_code=400,
+                                        #     detail=f"Organization '{org.name}' is single managed; branch data is not allowed."
+                                        # )
+                                    else:
+                                        # Import Branch model from your organization module.
+                                        from Models.Tenants.organization import Branch
+                                        branch_id = self.process_related_field(db, background_tasks, organization_id, branch_val, Branch, "name", {"location": branch_location, "manager_id": None})
                         
-                        print(f"branch_id = {branch_id}")
-                        # Process department if present in model_data.
-                        if "department" in model_data and model_data["department"]:
-                            dept_val = str(model_data["department"]).strip()
-                            defaults = {"branch_id": branch_id} if branch_id else {}
-                            print(f"defaults = {defaults}")
-                            dept_id = self.process_related_field(db,background_tasks, organization_id, dept_val, Department, "name", defaults)
-                            print(f"processed department with id = {dept_id}")
-                            model_data["department_id"] = dept_id
-                            model_data.pop("department", None)
-
-                        # --- Process Rank ---
-                        if "rank" in model_data and model_data["rank"]:
-                            rank_val = str(model_data["rank"]).strip()
-                            rank_id = self.process_related_field(db, background_tasks, organization_id, rank_val, Rank, "name", {"min_salary": 0, "max_salary": None, "currency": "GHS"})
-                            model_data["rank_id"] = rank_id
-                            model_data.pop("rank", None)
-
-                        # --- Process Employee Type ---
-                        # Check for "employee type" or "employment type" in model_data.
-                        # If found, process it and set employee_type_id.
-                        # If not found, check for "employment type" in model_data.
-                        # If found, process it and set employee_type_id.
-                        # print("is employee type: ", model_data["employee type"])
-                        print("calling employee type: ", model_data) 
-                        print("row_data: ", row_data)
-                        type_key = None
-                        for key in row_data.keys():
-                            if find_standard_concept(key).lower() == "employee_type":
-                                type_key = key
-                                break
+                            print(f"branch_id = {branch_id}")
+                            # Process department if present in model_data.
+                            if "department" in model_data and model_data["department"]:
+                                dept_val = str(model_data["department"]).strip()
+                                defaults = {"branch_id": branch_id} if branch_id else {}
+                                print(f"defaults = {defaults}")
+                                dept_id = self.process_related_field(db,background_tasks, organization_id, dept_val, Department, "name", defaults)
+                                print(f"processed department with id = {dept_id}")
+                                model_data["department_id"] = dept_id
+                                model_data.pop("department", None)
+
+                            # --- Process Rank ---
+                            if "rank" in model_data and model_data["rank"]:
+                                rank_val = str(model_data["rank"]).strip()
+                                rank_id = self.process_related_field(db, background_tasks, organization_id, rank_val, Rank, "name", {"min_salary": 0, "max_salary": None, "currency": "GHS"})
+                                model_data["rank_id"] = rank_id
+                                model_data.pop("rank", None)
+
+                            # --- Process Employee Type ---
+                            # Check for "employee type" or "employment type" in model_data.
+                            # If found, process it and set employee_type_id.
+                            # If not found, check for "employment type" in model_data.
+                            # If found, process it and set employee_type_id.
+                            # print("is employee type: ", model_data["employee type"])
+                            print("calling employee type: ", model_data) 
+                            print("row_data: ", row_data)
+                            type_key = None
+                            for key in row_data.keys():
+                                if find_standard_concept(key).lower() == "employee_type":
+                                    type_key = key
+                                    break
                             
-                        if type_key:
-                            et_val = row_data.get(type_key)
-                            if et_val:
-                                et_val = str(et_val).strip()
-                                print("employee type value: ", et_val)
-                                et_id = self.process_related_field(db,background_tasks, organization_id, et_val, EmployeeType, "type_code", {})
-                                model_data["employee_type_id"] = et_id
-                                model_data.pop(type_key, None)
-                        # if "employee type" in model_data and model_data["employee type"]:
-
-                        #     et_val = str(model_data["employee type"]).strip()
-                        #     print("employee type value: ", et_val)
-                        #     et_id = self.process_related_field(db, organization_id, et_val, EmployeeType, "type_code", {})
-                        #     model_data["employee_type_id"] = et_id
-                        #     model_data.pop("employee type", None)
-                        # elif "employment type" in model_data and model_data["employment type"]:
-                        #     et_val = str(model_data["employment type"]).strip()
-                        #     et_id = self.process_related_field(db, organization_id, et_val, EmployeeType, "type_code", {})
-                        #     model_data["employee_type_id"] = et_id
-                        #     model_data.pop("employment type", None)
-
-                        transient_role_id = None
-                        role_val = None
-
-                        # 1. Dynamic Role Column Detection using Fuzzy Matching
-                        ROLE_SYNONYMS = SYNONYMS_MAP.get('role', {'role'})
-                        print(f"Role synonyms: {ROLE_SYNONYMS}")
-                        # --- Process Role ---
-                        if "role" in model_data and model_data["role"]:
-                            role_val = str(model_data["role"]).strip()
-                            # Look up role; if not found, create with default permissions if "staff"
-                            existing_role = db.query(Role).filter(
-                                Role.name.ilike(role_val),
-                                Role.organization_id == organization_id
-                            ).first()
-                            if not existing_role:
-                                default_perms = []
-                                # if role_val.lower() == "staff":
-                                    # Locate the 'Employee' or 'staff' role configuration.
-                                role_config = next(
-                                    (role_item for role_item in settings.DEFAULT_ROLE_PERMISSIONS
-                                    if (role_val.lower() == role_item["name"].lower()) or (role_val.lower() in role_item["name"].lower()) ),
-                                    None
-                                )
-                                print("role_config: ", role_config)
-                                if role_config:
-                                    default_perms = role_config.get("permissions", [])
-                                    print("default_perms: ", default_perms)
-                                # Create new role with default permissions.
-                                print("creating new role: ", role_val)
-                                new_role = Role(name=role_val, permissions=default_perms, organization_id=organization_id)
-                                db.add(new_role)
-                                db.commit()
-                                db.refresh(new_role)
-                                background_tasks.add_task(push_summary_update, db, str(organization_id))
-                                # asyncio.create_task(push_summary_update(db, str(organization_id)))
-                                transient_role_id = str(new_role.id)
+                            if type_key:
+                                et_val = row_data.get(type_key)
+                                if et_val:
+                                    et_val = str(et_val).strip()
+                                    print("employee type value: ", et_val)
+                                    et_id = self.process_related_field(db,background_tasks, organization_id, et_val, EmployeeType, "type_code", {})
+                                    model_data["employee_type_id"] = et_id
+                                    model_data.pop(type_key, None)
+                            # if "employee type" in model_data and model_data["employee type"]:
+
+                            #     et_val = str(model_data["employee type"]).strip()
+                            #     print("employee type value: ", et_val)
+                            #     et_id = self.process_related_field(db, organization_id, et_val, EmployeeType, "type_code", {})
+                            #     model_data["employee_type_id"] = et_id
+                            #     model_data.pop("employee type", None)
+                            # elif "employment type" in model_data and model_data["employment type"]:
+                            #     et_val = str(model_data["employment type"]).strip()
+                            #     et_id = self.process_related_field(db, organization_id, et_val, EmployeeType, "type_code", {})
+                            #     model_data["employee_type_id"] = et_id
+                            #     model_data.pop("employment type", None)
+
+                            transient_role_id = None
+                            role_val = None
+
+                            # 1. Dynamic Role Column Detection using Fuzzy Matching
+                            ROLE_SYNONYMS = SYNONYMS_MAP.get('role', {'role'})
+                            print(f"Role synonyms: {ROLE_SYNONYMS}")
+                            # --- Process Role ---
+                            if "role" in model_data and model_data["role"]:
+                                role_val = str(model_data["role"]).strip()
+                                # Look up role; if not found, create with default permissions if "staff"
+                                existing_role = db.query(Role).filter(
+                                    Role.name.ilike(role_val),
+                                    Role.organization_id == organization_id
+                                ).first()
+                                if not existing_role:
+                                    default_perms = []
+                                    # if role_val.lower() == "staff":
+                                        # Locate the 'Employee' or 'staff' role configuration.
+                                    role_config = next(
+                                        (role_item for role_item in settings.DEFAULT_ROLE_PERMISSIONS
+                                        if (role_val.lower() == role_item["name"].lower()) or (role_val.lower() in role_item["name"].lower()) ),
+                                        None
+                                    )
+                                    print("role_config: ", role_config)
+                                    if role_config:
+                                        default_perms = role_config.get("permissions", [])
+                                        print("default_perms: ", default_perms)
+                                    # Create new role with default permissions.
+                                    print("creating new role: ", role_val)
+                                    new_role = Role(name=role_val, permissions=default_perms, organization_id=organization_id)
+                                    db.add(new_role)
+                                    db.commit()
+                                    db.refresh(new_role)
+                                    background_tasks.add_task(push_summary_update, db, str(organization_id))
+                                    # asyncio.create_task(push_summary_update(db, str(organization_id)))
+                                    transient_role_id = str(new_role.id)
+                                else:
+                                    transient_role_id = str(existing_role.id)
+                                model_data.pop("role", None)
                             else:
-                                transient_role_id = str(existing_role.id)
-                            model_data.pop("role", None)
-                        else:
-                            if not transient_role_id:
-                                # If no role provided, use default role (e.g. "Staff" or "Employee").
-                                # This is a fallback in case the role is not found in the database.
-                                # Locate the 'Employee' or 'staff' role configuration.
-                                transient_role_id = self.get_or_create_default_role(db, background_tasks, organization_id)
-                            # transient_role_id = self.get_or_create_default_role(db, organization_id)
-
-                        # --- Process Salary ---
-                        if "salary" in model_data and model_data["salary"]:
-                            try:
-                                salary_value = float(model_data["salary"])
-                            except Exception:
-                                salary_value = None
-                            model_data.pop("salary", None)
-
-                        # Generate a random password.
-                        transient_pwd = generate_random_string(6)
-
-                        # Build the Employee record.
-                        record = Employee(**model_data)
-                        print("transient_role_id: ", transient_role_id)
-                        # if transient_role_id:
-                        setattr(record, "_role_id", transient_role_id)
-                        setattr(record, "_plain_password", transient_pwd)
-                        db.add(record)
-                        db.flush()
-                        background_tasks.add_task(push_summary_update, db, str(organization_id))
-                        # asyncio.create_task(push_summary_update(db, str(organization_id)))
-                        # # Update employee_map using lowercase email.
-                        # if "email" in model_data and model_data["email"]:
-                        #     employee_map[model_data["email"].lower()] = record.id
-                        # Update employee_map and employee_list.
-                        if "email" in model_data and model_data["email"]:
-                            email_lower = model_data["email"].lower()
-                            employee_map[email_lower] = record.id
-                            employee_list.append(record.id)
-
-                        # Create SalaryPayment record if salary provided.
-                        if salary_value is not None:
-                            sp = SalaryPayment(
-                                employee_id=record.id,
-                                rank_id=model_data.get("rank_id"),
-                                amount=salary_value,
-                                currency="GHS",
-                                payment_date=datetime.utcnow(),
-                                payment_method="Bank Transfer",
-                                transaction_id=''.join(random.choices(string.ascii_letters + string.digits, k=12)),
-                                status="Success"
-                            )
-                            db.add(sp)
+                                if not transient_role_id:
+                                    # If no role provided, use default role (e.g. "Staff" or "Employee").
+                                    # This is a fallback in case the role is not found in the database.
+                                    # Locate the 'Employee' or 'staff' role configuration.
+                                    transient_role_id = self.get_or_create_default_role(db, background_tasks, organization_id)
+                                # transient_role_id = self.get_or_create_default_role(db, organization_id)
+
+                            # --- Process Salary ---
+                            if "salary" in model_data and model_data["salary"]:
+                                try:
+                                    salary_value = float(model_data["salary"])
+                                except Exception:
+                                    salary_value = None
+                                model_data.pop("salary", None)
+
+                            # Take this row's pre-hashed random password.
+                            transient_pwd, transient_hash = next(sheet_passwords)
+
+                            # Build the Employee record.
+                            record = Employee(**model_data)
+                            print("transient_role_id: ", transient_role_id)
+                            # if transient_role_id:
+                            setattr(record, "_role_id", transient_role_id)
+                            setattr(record, "_plain_password", transient_pwd)
+                            setattr(record, "_hashed_password", transient_hash)
+                            db.add(record)
                             db.flush()
+                            background_tasks.add_task(push_summary_update, db, str(organization_id))
+                            # asyncio.create_task(push_summary_update(db, str(organization_id)))
+                            # # Update employee_map using lowercase email.
+                            # if "email" in model_data and model_data["email"]:
+                            #     employee_map[model_data["email"].lower()] = record.id
+                            # Update employee_map and employee_list.
+                            if "email" in model_data and model_data["email"]:
+                                email_lower = model_data["email"].lower()
+                                employee_map[email_lower] = record.id
+                                employee_list.append(record.id)
+
+                            # Create SalaryPayment record if salary provided.
+                            if salary_value is not None:
+                                sp = SalaryPayment(
+                                    employee_id=record.id,
+                                    rank_id=model_data.get("rank_id"),
+                                    amount=salary_value,
+                                    currency="GHS",
+                                    payment_date=datetime.utcnow(),
+                                    payment_method="Bank Transfer",
+                                    transaction_id=''.join(random.choices(string.ascii_letters + string.digits, k=12)),
+                                    status="Success"
+                                )
+                                db.add(sp)
+                                db.flush()
 
 
 
-                        db.commit()
-                        success_records.append({
-                            "sheet": sheet_name,
-                            "row_index": index,
-                            "model": "employee",
-                            "data": row_data
-                        })
-                        background_tasks.add_task(push_summary_update, db, str(organization_id))
-                        # asyncio.create_task(push_summary_update(db, str(organization_id)))
-
-                        # Optionally send email notification.
-                        if "email" in model_data and model_data["email"]:
-                            try:
-                                email_service = EmailService()
-                                email_body = self.build_account_email_html(model_data, org_acronym, logo_url, login_href, transient_pwd)
-                                background_tasks.add_task(
-                                    email_service.send_html_email,
-                                    background_tasks,
-                                    [model_data["email"]],
-                                    "Account Created Successfully",
-                                    email_body
-                                )
-                            except Exception as e_email:
-                                print(f"[WARN] Email notification failed for row {index}: {e_email}")
+                            db.commit()
+                            success_records.append({
+                                "sheet": sheet_name,
+                                "row_index": index,
+                                "model": "employee"
+                            })
+                            background_tasks.add_task(push_summary_update, db, str(organization_id))
+                            # asyncio.create_task(push_summary_update(db, str(organization_id)))
+
+                            # Queue the account email notification.
+                            if "email" in model_data and model_data["email"]:
+                                account_emails.add(model_data["email"], {**{f: model_data.get(f) for f in ACCOUNT_EMAIL_FIELDS},
+                                                                         "password": transient_pwd})
                         
-                        try:
-                            #send sms notification to employees by extracting phone or contact from contact_info dict
-                            org = db.get(Organization, organization_id)
-                            sender = get_organization_acronym(org.name) if org.name else conf.ARKESEL_SENDER_ID    #getattr(org.name, "sms_sender_id", conf.ARKESEL_SENDER_ID)
-                            use_case= getattr(org, "sms_use_case", conf.ARKESEL_USE_CASE)
-
-                            # print("\n\nemp_contacts for sms: ", emp_contacts)
-                            if emp_contacts:
-                                # Iterate over success_records, send SMS to each
-                                for phone in emp_contacts:
-                                    # print("\nphone: ", phone)
-                                    if phone:
-                                        sms_svc.send(
-                                            phone,
-                                            "employee_created",
-                                            {"first_name": model_data["first_name"], "org_name": org.name, "email": model_data["email"]},
-                                            sender_id=sender,
-                                            use_case=use_case
-                                        )
-                                        print(f"SMS sent to {phone} for employee creation.")
-                                    else:
-                                        print(f"Phone number not found for employee {model_data['first_name']} {model_data['last_name']}")
-                        except Exception as e_sms:
-                            print(f"[WARN] SMS notification failed for row {index}: {e_sms}")
+                            try:
+                                #send sms notification to employees by extracting phone or contact from contact_info dict
+                                org = db.get(Organization, organization_id)
+                                sender = get_organization_acronym(org.name) if org.name else conf.ARKESEL_SENDER_ID    #getattr(org.name, "sms_sender_id", conf.ARKESEL_SENDER_ID)
+                                use_case= getattr(org, "sms_use_case", conf.ARKESEL_USE_CASE)
+
+                                # print("\n\nemp_contacts for sms: ", emp_contacts)
+                                if emp_contacts:
+                                    # Iterate over success_records, send SMS to each
+                                    for phone in emp_contacts:
+                                        # print("\nphone: ", phone)
+                                        if phone:
+                                            sms_svc.send(
+                                                phone,
+                                                "employee_created",
+                                                {"first_name": model_data["first_name"], "org_name": org.name, "email": model_data["email"]},
+                                                sender_id=sender,
+                                                use_case=use_case
+                                            )
+                                            print(f"SMS sent to {phone} for employee creation.")
+                                        else:
+                                            print(f"Phone number not found for employee {model_data['first_name']} {model_data['last_name']}")
+                            except Exception as e_sms:
+                                print(f"[WARN] SMS notification failed for row {index}: {e_sms}")
 
                         
 
-                    except Exception as e:
-                        db.rollback()
-                        error_records.append({
-                            "sheet": sheet_name,
-                            "row_index": index,
-                            "error": str(e),
-                            "data": row_data
-                        })
-                        failed_rows_by_sheet.setdefault(sheet_name, []).append(index)
+                        except Exception as e:
+                            db.rollback()
+                            error_records.append({
+                                "sheet": sheet_name,
+                                "row_index": index,
+                                "error": str(e),
+                                "data": row_data
+                            })
+                            failed_rows_by_sheet.setdefault(sheet_name, []).append(index)
+                    report_progress(len(df))
         # print("\n\nemployee_map: ", employee_map)
         # print("\n\nemployee_list: ", employee_list)
+        # Send the account emails in the background, over a few SMTP connections.
+        if len(account_emails):
+            background_tasks.add_task(account_emails.send_all)
+
         # ------------- PASS 2: Process Additional Related Sheets -------------
         if not employee_map:
             print("No employee records processed; skipping related sheets.")
         else:
-            for sheet_name, df in sheets.items():
+            for sheet_name, columns in sheets.items():
                 sheet_lower = sheet_name.strip().lower()
-                if sheet_lower in {"employee", "employees"} or len(set(df.columns.str.lower()).intersection(model_field_map["employee"])) >= 5:
+                if sheet_lower in {"employee", "employees"} or len(set(columns).intersection(model_field_map["employee"])) >= 5:
                     continue
 
                 # print("\n\nother sheet: ", sheet_name, "\ncolumns: ", df.columns)
-                df.columns = [col.strip().lower() for col in df.columns]
-
-                # Determine best matching model by column overlap.
-                model_choice = "dynamic"
-                max_match = 0
-                for mk, fields in model_field_map.items():
-                    overlap = len(set(df.columns).intersection(fields))
-                    if overlap > max_match:
-                        max_match = overlap
-                        model_choice = mk
-
-                for index, row in df.iterrows():
-                    row_data = sanitize_row_data(row.to_dict())
-                    try:
-                        expected_fields = model_field_map.get(model_choice, set())
-                        ModelClass = model_classes.get(model_choice, None)
-                        model_data = {}
-                        for col_name, val in row_data.items():
-                            concept = find_standard_concept(col_name)
-                            if concept in expected_fields and val is not None:
-                                # If this is a date field for the given model, convert it.
-                                # Extend the set below with any additional date fields needed.
-                                if concept in {"start_date", "end_date", "payment_date", "hire_date", "termination_date"}:
-                                    model_data[concept] = parse_date_value(val)
-                                # For numeric fields such as year_obtained, cast to int.
-
-                                elif concept in {"year_obtained", "year_of_experience"} and val is not None:
-                                    try:
-                                        model_data[concept] = int(val)
-                                    except Exception:
-                                        model_data[concept] = None
-                                elif concept in expected_fields and val is not None:
-                                    model_data[concept] = val
-
-
-                        # Link to employee via email if present.
-                        if "email" in row_data and row_data["email"]:
-                            emp_id = employee_map.get(row_data["email"].lower())
-                            if emp_id:
-                                model_data["employee_id"] = emp_id
-                        # Otherwise, if no email column exists, try mapping by row order.
-                        elif "employee_id" not in model_data:
-                            # If the number of rows in this sheet matches the number of employee records processed,
-                            # we assume they align by row order.
-                            if index < len(employee_list):
-                                model_data["employee_id"] = employee_list[index]
-                        # If no employee_id is found, skip this record.
-                        else:
-                            print("row empty\n\n", row_data)
-
-                        # If the model class is found, add organization_id if applicable.
-                        if ModelClass and hasattr(ModelClass, "__table__") and "organization_id" in ModelClass.__table__.columns:
-                            model_data["organization_id"] = organization_id
-                        # print("\n\nnon-employee model class: ", ModelClass, "\nmodel_data: ", model_data)
-                        # If the model class is not found, use the dynamic model.
-                        if ModelClass:
-                            record = ModelClass(**model_data)
-                            db.add(record)
-                            db.flush()
-                        else:
-                            from Models.dynamic_models import EmployeeDynamicData
-                            record = EmployeeDynamicData(
-                                employee_id=model_data.get("employee_id"),
-                                data_category=sheet_name,
-                                data=row_data
-                            )
-                            db.add(record)
-                            db.flush()
-                        db.commit()
-                        success_records.append({
-                            "sheet": sheet_name,
-                            "row_index": index,
-                            "model": model_choice,
-                            "data": row_data
-                        })
-                        background_tasks.add_task(push_summary_update, db, str(organization_id))
-                        # asyncio.create_task(push_summary_update(db, str(organization_id)))
-                    except Exception as e:
-                        db.rollback()
-                        print("\n\nnon-employee models error")
-                        error_records.append({
-                            "sheet": sheet_name,
-                            "row_index": index,
-                            "error": str(e),
-                            "data": row_data
-                        })
-                        failed_rows_by_sheet.setdefault(sheet_name, []).append(index)
+                for df in reader.iter_chunks(sheet_name):
+                    df.columns = [str(col).strip().lower() for col in df.columns]
+
+                    # Determine best matching model by column overlap.
+                    model_choice = "dynamic"
+                    max_match = 0
+                    for mk, fields in model_field_map.items():
+                        overlap = len(set(df.columns).intersection(fields))
+                        if overlap > max_match:
+                            max_match = overlap
+                            model_choice = mk
+
+                    for index, row in df.iterrows():
+                        row_data = sanitize_row_data(row.to_dict())
+                        try:
+                            expected_fields = model_field_map.get(model_choice, set())
+                            ModelClass = model_classes.get(model_choice, None)
+                            model_data = {}
+                            for col_name, val in row_data.items():
+                                concept = find_standard_concept(col_name)
+                                if concept in expected_fields and val is not None:
+                                    # If this is a date field for the given model, convert it.
+                                    # Extend the set below with any additional date fields needed.
+                                    if concept in {"start_date", "end_date", "payment_date", "hire_date", "termination_date"}:
+                                        model_data[concept] = parse_date_value(val)
+                                    # For numeric fields such as year_obtained, cast to int.
+
+                                    elif concept in {"year_obtained", "year_of_experience"} and val is not None:
+                                        try:
+                                            model_data[concept] = int(val)
+                                        except Exception:
+                                            model_data[concept] = None
+                                    elif concept in expected_fields and val is not None:
+                                        model_data[concept] = val
+
+
+                            # Link to employee via email if present.
+                            if "email" in row_data and row_data["email"]:
+                                emp_id = employee_map.get(row_data["email"].lower())
+                                if emp_id:
+                                    model_data["employee_id"] = emp_id
+                            # Otherwise, if no email column exists, try mapping by row order.
+                            elif "employee_id" not in model_data:
+                                # If the number of rows in this sheet matches the number of employee records processed,
+                                # we assume they align by row order.
+                                if index < len(employee_list):
+                                    model_data["employee_id"] = employee_list[index]
+                            # If no employee_id is found, skip this record.
+                            else:
+                                print("row empty\n\n", row_data)
+
+                            # If the model class is found, add organization_id if applicable.
+                            if ModelClass and hasattr(ModelClass, "__table__") and "organization_id" in ModelClass.__table__.columns:
+                                model_data["organization_id"] = organization_id
+                            # print("\n\nnon-employee model class: ", ModelClass, "\nmodel_data: ", model_data)
+                            # If the model class is not found, use the dynamic model.
+                            if ModelClass:
+                                record = ModelClass(**model_data)
+                                db.add(record)
+                                db.flush()
+                            else:
+                                from Models.dynamic_models import EmployeeDynamicData
+                                record = EmployeeDynamicData(
+                                    employee_id=model_data.get("employee_id"),
+                                    data_category=sheet_name,
+                                    data=row_data
+                                )
+                                db.add(record)
+                                db.flush()
+                            db.commit()
+                            success_records.append({
+                                "sheet": sheet_name,
+                                "row_index": index,
+                                "model": model_choice
+                            })
+                            background_tasks.add_task(push_summary_update, db, str(organization_id))
+                            # asyncio.create_task(push_summary_update(db, str(organization_id)))
+                        except Exception as e:
+                            db.rollback()
+                            print("\n\nnon-employee models error")
+                            error_records.append({
+                                "sheet": sheet_name,
+                                "row_index": index,
+                                "error": str(e),
+                                "data": row_data
+                            })
+                            failed_rows_by_sheet.setdefault(sheet_name, []).append(index)
+                    report_progress(len(df))
 
         # Log errors if any.
+        err_log = None
         if error_records:
             err_log = BulkUploadError(
                 organization_id=organization_id,
@@ -1375,6 +1397,8 @@ class UserCRUD:
             "successful_inserts": len(success_records),
             "failed_inserts": failure_count,
             "failed_rows_by_sheet": failed_rows_by_sheet,
+            "account_emails": account_emails.summary(),
+            "error_log_id": str(err_log.id) if err_log else None,
             "message": msg
         }
 
@@ -1607,7 +1631,7 @@ class UserCRUD:
         #use employee email as username if it exists
         user_name = email if email else use_alias
         password = generate_random_string(6)
-        hashed_password = pwd_context.hash(password)
+        hashed_password = await password_service.hash_async(password)
 
         print(f"Generated credentials for {user_name} with plain password: {password} - this should be logged securely.\n\nits hash is: {hashed_password} merely for testing purposes.")
 
@@ -2123,7 +2147,7 @@ class UserCRUD:
         rate_limiter.check_rate_limit(db, user, request)
 
         # Verify password
-        if not  global_security.verify_password(password, user.hashed_password):
+        if not await global_security.verify_password_async(password, user.hashed_password):
             rate_limiter.log_failed_attempt(user, request)  # Log failed attempt
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -2191,7 +2215,7 @@ async def create_ceo_account(
         # Step 3: Create CEO User
         username = generate_random_string(USERNAME_LENGTH)
         password = generate_random_string(PASSWORD_LENGTH)
-        hashed_password = self.hash_password(password)
+        hashed_password = await password_service.hash_async(password)
 
         user_data = {
             "username": username,
@@ -2275,7 +2299,7 @@ async def create_employee_user(
         # Generate Username and Password
         username = generate_random_string(USERNAME_LENGTH)
         password = generate_random_string(PASSWORD_LENGTH)
-        hashed_password = self.hash_password(password)
+        hashed_password = await password_service.hash_async(password)
 
         # Create User Account
         user_data = {
@@ -2346,20 +2370,17 @@ async def bulk_create_users_from_file(
         )
 
     results = []
+    # Stream the file in bounded chunks rather than reading it whole
+    reader = UploadReader.from_upload(file, kind="csv" if file.content_type == "text/csv" else None)
     try:
-        # Load file content
-        content = file.file.read()
-        if file.content_type == "text/csv":
-            data = pd.read_csv(io.StringIO(content.decode("utf-8")))
-        else:
-            data = pd.read_excel(io.BytesIO(content))
+        sheet_name = reader.sheet_names()[0]
 
         # Normalize column names
-        data.columns = [col.lower().strip() for col in data.columns]
+        columns = [str(col).lower().strip() for col in reader.columns(sheet_name)]
 
         # Validate file structure
         validate_file_structure(
-            data,
+            pd.DataFrame(columns=columns),
             ["name", "dob", "email", "contact", "position"]
         )
 
@@ -2398,7 +2419,7 @@ async def bulk_create_users_from_file(
                     # Generate username and password
                     username = generate_random_string(USERNAME_LENGTH)
                     password = generate_random_string(PASSWORD_LENGTH)
-                    hashed_password = self.hash_password(password)
+                    hashed_password = await password_service.hash_async(password)
 
                     # Determine role and permissions
                     position = row.get("position", "staff")
@@ -2472,9 +2493,11 @@ async def bulk_create_users_from_file(
                     logger.error(f"Failed to create user for email {row.get('email')}: {str(e)}")
                     return {"email": row.get("email"), "status": "failed", "error": str(e)}
 
-        # Process rows concurrently
-        tasks = [process_row(row) for _, row in data.iterrows()]
-        results = await asyncio.gather(*tasks)
+        # Process rows concurrently, one chunk at a time
+        for data in reader.iter_chunks(sheet_name):
+            data.columns = [str(col).lower().strip() for col in data.columns]
+            tasks = [process_row(row) for _, row in data.iterrows()]
+            results.extend(await asyncio.gather(*tasks))
 
         return {"message": "Bulk user creation completed.", "results": results}
 
@@ -2485,6 +2508,8 @@ async def bulk_create_users_from_file(
             status_code=500,
             detail=f"Bulk user creation failed: {str(e)}"
         )
+    finally:
+        reader.close()
     
 
     
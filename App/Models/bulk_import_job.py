@@ -0,0 +1,31 @@
+# Models/bulk_import_job.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from database.db_session import BaseModel
+
+
+class BulkImportJob(BaseModel):
+    """
+    One asynchronous bulk employee import (see Service/bulk_import_jobs.py).
+
+    The upload is kept at file_path until a worker has processed it. The
+    worker updates the counters after every chunk, so any API process can
+    report progress, rate and ETA; updated_at doubles as the worker's
+    heartbeat. Row-level failures are stored in the linked BulkUploadError.
+    """
+    __tablename__ = "bulk_import_jobs"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    file_name = Column(String, nullable=False)
+    file_path = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # queued | running | succeeded | failed
+    attempts = Column(Integer, nullable=False, default=0)  # claims so far; a stale "running" job is claimed again
+    total_rows = Column(Integer, nullable=True)  # estimate; None until the worker has opened the file
+    processed_rows = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    message = Column(String, nullable=True)
+    result = Column(JSONB, nullable=True)  # bulk_insert_crud summary
+    error_log_id = Column(UUID(as_uuid=True), ForeignKey("bulk_upload_errors.id", ondelete="SET NULL"), nullable=True)
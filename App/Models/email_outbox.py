@@ -0,0 +1,38 @@
+# Models/email_outbox.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from database.db_session import BaseModel
+
+
+class EmailOutbox(BaseModel):
+    """
+    One queued email (see Service/email_outbox.py).
+
+    Request handlers only insert rows; the outbox worker claims due rows,
+    sends them and records the outcome. A failed send is retried at
+    next_attempt_at with exponential backoff; after EMAIL_OUTBOX_MAX_ATTEMPTS
+    (or a permanent rejection) the row is dead-lettered with status "dead"
+    and kept for inspection or requeue. The body of a sent row is cleared
+    (it may hold credentials); sent and dead rows are deleted after
+    EMAIL_OUTBOX_RETENTION_DAYS.
+    """
+    __tablename__ = "email_outbox"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=True, index=True)
+    transport = Column(String, nullable=False, default="default")  # default (MAIL_* server) | tenant (tenant email settings)
+    sender = Column(String, nullable=True)  # None: the transport's default From
+    recipients = Column(JSONB, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String, nullable=False, default="html")  # html | plain
+    attachments = Column(JSONB, nullable=True)  # file paths, read at send time
+    status = Column(String, nullable=False, default="pending")  # pending | sending | sent | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
@@ -409,6 +409,8 @@ def create_user_for_employee(mapper, connection, target):
     Uses transient attributes on target:
       - _role_id: The role identifier for the new user.
       - _plain_password: (Optional) Plain text password; if missing, one is generated.
+      - _hashed_password: (Optional) bcrypt hash of _plain_password, precomputed
+        by bulk imports so the flush does not hash row by row.
       - _user_image: (Optional) Uploaded user image.
       - _created_by: (Optional) The UUID of the account creator.
     """
@@ -441,7 +443,8 @@ def create_user_for_employee(mapper, connection, target):
 
         # Generate a username from the employee’s first name plus 4 random digits.
         username = f"{target.email}"
-        hashed_pw = global_security.hash_password(password_plain)
+        hashed_pw = getattr(target, "_hashed_password", None) if plain_password is not None else None
+        hashed_pw = hashed_pw or global_security.hash_password(password_plain)
         print(f"[after_insert] Employee {target.id} | Username: {username} | Hashed Password: {hashed_pw}")
         
         user_table = User.__table__
@@ -490,6 +493,9 @@ def create_user_for_employee(mapper, connection, target):
                 
             )
             connection.execute(ins_stmt)
+            # Core inserts bypass the ORM listeners, so bump the summary counters here.
+            from Service.summary_counters import apply_counter_deltas
+            apply_counter_deltas(connection, target.organization_id, {"users": 1, "active_users": 1})
             
             # upsert = pg_insert(user_table).values(
             # username=target.email,
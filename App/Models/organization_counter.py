@@ -0,0 +1,32 @@
+# Models/organization_counter.py
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from database.db_session import Base
+
+
+class OrganizationCounter(Base):
+    """
+    Materialized summary counts, one row per organization.
+
+    Rows are kept current by +1/-1 deltas from the summary ORM listeners
+    (see Service/summary_counters.py) and periodically reconciled against a
+    full recount, so the dashboard summary is a single primary-key read.
+    """
+    __tablename__ = "organization_counters"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    branches = Column(Integer, nullable=False, default=0, server_default="0")
+    departments = Column(Integer, nullable=False, default=0, server_default="0")
+    ranks = Column(Integer, nullable=False, default=0, server_default="0")
+    roles = Column(Integer, nullable=False, default=0, server_default="0")
+    users = Column(Integer, nullable=False, default=0, server_default="0")
+    active_users = Column(Integer, nullable=False, default=0, server_default="0")
+    inactive_users = Column(Integer, nullable=False, default=0, server_default="0")
+    employees = Column(Integer, nullable=False, default=0, server_default="0")
+    promotion_policies = Column(Integer, nullable=False, default=0, server_default="0")
+    tenancies = Column(Integer, nullable=False, default=0, server_default="0")
+    bills = Column(Integer, nullable=False, default=0, server_default="0")
+    payments = Column(Integer, nullable=False, default=0, server_default="0")
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
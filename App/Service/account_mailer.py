@@ -0,0 +1,205 @@
+# Service/account_mailer.py
+"""
+Batched account-creation emails for bulk imports.
+
+An import used to build an EmailService (and FastMail config) per created
+employee and schedule one background task per row, each opening its own
+SMTP session. AccountEmailBatch instead collects the import's recipients,
+fills one cached template shell per recipient (Utils.email_templates) and,
+as a single background task, sends everything over a few persistent SMTP
+connections (Utils.smtp_pool) with a per-batch rate limit and per-message retries.
+
+Summaries of recent batches are kept in memory for get_batch_summary().
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.mime.text import MIMEText
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Utils.config import config
+from Utils.email_templates import RenderedTemplate
+from Utils.smtp_pool import SMTPConnectionPool, is_permanent_error
+
+logger = logging.getLogger(__name__)
+
+# Per-recipient fields of the account emails.
+ACCOUNT_EMAIL_FIELDS = ("title", "first_name", "last_name", "email", "password")
+
+
+class _RateLimit:
+    """Spaces calls at least 1/per_second apart across threads; 0 disables it."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second and per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def default_smtp_pool(size: int) -> SMTPConnectionPool:
+    """Pool on the application mail server (the MAIL_* settings FastMail uses)."""
+    return SMTPConnectionPool(
+        config.MAIL_SERVER,
+        config.MAIL_PORT,
+        username=config.MAIL_USERNAME if config.USE_CREDENTIALS else None,
+        password=config.MAIL_PASSWORD,
+        use_ssl=config.MAIL_SSL_TLS,
+        starttls=config.MAIL_STARTTLS,
+        validate_certs=config.VALIDATE_CERTS,
+        size=size,
+    )
+
+
+class AccountEmailBatch:
+    """One import's account emails: add() while importing, send_all() afterwards."""
+
+    def __init__(self, template: RenderedTemplate, subject: str, organization_id=None,
+                 sender: Optional[str] = None, connections: Optional[int] = None,
+                 rate_per_second: Optional[float] = None,
+                 pool_factory: Callable[[int], SMTPConnectionPool] = default_smtp_pool):
+        self.batch_id = str(uuid.uuid4())
+        self.template = template
+        self.subject = subject
+        self.sender = sender or config.MAIL_FROM
+        self.connections = max(connections or config.ACCOUNT_EMAIL_SMTP_CONNECTIONS, 1)
+        self.rate_per_second = config.ACCOUNT_EMAIL_RATE_PER_SECOND if rate_per_second is None else rate_per_second
+        self.pool_factory = pool_factory
+        self._recipients: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._summary: Dict[str, Any] = {
+            "batch_id": self.batch_id,
+            "organization_id": str(organization_id) if organization_id else None,
+            "status": "pending",  # pending | sending | done
+            "queued": 0,
+            "sent": 0,
+            "failed": 0,
+            "failed_recipients": [],
+            "started_at": None,
+            "finished_at": None,
+        }
+        _register(self)
+
+    def __len__(self) -> int:
+        return len(self._recipients)
+
+    def add(self, recipient: str, values: Dict[str, Any]) -> None:
+        """Queue one email; `values` fills the template's per-recipient fields."""
+        self._recipients.append((recipient, values))
+        self._summary["queued"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._summary, "failed_recipients": list(self._summary["failed_recipients"])}
+
+    # ---------------- sending ----------------
+
+    def send_all(self) -> Dict[str, Any]:
+        """Send every queued email and return the summary. Blocking; run it as a background task."""
+        recipients, self._recipients = self._recipients, []
+        self._set(status="sending", started_at=_now())
+        if recipients:
+            work: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+            for item in recipients:
+                work.put(item)
+            limit = _RateLimit(self.rate_per_second)
+            senders = min(self.connections, len(recipients))
+            with self.pool_factory(senders) as pool:
+                threads = [
+                    threading.Thread(target=self._drain, args=(pool, work, limit), name=f"account-mail-{i}", daemon=True)
+                    for i in range(senders)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        self._set(status="done", finished_at=_now())
+        summary = self.summary()
+        logger.info("Account email batch %s: %d sent, %d failed",
+                    self.batch_id, summary["sent"], summary["failed"])
+        return summary
+
+    def _drain(self, pool: SMTPConnectionPool, work: "queue.Queue", limit: _RateLimit) -> None:
+        while True:
+            try:
+                recipient, values = work.get_nowait()
+            except queue.Empty:
+                return
+            error = self._send_one(pool, recipient, values, limit)
+            with self._lock:
+                if error is None:
+                    self._summary["sent"] += 1
+                else:
+                    self._summary["failed"] += 1
+                    self._summary["failed_recipients"].append({"email": recipient, "error": error})
+
+    def _send_one(self, pool: SMTPConnectionPool, recipient: str, values: Dict[str, Any],
+                  limit: _RateLimit) -> Optional[str]:
+        """Send with retries (EMAIL_RETRY_*); returns the last error, or None once sent."""
+        try:
+            message = MIMEText(self.template.fill(values), "html", "utf-8")
+            message["Subject"] = self.subject
+            message["From"] = self.sender
+            message["To"] = recipient
+            message = message.as_string()
+        except Exception as e:
+            return str(e)
+
+        attempts = max(config.EMAIL_RETRY_ATTEMPTS, 1)
+        error: Optional[Exception] = None
+        for attempt in range(attempts):
+            limit.wait()
+            try:
+                with pool.connection() as server:
+                    server.sendmail(self.sender, [recipient], message)
+                return None
+            except Exception as e:
+                error = e
+                if is_permanent_error(e):
+                    break
+            if attempt + 1 < attempts:
+                time.sleep(min(config.EMAIL_RETRY_DELAY * 2 ** attempt, config.EMAIL_RETRY_DELAY * 10))
+        logger.error("Account email to %s failed: %s", recipient, error)
+        return str(error)
+
+    def _set(self, **values) -> None:
+        with self._lock:
+            self._summary.update(values)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---------------- recent batches ----------------
+
+_MAX_RECENT = 256
+_recent: "OrderedDict[str, AccountEmailBatch]" = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def _register(batch: AccountEmailBatch) -> None:
+    with _recent_lock:
+        _recent[batch.batch_id] = batch
+        while len(_recent) > _MAX_RECENT:
+            _recent.popitem(last=False)
+
+
+def get_batch_summary(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Summary of a recent batch started by this process, or None."""
+    with _recent_lock:
+        batch = _recent.get(str(batch_id))
+    return batch.summary() if batch else None
@@ -0,0 +1,409 @@
+# src/services/auth_session.py
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from sqlalchemy import bindparam, event, update
+from sqlalchemy.orm import Session, joinedload
+
+from database.db_session import SessionLocal
+from Models.models import Token, User
+from Models.Tenants.role import Role
+from Utils.config import config
+from Utils.security import TOKEN_MAX_LIFETIME_SECONDS as TOKEN_LIFETIME_SECONDS, revoke_decoded_token
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------------
+# Last-activity store
+# --------------------------------------------------------------------
+
+class SessionActivityStore:
+    """
+    In-process sliding-window store for token last-activity.
+
+    touch() records a request in memory; flush() writes every token touched
+    since the previous flush to tokens.last_activity in one executemany
+    UPDATE. Protected requests therefore no longer write to the database.
+    Per worker: with several workers use RedisSessionActivityStore so the
+    inactivity check sees activity from all of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen: Dict[str, float] = {}    # token → last request (epoch seconds)
+        self._dirty: Dict[str, float] = {}   # token → last request not yet flushed
+
+    def touch(self, token: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._seen[token] = now
+            self._dirty[token] = now
+
+    def last_seen(self, token: str) -> Optional[float]:
+        return self._seen.get(token)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._seen.pop(token, None)
+            self._dirty.pop(token, None)
+
+    def drain(self) -> Dict[str, float]:
+        with self._lock:
+            pending, self._dirty = self._dirty, {}
+            # Forget tokens that cannot be alive any more
+            horizon = time.time() - TOKEN_LIFETIME_SECONDS
+            for token in [t for t, ts in self._seen.items() if ts < horizon]:
+                del self._seen[token]
+        return pending
+
+    def restore(self, pending: Dict[str, float]) -> None:
+        """Put back a batch whose flush failed, keeping newer touches."""
+        with self._lock:
+            for token, ts in pending.items():
+                if ts > self._dirty.get(token, 0):
+                    self._dirty[token] = ts
+
+    def flush(self) -> int:
+        """Write pending last-activity values to the tokens table; returns rows sent."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        table = Token.__table__
+        stmt = (
+            update(table)
+            .where(table.c.token == bindparam("b_token"))
+            .values(last_activity=bindparam("b_last_activity"))
+        )
+        try:
+            with SessionLocal() as db:
+                db.execute(stmt, [
+                    {"b_token": token, "b_last_activity": datetime.utcfromtimestamp(ts)}
+                    for token, ts in pending.items()
+                ])
+                db.commit()
+        except Exception as e:
+            logger.error("Failed to flush %s token activity timestamps: %s", len(pending), e)
+            self.restore(pending)
+            return 0
+        return len(pending)
+
+
+class RedisSessionActivityStore(SessionActivityStore):
+    """
+    Same contract, shared by every worker through Redis:
+    auth:seen:<sha256(token)> holds the last request (expires with the token),
+    auth:activity:dirty is a hash of token → timestamp awaiting flush.
+    """
+
+    DIRTY_KEY = "auth:activity:dirty"
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _seen_key(token: str) -> str:
+        return "auth:seen:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def touch(self, token: str) -> None:
+        now = time.time()
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.set(self._seen_key(token), now, ex=TOKEN_LIFETIME_SECONDS)
+            pipe.hset(self.DIRTY_KEY, token, now)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Session activity: redis unavailable (%s); keeping activity in memory", e)
+            super().touch(token)
+
+    def last_seen(self, token: str) -> Optional[float]:
+        try:
+            value = self._redis.get(self._seen_key(token))
+            return float(value) if value is not None else super().last_seen(token)
+        except Exception:
+            return super().last_seen(token)
+
+    def discard(self, token: str) -> None:
+        super().discard(token)
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.delete(self._seen_key(token))
+            pipe.hdel(self.DIRTY_KEY, token)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Session activity: failed to discard token in redis: %s", e)
+
+    def drain(self) -> Dict[str, float]:
+        pending = super().drain()
+        try:
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.hgetall(self.DIRTY_KEY)
+            pipe.delete(self.DIRTY_KEY)
+            remote, _ = pipe.execute()
+        except Exception as e:
+            logger.warning("Session activity: failed to drain redis (%s)", e)
+            return pending
+        for token, ts in remote.items():
+            token, ts = token.decode("utf-8"), float(ts)
+            if ts > pending.get(token, 0):
+                pending[token] = ts
+        return pending
+
+
+class DatabaseSessionActivityStore(SessionActivityStore):
+    """Legacy mode: every touch is an UPDATE + COMMIT on the tokens table."""
+
+    def touch(self, token: str, db: Optional[Session] = None) -> None:
+        if db is None:
+            return super().touch(token)
+        db.query(Token).filter(Token.token == token).update({"last_activity": datetime.utcnow()})
+        db.commit()
+
+    def last_seen(self, token: str) -> Optional[float]:
+        return None
+
+
+def build_activity_store(kind: str) -> SessionActivityStore:
+    """Pick the store from config: 'memory' (default), 'redis' or 'db' (legacy)."""
+    kind = (kind or "memory").strip().lower()
+    if kind == "redis":
+        return RedisSessionActivityStore(config.REDIS_URL)
+    if kind == "db":
+        return DatabaseSessionActivityStore()
+    return SessionActivityStore()
+
+
+activity_store = build_activity_store(config.AUTH_ACTIVITY_STORE)
+
+
+def record_activity(db: Session, token: str) -> None:
+    """Register a request on token; only the legacy 'db' mode writes here."""
+    if isinstance(activity_store, DatabaseSessionActivityStore):
+        activity_store.touch(token, db)
+    else:
+        activity_store.touch(token)
+
+
+def flush_session_activity() -> None:
+    """Periodic job: persist batched last-activity values."""
+    flushed = activity_store.flush()
+    if flushed:
+        logger.debug("Flushed last activity for %s tokens", flushed)
+
+
+# --------------------------------------------------------------------
+# User + role cache
+# --------------------------------------------------------------------
+
+class AuthUserCache:
+    """
+    TTL cache of authenticated users with their Role loaded.
+
+    Entries are detached User instances; get() merges a copy into the
+    request's session without a query (merge(load=False)), so callers keep
+    a regular session-bound User whose other relationships lazy-load as
+    before. Committed User/Role changes invalidate entries through the
+    post-commit dispatcher; the TTL bounds staleness across workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._users: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def detached(self, user_id) -> Optional[User]:
+        """The cached detached User (role loaded); loads it on a miss. Treat as read-only."""
+        key = str(user_id)
+        with self._lock:
+            cached = self._users.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        self.stats["misses"] += 1
+        with SessionLocal() as own_db:
+            cached = own_db.query(User).options(joinedload(User.role)).filter(User.id == UUID(key)).first()
+        # Closing the session detaches the instance with its attributes loaded
+        if cached is not None:
+            with self._lock:
+                self._users[key] = cached
+        return cached
+
+    def get(self, db: Session, user_id) -> Optional[User]:
+        cached = self.detached(user_id)
+        return db.merge(cached, load=False) if cached is not None else None
+
+    def invalidate_users(self, user_ids: Iterable) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._users.pop(str(user_id), None)
+
+    def invalidate_roles(self, role_ids: Iterable) -> None:
+        role_ids = {str(r) for r in role_ids}
+        with self._lock:
+            for key in [k for k, u in self._users.items() if str(u.role_id) in role_ids]:
+                self._users.pop(key, None)
+
+
+auth_user_cache = AuthUserCache(
+    maxsize=config.AUTH_USER_CACHE_SIZE,
+    ttl=config.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+# --------------------------------------------------------------------
+# Principals
+# --------------------------------------------------------------------
+
+def granted_permissions(permissions) -> FrozenSet[str]:
+    """
+    Role.permissions as a set of granted names. Accepts both stored shapes:
+    a list of strings, or a dict of flags ({"hr:dashboard": true, ...}).
+    """
+    if not permissions:
+        return frozenset()
+    if isinstance(permissions, dict):
+        return frozenset(str(name) for name, allowed in permissions.items() if allowed)
+    if isinstance(permissions, str):
+        return frozenset([permissions])
+    return frozenset(str(name) for name in permissions)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of who a token acts as, for in-memory permission checks."""
+    user_id: UUID
+    org_id: UUID
+    role: Optional[str]
+    permissions: FrozenSet[str]
+    email: str
+    role_id: Optional[UUID] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        role = user.role
+        return cls(
+            user_id=user.id,
+            org_id=user.organization_id,
+            role=role.name if role else None,
+            permissions=granted_permissions(role.permissions) if role else frozenset(),
+            email=user.email,
+            role_id=user.role_id,
+        )
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+    def has_any(self, permissions: Iterable[str]) -> bool:
+        return any(permission in self.permissions for permission in permissions)
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of Principals keyed by a hash of the token.
+    Entries are dropped when the token is revoked or its User/Role changes.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._principals: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+    def resolve(self, token: str, user_id) -> Optional[Principal]:
+        """Principal for token (acting as user_id); None if the user is gone."""
+        key = self._key(token)
+        with self._lock:
+            principal = self._principals.get(key)
+        if principal is not None and str(principal.user_id) == str(user_id):
+            self.stats["hits"] += 1
+            return principal
+        self.stats["misses"] += 1
+        user = auth_user_cache.detached(user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        with self._lock:
+            self._principals[key] = principal
+        return principal
+
+    def invalidate_tokens(self, tokens: Iterable[str]) -> None:
+        with self._lock:
+            for token in tokens:
+                self._principals.pop(self._key(token), None)
+
+    def invalidate_users(self, user_ids: Iterable) -> None:
+        self._invalidate_where(lambda p, ids={str(u) for u in user_ids}: str(p.user_id) in ids)
+
+    def invalidate_roles(self, role_ids: Iterable) -> None:
+        self._invalidate_where(lambda p, ids={str(r) for r in role_ids}: str(p.role_id) in ids)
+
+    def _invalidate_where(self, predicate) -> None:
+        with self._lock:
+            for key in [k for k, p in self._principals.items() if predicate(p)]:
+                self._principals.pop(key, None)
+
+
+principal_cache = PrincipalCache(
+    maxsize=config.AUTH_USER_CACHE_SIZE,
+    ttl=config.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def revoke_token(token: str) -> None:
+    """Forget everything cached for a token that was logged out or expired."""
+    activity_store.discard(token)
+    principal_cache.invalidate_tokens([token])
+    revoke_decoded_token(token)
+
+
+def _on_users_changed(user_ids) -> None:
+    auth_user_cache.invalidate_users(user_ids)
+    principal_cache.invalidate_users(user_ids)
+
+
+def _on_roles_changed(role_ids) -> None:
+    auth_user_cache.invalidate_roles(role_ids)
+    principal_cache.invalidate_roles(role_ids)
+
+
+def _after_user_change(mapper, connection, target):
+    from Apis.change_dispatcher import post_commit_dispatcher
+    post_commit_dispatcher.mark(target, "auth_user", target.id)
+
+
+def _after_role_change(mapper, connection, target):
+    from Apis.change_dispatcher import post_commit_dispatcher
+    post_commit_dispatcher.mark(target, "auth_role", target.id)
+
+
+def _after_token_delete(mapper, connection, target):
+    from Apis.change_dispatcher import post_commit_dispatcher
+    post_commit_dispatcher.mark(target, "auth_token", target.token)
+
+
+def register_auth_cache_listeners() -> None:
+    """Invalidate cached users/principals when a User, Role or Token commit changes them."""
+    from Apis.change_dispatcher import post_commit_dispatcher
+
+    post_commit_dispatcher.register_handler("auth_user", _on_users_changed)
+    post_commit_dispatcher.register_handler("auth_role", _on_roles_changed)
+    post_commit_dispatcher.register_handler("auth_token", principal_cache.invalidate_tokens)
+    for model, listener in ((User, _after_user_change), (Role, _after_role_change)):
+        if not event.contains(model, "after_update", listener):
+            event.listen(model, "after_update", listener)
+            event.listen(model, "after_delete", listener)
+    # Bulk query(Token).delete() bypasses mapper events; those paths call revoke_token()
+    if not event.contains(Token, "after_delete", _after_token_delete):
+        event.listen(Token, "after_delete", _after_token_delete)
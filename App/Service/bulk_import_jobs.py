@@ -0,0 +1,296 @@
+# Service/bulk_import_jobs.py
+"""
+Asynchronous bulk employee imports.
+
+create_import_job() stores the upload under BULK_IMPORT_JOB_DIR and records
+a BulkImportJob; submit_import_job() hands its id to a worker, either the
+in-process thread pool (BULK_IMPORT_JOB_EXECUTOR="thread") or the Celery
+app ("celery"). The worker runs the same importer as the synchronous upload
+endpoint (UserCRUD.bulk_insert_crud, including the employee SMS) on its
+own session and writes progress to the job row after every chunk, so any
+API process can answer GET /jobs/{id} and feed the progress socket.
+
+Each progress write bumps the row's updated_at, which serves as the
+worker's lease. A "running" job with no write for
+BULK_IMPORT_JOB_LEASE_SECONDS belonged to a worker that died; it is
+claimed again, up to BULK_IMPORT_JOB_MAX_ATTEMPTS claims, and then marked
+failed. Rows the dead attempt had already committed come back as
+duplicates in the new attempt's error log.
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from database.db_session import SessionLocal
+from Models.bulk_import_job import BulkImportJob
+from Service.account_mailer import get_batch_summary
+from Utils.config import config
+from Utils.serialize_4_json import dumps_json
+
+logger = logging.getLogger(__name__)
+
+RUN_JOB_TASK = "bulk_import.run_job"
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobLeaseLost(Exception):
+    """The job was claimed by another worker after this one stopped reporting progress."""
+
+
+def _stale_running():
+    """Jobs marked running whose worker has not written progress within the lease."""
+    cutoff = _now() - timedelta(seconds=config.BULK_IMPORT_JOB_LEASE_SECONDS)
+    return and_(
+        BulkImportJob.status == "running",
+        func.coalesce(BulkImportJob.updated_at, BulkImportJob.started_at) < cutoff,
+    )
+
+
+# --------------------------------------------------------------------
+# Submission (request side)
+# --------------------------------------------------------------------
+
+def create_import_job(db: Session, organization_id, file: UploadFile, created_by=None) -> BulkImportJob:
+    """Persist the upload and record a queued job for it."""
+    from Service.bulk_insert_service import allowed_file
+
+    if not file.filename or not allowed_file(file.filename):
+        raise HTTPException(status_code=400, detail="Only CSV or Excel files are allowed.")
+
+    job = BulkImportJob(organization_id=organization_id, file_name=file.filename,
+                        status="queued", created_by=created_by)
+    db.add(job)
+    db.flush()
+
+    os.makedirs(config.BULK_IMPORT_JOB_DIR, exist_ok=True)
+    extension = file.filename.rsplit(".", 1)[1].lower()
+    job.file_path = os.path.join(config.BULK_IMPORT_JOB_DIR, f"{job.id}.{extension}")
+    try:
+        file.file.seek(0)
+        with open(job.file_path, "wb") as out:
+            shutil.copyfileobj(file.file, out, length=1024 * 1024)
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _job_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(config.BULK_IMPORT_JOB_WORKERS, 1),
+                                               thread_name_prefix="bulk-import")
+    return _executor
+
+
+def submit_import_job(job_id) -> None:
+    """Queue a job on the configured executor."""
+    if config.BULK_IMPORT_JOB_EXECUTOR.strip().lower() == "celery":
+        from notification.celery_app import celery_app
+
+        celery_app.send_task(RUN_JOB_TASK, args=[str(job_id)])
+    else:
+        _job_executor().submit(run_import_job, str(job_id))
+
+
+def resume_import_jobs() -> None:
+    """
+    Run at startup. Fails abandoned jobs that have used all their attempts
+    and re-submits the others, plus (thread executor only; Celery keeps its
+    own queue) jobs still queued from before a restart. run_import_job
+    claims a job atomically, so several processes resubmitting the same job
+    run it once.
+    """
+    celery = config.BULK_IMPORT_JOB_EXECUTOR.strip().lower() == "celery"
+    try:
+        with SessionLocal() as db:
+            db.execute(
+                update(BulkImportJob)
+                .where(_stale_running(), BulkImportJob.attempts >= config.BULK_IMPORT_JOB_MAX_ATTEMPTS)
+                .values(status="failed", finished_at=_now(),
+                        message="The import stopped responding and was abandoned after "
+                                f"{config.BULK_IMPORT_JOB_MAX_ATTEMPTS} attempt(s).")
+            )
+            db.commit()
+            resumable = _stale_running() if celery else or_(BulkImportJob.status == "queued", _stale_running())
+            job_ids = [job_id for (job_id,) in db.query(BulkImportJob.id).filter(resumable)]
+        for job_id in job_ids:
+            submit_import_job(job_id)
+    except Exception as e:
+        logger.error("Could not resume bulk-import jobs: %s", e)
+
+
+def shutdown_import_jobs() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+# --------------------------------------------------------------------
+# Execution (worker side)
+# --------------------------------------------------------------------
+
+def _update_job(job_id, attempt: Optional[int] = None, **values) -> bool:
+    """Write to the job row; with `attempt`, only while that claim still holds. Returns whether it did."""
+    with SessionLocal() as db:
+        query = update(BulkImportJob).where(BulkImportJob.id == job_id)
+        if attempt is not None:
+            query = query.where(BulkImportJob.attempts == attempt)
+        updated = db.execute(query.values(**values)).rowcount
+        db.commit()
+    return bool(updated)
+
+
+def _report_progress(job_id, attempt: int, counts: dict) -> None:
+    if not _update_job(job_id, attempt, **counts):
+        raise JobLeaseLost(f"Bulk import job {job_id} was claimed by another worker")
+
+
+def _importer():
+    """The UserCRUD behind POST /bulk_insert_employee_data_api, so a job imports exactly like it."""
+    from Crud.user_base import UserCRUD
+    from Models.models import AuditLog, Employee, User
+    from Models.Tenants.organization import Organization
+    from Models.Tenants.role import Role
+
+    return UserCRUD(user_model=User, role_model=Role, org_model=Organization,
+                    employee_model=Employee, audit_model=AuditLog)
+
+
+def run_import_job(job_id) -> None:
+    """Process one job; safe to call more than once for the same id."""
+    from Utils.config import get_config
+    from Utils.sms_utils import get_sms_service
+
+    job_id = UUID(str(job_id))
+    with SessionLocal() as db:
+        # Claim: only one worker moves a job out of "queued", or takes over
+        # one whose worker stopped reporting progress.
+        attempt = db.execute(
+            update(BulkImportJob)
+            .where(
+                BulkImportJob.id == job_id,
+                or_(BulkImportJob.status == "queued", _stale_running()),
+                BulkImportJob.attempts < config.BULK_IMPORT_JOB_MAX_ATTEMPTS,
+            )
+            .values(status="running", started_at=_now(), finished_at=None, message=None,
+                    attempts=BulkImportJob.attempts + 1,
+                    processed_rows=0, success_count=0, error_count=0)
+            .returning(BulkImportJob.attempts)
+        ).scalar()
+        db.commit()
+        if attempt is None:
+            return
+        job = db.get(BulkImportJob, job_id)
+        organization_id, file_name, file_path = str(job.organization_id), job.file_name, job.file_path
+
+    # Emails queued by the import are sent once the job has been recorded.
+    background_tasks = BackgroundTasks()
+    try:
+        with SessionLocal() as db, open(file_path, "rb") as stream:
+            upload = UploadFile(file=stream, filename=file_name)
+            conf = get_config()
+            result = _importer().bulk_insert_crud(
+                organization_id, upload, background_tasks, db,
+                sms_svc=get_sms_service(conf), conf=conf,
+                progress=lambda counts: _report_progress(job_id, attempt, counts),
+            )
+        finished = _update_job(
+            job_id, attempt, status="succeeded", finished_at=_now(), result=json.loads(dumps_json(result)),
+            message=result.get("message"), error_log_id=result.get("error_log_id"),
+        )
+        if not finished:
+            raise JobLeaseLost(f"Bulk import job {job_id} was claimed by another worker")
+        os.remove(file_path)
+    except JobLeaseLost:
+        logger.warning("Bulk import job %s was taken over by another worker; stopping", job_id)
+        return
+    except Exception as e:
+        # The upload is kept for diagnosis.
+        logger.exception("Bulk import job %s failed", job_id)
+        _update_job(job_id, attempt, status="failed", finished_at=_now(), message=str(getattr(e, "detail", e)))
+        return
+
+    try:
+        asyncio.run(background_tasks())
+    except Exception as e:
+        logger.error("Bulk import job %s: sending account emails failed: %s", job_id, e)
+
+    # Record the final sent/failed counts of the account emails.
+    emails = (result.get("account_emails") or {}).get("batch_id")
+    summary = get_batch_summary(emails) if emails else None
+    if summary:
+        _update_job(job_id, attempt, result=json.loads(dumps_json({**result, "account_emails": summary})))
+
+
+# --------------------------------------------------------------------
+# Reporting
+# --------------------------------------------------------------------
+
+def job_payload(job: BulkImportJob) -> Dict[str, Any]:
+    """Job state plus derived rate, percentage and ETA."""
+    rows_per_second = eta_seconds = percent = None
+    if job.started_at:
+        end = job.finished_at or _now()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0 and job.processed_rows:
+            rows_per_second = round(job.processed_rows / elapsed, 1)
+    if job.total_rows:
+        percent = round(min(job.processed_rows / job.total_rows, 1.0) * 100, 1)
+        if rows_per_second and job.status not in TERMINAL_STATUSES:
+            eta_seconds = round(max(job.total_rows - job.processed_rows, 0) / rows_per_second, 1)
+    if job.status == "succeeded":
+        percent, eta_seconds = 100.0, 0.0
+
+    return {
+        "job_id": str(job.id),
+        "organization_id": str(job.organization_id),
+        "file_name": job.file_name,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "success_count": job.success_count,
+        "error_count": job.error_count,
+        "percent": percent,
+        "rows_per_second": rows_per_second,
+        "eta_seconds": eta_seconds,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "message": job.message,
+        "error_log_id": str(job.error_log_id) if job.error_log_id else None,
+        "result": job.result,
+    }
+
+
+def load_job_payload(job_id, organization_id) -> Optional[Dict[str, Any]]:
+    """job_payload for a job of the given organization, on a fresh session."""
+    with SessionLocal() as db:
+        job = db.query(BulkImportJob).filter(
+            BulkImportJob.id == job_id,
+            BulkImportJob.organization_id == organization_id,
+        ).first()
+        return job_payload(job) if job else None
@@ -1,12 +1,14 @@
-import io
 import random
 import secrets
 import string
+import uuid
 from datetime import datetime
-from typing import Dict, List, Tuple, Any, Optional, Union
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Any, Optional, Union
 
 import pandas as pd
 from fastapi import HTTPException, UploadFile, BackgroundTasks
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from Models.Tenants.organization import (Branch, Organization, Rank)
 from Models.dynamic_models import EmployeeDynamicData, BulkUploadError
@@ -19,11 +21,16 @@ from Schemas.schemas import OrganizationCreateSchema, EmployeeCreateSchema
 from Models.Tenants.role import Role
 from datetime import datetime, date, timedelta
 import re
-from rapidfuzz import process, fuzz
+from Utils.header_matcher import SynonymIndex
 from Utils.util import  get_organization_acronym
-from Utils.config import DevelopmentConfig
+from Utils.config import DevelopmentConfig, config
 from Utils.security import Security
-from Service.email_service import EmailService, get_email_template
+from Utils.password_service import password_service
+from Utils.upload_reader import UploadReader, open_upload
+from Service.email_service import get_email_template
+from Service.lookup_resolver import LookupResolver
+from Service.account_mailer import ACCOUNT_EMAIL_FIELDS, AccountEmailBatch
+from Utils.email_templates import RenderedTemplate, email_templates, org_key
 
 
 
@@ -177,8 +184,11 @@ DATE_SYNONYMS = {
 # Mapping Definitions
 # --------------------------
 # Expected field names (all lowercase) for various models.
-
-
+EMPLOYEE_FIELDS = {"first_name", "middle_name", "last_name", "title", "gender", "date_of_birth",
+                   "marital_status", "email", "contact_info", "hire_date", "termination_date",
+                   "profile_image_path", "staff_id", "last_promotion_date", "employee_type_id",
+                   "department_id", "rank_id", "department", "rank", "employee type", "employment type",
+                   "role", "salary"}
 
 
 # ------------------------------------------------------------------------------
@@ -221,6 +231,7 @@ SYNONYMS_MAP = {
 
 
 # --- Helper: Normalize Column Name ---
+@lru_cache(maxsize=4096)
 def normalize_column_name(col_name: str) -> str:
     """
     Lowercase, trim, and remove non-alphanumeric characters (except space).
@@ -230,17 +241,8 @@ def normalize_column_name(col_name: str) -> str:
     col_name = re.sub(r'\s+', ' ', col_name)
     return col_name
 
-# --- Helper: Get Flat List of Synonyms ---
-def get_flat_synonyms():
-    flat = []
-    for synonyms in SYNONYMS_MAP.values():
-        for s in synonyms:
-            flat.append(normalize_column_name(s))
-    
-    # print("flat: ", flat)
-    return flat
-
-FLAT_SYNONYMS = get_flat_synonyms()
+# --- Helper: Compiled Synonym Index ---
+HEADER_INDEX = SynonymIndex(SYNONYMS_MAP, DATE_SYNONYMS, EMPLOYEE_FIELDS, normalize_column_name)
 
 # --- Helper: Fuzzy Matching for Column Names ---
 def find_standard_concept(col_name: str, threshold: int = 85) -> str:
@@ -249,24 +251,16 @@ def find_standard_concept(col_name: str, threshold: int = 85) -> str:
     Steps:
       1. Normalize the name.
       2. Check DATE_SYNONYMS.
-      3. Fuzzy-match using RapidFuzz against our flat synonyms.
+      3. Exact match against the normalized synonyms, else fuzzy-match using RapidFuzz.
       4. As fallback, if the normalized name exactly matches an expected employee field, use that.
+    Results are memoized per header (see Utils.header_matcher.SynonymIndex).
     """
-    norm = normalize_column_name(col_name)
-    if norm in DATE_SYNONYMS:
-        return DATE_SYNONYMS[norm]
-    best, score, _ = process.extractOne(norm, FLAT_SYNONYMS, scorer=fuzz.ratio)
-    if best and score >= threshold:
-        for concept, synonyms in SYNONYMS_MAP.items():
-            norm_syns = {normalize_column_name(s) for s in synonyms}
-            if best in norm_syns:
-                return concept
-    for field in model_field_map["employee"]:
-        if normalize_column_name(field) == norm:
-            # print("\n\nreturned stanadardized flattened column name: ", field)
-            return field
-    # print("\n\nreturned stanadardized normalized column name: ", norm)
-    return norm
+    return HEADER_INDEX.resolve(col_name, threshold)
+
+
+def find_standard_concepts(col_names, threshold: int = 85) -> List[str]:
+    """find_standard_concept for a whole header row, fuzzy-matched in one batch."""
+    return HEADER_INDEX.resolve_many(col_names, threshold)
 
 
 # ------------------------------------------------------------------------------
@@ -344,6 +338,43 @@ def parse_date_value(value):
     except Exception:
         pass
     return value
+
+
+EXCEL_EPOCH = pd.Timestamp(1899, 12, 30)
+# Largest Excel serial (9999-12-31); anything above is not a date.
+EXCEL_MAX_SERIAL = 2958465
+
+
+def parse_date_series(series: pd.Series) -> pd.Series:
+    """
+    Column-wise parse_date_value: date/datetime cells, Excel serials,
+    "mm/dd/yyyy" and "yyyy-mm-dd" strings become Timestamps.
+    Blank and unparseable cells are NaT; compare with series.notna() to
+    tell them apart.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    present = series.notna()
+    is_date = present & series.map(lambda v: isinstance(v, (datetime, date)))
+    if is_date.any():
+        parsed.loc[is_date] = pd.to_datetime(series[is_date], errors="coerce")
+
+    text = series[present & ~is_date].astype(str).str.strip()
+    numeric = pd.to_numeric(text, errors="coerce")
+    serial = numeric[(numeric > 0) & (numeric <= EXCEL_MAX_SERIAL)]
+    if not serial.empty:
+        parsed.loc[serial.index] = EXCEL_EPOCH + pd.to_timedelta(serial, unit="D")
+
+    text = text[numeric.isna()]
+    slashed = text[text.str.contains("/", regex=False)]
+    if not slashed.empty:
+        parsed.loc[slashed.index] = pd.to_datetime(slashed, format="%m/%d/%Y", errors="coerce")
+    dashed = text[~text.str.contains("/", regex=False) & text.str.contains("-", regex=False)]
+    if not dashed.empty:
+        parsed.loc[dashed.index] = pd.to_datetime(dashed.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    return parsed
+
 # ------------------------------------------------------------------------------
 # 3. Sanitize row data (replace NaN with None)
 # ------------------------------------------------------------------------------
@@ -355,6 +386,10 @@ def sanitize_value(value):
         pass
     return value
 
+def sanitize_series(series: pd.Series) -> pd.Series:
+    """Column-wise sanitize_value for a Series or DataFrame: NaN/NaT become None."""
+    return series.astype(object).where(series.notna(), None)
+
 def sanitize_row_data(row_data: dict) -> dict:
     sanitized = {}
     for key, value in row_data.items():
@@ -481,11 +516,7 @@ class BulkInsertService:
         #     # Add other model field sets for dynamic sheets here.
         # }
         self.model_field_map: Dict[str, set] = {
-        "employee": {"first_name", "middle_name", "last_name", "title", "gender", "date_of_birth",
-                    "marital_status", "email", "contact_info", "hire_date", "termination_date",
-                    "profile_image_path", "staff_id", "last_promotion_date", "employee_type_id",
-                    "department_id", "rank_id", "department", "rank", "employee type", "employment type",
-                    "role", "salary"},
+        "employee": EMPLOYEE_FIELDS,
         "academic_qualification": {"degree", "institution", "year_obtained", "details", "certificate_path"},
         "professional_qualification": {"qualification_name", "institution", "year_obtained", "details", "license_path"},
         "employment_history": {"job_title", "company", "start_date", "end_date", "details", "documents_path"},
@@ -501,22 +532,27 @@ class BulkInsertService:
     }
     
     # ---------------------- Helper Functions ----------------------
-    def _read_file(self, file: UploadFile) -> Dict[str, pd.DataFrame]:
+    def _read_file(self, file: UploadFile) -> Tuple[UploadReader, Dict[str, List[str]]]:
         """
-        Validates file extension and reads CSV/Excel data returning a dictionary of sheetname: DataFrame.
+        Validates file extension and opens a chunked reader over the CSV/Excel upload.
+        Returns the reader and a dictionary of sheetname: lowercased header; rows are
+        read later, chunk by chunk (see UploadReader.iter_chunks).
         """
-        if not allowed_file(file.filename):
-            raise HTTPException(status_code=400, detail="Only CSV or Excel files are allowed.")
+        reader = open_upload(file, ALLOWED_EXTENSIONS)
         try:
-            contents = file.file.read()
-            file_stream = io.BytesIO(contents)
-            if file.filename.lower().endswith("csv"):
-                df = pd.read_csv(file_stream)
-                return {"default": df}
-            else:
-                return pd.read_excel(file_stream, sheet_name=None)
+            sheets = {
+                sheet_name: [str(col).strip().lower() for col in reader.columns(sheet_name)]
+                for sheet_name in reader.sheet_names()
+            }
         except Exception as e:
+            reader.close()
             raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+        return reader, sheets
+
+    def _is_employee_sheet(self, sheet_name: str, columns: List[str]) -> bool:
+        """A sheet holds employee data if it is named so or shares 5+ employee fields."""
+        return sheet_name.strip().lower() in {"employee", "employees"} or \
+            len(set(columns).intersection(self.model_field_map["employee"])) >= 5
 
     def _prepare_employee_data(self, row_data: dict, organization_id: str, org, db: Session) -> Tuple[dict, Any, Any]:
         """
@@ -675,17 +711,9 @@ class BulkInsertService:
                               defaults: dict) -> Any:
         """
         Lookup or create a related record (e.g., Branch, Department, Rank, EmployeeType) and return its id.
+        Served from the import's LookupResolver: one query per table, not per row.
         """
-        instance = db.query(ModelClass).filter(
-            getattr(ModelClass, lookup_field).ilike(field_value),
-            ModelClass.organization_id == organization_id
-        ).first()
-        if not instance:
-            instance = ModelClass(**{lookup_field: field_value, **defaults, "organization_id": organization_id})
-            db.add(instance)
-            db.commit()
-            db.refresh(instance)
-        return instance.id
+        return LookupResolver.for_session(db, organization_id).resolve(field_value, ModelClass, lookup_field, defaults)
 
     def get_or_create_default_role(self, db: Session, organization_id: str) -> str:
         """
@@ -720,181 +748,603 @@ class BulkInsertService:
         """
         return html_content
 
+    # ---------------------- Employee Sheet Import ----------------------
+    def _import_employee_rows(self, db: Session, df: pd.DataFrame, sheet_name: str,
+                              organization_id: str, org, report: dict) -> List[Tuple[Any, dict, str]]:
+        """
+        Row-by-row import of one employee sheet through the ORM (one
+        transaction per row). Returns (row_index, model_data, plain password)
+        for every inserted employee.
+        """
+        created = []
+        # Temporary passwords for the whole sheet, hashed in parallel on the bcrypt pool
+        plain_passwords = [generate_random_string(6) for _ in range(len(df))]
+        sheet_passwords = iter(zip(plain_passwords, password_service.hash_many(plain_passwords)))
+        for idx, row in df.iterrows():
+            row_data = sanitize_row_data(dict(row))
+            try:
+                model_data, transient_role_id, salary_value = self._prepare_employee_data(
+                    row_data, organization_id, org, db
+                )
+                # Take this row's pre-hashed random password.
+                transient_pwd, transient_hash = next(sheet_passwords)
+
+                # Build and insert Employee record.
+                record = Employee(**model_data)
+                if transient_role_id:
+                    setattr(record, "_role_id", transient_role_id)
+                    setattr(record, "_plain_password", transient_pwd)
+                    setattr(record, "_hashed_password", transient_hash)
+                db.add(record)
+                db.flush()  # Get primary key
+
+                # Update mapping using lowercase email.
+                if "email" in model_data and model_data["email"]:
+                    email_lower = model_data["email"].lower()
+                    report["employee_map"][email_lower] = record.id
+                    report["employee_list"].append(record.id)
+
+                # Create salary payment record if applicable.
+                if salary_value is not None:
+                    sp = SalaryPayment(
+                        employee_id=record.id,
+                        rank_id=model_data.get("rank_id"),
+                        amount=salary_value,
+                        currency="GHS",
+                        payment_date=datetime.utcnow(),
+                        payment_method="Bank Transfer",
+                        transaction_id=''.join(random.choices(string.ascii_letters + string.digits, k=12)),
+                        status="Success"
+                    )
+                    db.add(sp)
+                    db.flush()
+
+                db.commit()
+                report["success"].append({
+                    "sheet": sheet_name,
+                    "row_index": idx,
+                    "model": "employee"
+                })
+                created.append((idx, model_data, transient_pwd))
+
+            except Exception as e:
+                db.rollback()
+                report["errors"].append({
+                    "sheet": sheet_name,
+                    "row_index": idx,
+                    "model": "employee",
+                    "error": str(e),
+                    "data": row_data
+                })
+                report["failed_rows"].setdefault(sheet_name, []).append(idx)
+        return created
+
+    def _map_employee_columns(self, columns) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]], Optional[str]]:
+        """
+        Resolve every sheet column to its Employee concept once per sheet, the
+        way _prepare_employee_data does for each row.
+        Returns ({field: [columns]}, [(contact concept, column)], branch column).
+        """
+        expected_fields = self.model_field_map["employee"]
+        by_normalized = {normalize_column_name(field): field for field in expected_fields}
+        fields: Dict[str, List[str]] = {}
+        extras: List[Tuple[str, str]] = []
+        branch_column = None
+        for col_name, concept in zip(columns, find_standard_concepts(columns)):
+            if branch_column is None and concept.lower() == "branch":
+                branch_column = col_name
+            concept = by_normalized.get(normalize_column_name(concept), concept)
+            if concept in expected_fields:
+                fields.setdefault(concept, []).append(col_name)
+            elif any(x in concept for x in ["address", "phone", "contact", "gps"]):
+                extras.append((concept, col_name))
+        return fields, extras, branch_column
+
+    def _resolve_related_ids(self, db: Session, organization_id: str, values: pd.Series,
+                             ModelClass: Any, lookup_field: str, defaults=None) -> pd.Series:
+        """
+        Set-based process_related_field: map each value of `values` to the id
+        of the organization's ModelClass row whose lookup_field matches it
+        (case-insensitive), creating the missing rows in one upsert (see
+        LookupResolver). `defaults` is a dict or a callable(lowercased value)
+        returning one. Blank values map to None.
+        """
+        resolved = pd.Series(None, index=values.index, dtype=object)
+        names = values.dropna()
+        if names.empty:
+            return resolved
+        names = names.astype(str).str.strip()
+        names = names[names != ""]
+        if names.empty:
+            return resolved
+        keys = names.str.lower()
+        spelling = names.groupby(keys).first()  # as first written in the sheet
+
+        ids = LookupResolver.for_session(db, organization_id).resolve_many(
+            spelling.tolist(), ModelClass, lookup_field, defaults
+        )
+        resolved.loc[keys.index] = keys.map(ids)
+        return resolved
+
+    def _import_employee_frame(self, db: Session, df: pd.DataFrame, sheet_name: str,
+                               organization_id: str, org, report: dict) -> List[Tuple[Any, dict, str]]:
+        """
+        Set-based import of one employee sheet.
+
+        Columns are mapped once and normalized/validated column-wise; branches,
+        departments, ranks, employee types and roles are resolved with one IN
+        query each; Employees, their Users and SalaryPayments are written with
+        multi-row INSERTs, one transaction per BULK_IMPORT_CHUNK_SIZE rows.
+        Invalid rows are reported individually and a chunk the database
+        rejects is retried row by row, so only the offending rows fail.
+
+        Returns (row_index, model_data, plain password) for every inserted
+        employee, like _import_employee_rows.
+        """
+        fields, extras, branch_column = self._map_employee_columns(df.columns)
+        index = df.index
+        errors = pd.Series("", index=index, dtype=object)
+
+        def flag(mask: pd.Series, message) -> None:
+            # The first problem found for a row is the one reported.
+            mask = mask.fillna(False).astype(bool) & (errors == "")
+            errors.loc[mask] = message[mask] if isinstance(message, pd.Series) else message
+
+        def column(field: str) -> pd.Series:
+            cols = fields.get(field)
+            if not cols:
+                return pd.Series(None, index=index, dtype=object)
+            if len(cols) == 1:
+                return df[cols[0]]
+            # Several columns mean the same field: the last filled one wins.
+            return df[cols].ffill(axis=1).iloc[:, -1]
+
+        def text(series: pd.Series) -> pd.Series:
+            stripped = series.astype("string").str.strip()
+            return stripped.mask(stripped == "")
+
+        frame = pd.DataFrame(index=index)
+        for field in ("first_name", "middle_name", "last_name", "title", "gender",
+                      "marital_status", "email", "staff_id", "profile_image_path"):
+            frame[field] = text(column(field))
+        for field in ("employee_type_id", "department_id", "rank_id"):
+            frame[field] = column(field)
+
+        # Contact details that are not Employee columns are folded into contact_info.
+        if extras:
+            frame["contact_info"] = pd.Series(
+                sanitize_series(df[[col for _, col in extras]])
+                .set_axis([concept for concept, _ in extras], axis=1)
+                .to_dict("records"),
+                index=index
+            )
+        else:
+            frame["contact_info"] = column("contact_info")
+
+        # -- Validation (column-wise) --
+        for field in ("first_name", "last_name", "email"):
+            flag(frame[field].isna(), f"Missing required field: {field}")
+
+        for dcol in ("date_of_birth", "hire_date", "termination_date", "last_promotion_date"):
+            raw = column(dcol)
+            parsed = parse_date_series(raw)
+            flag(raw.notna() & parsed.isna(), f"Invalid date for {dcol}: " + raw.astype(str))
+            frame[dcol] = parsed.dt.date
+
+        email_keys = frame["email"].str.lower()
+        flag(email_keys.duplicated(keep="first") & email_keys.notna(),
+             "Duplicate email in file: " + frame["email"].astype(str))
+        flag(email_keys.isin(list(report["employee_map"])),
+             "Email already imported from another sheet: " + frame["email"].astype(str))
+        flag(frame["staff_id"].duplicated(keep="first") & frame["staff_id"].notna(),
+             "Duplicate staff_id in file: " + frame["staff_id"].astype(str))
+
+        chunk_size = max(config.BULK_IMPORT_CHUNK_SIZE, 1)
+        for field in ("email", "staff_id"):
+            values = frame[field].dropna().unique().tolist()
+            table_column = getattr(Employee, field)
+            taken = set()
+            for start in range(0, len(values), chunk_size):
+                taken.update(db.execute(
+                    select(table_column).where(table_column.in_(values[start:start + chunk_size]))
+                ).scalars())
+            flag(frame[field].isin(taken), f"Employee with this {field} already exists: " + frame[field].astype(str))
+
+        branch_values = text(df[branch_column]) if branch_column else pd.Series(None, index=index, dtype=object)
+        if org.nature.strip().lower() == "single managed":
+            flag(branch_values.notna(), f"Organization '{org.name}' is single managed; branch data is not allowed.")
+
+        salary = pd.to_numeric(column("salary"), errors="coerce")
+
+        # -- Related records, resolved for the rows that are still valid --
+        valid = errors == ""
+        try:
+            branch_ids = pd.Series(None, index=index, dtype=object)
+            if branch_column:
+                branch_keys = branch_values[valid].str.lower()
+                location = text(df["location"]) if "location" in df.columns else branch_values
+                branch_location = location[valid].fillna(branch_values[valid]).groupby(branch_keys).first()
+                branch_ids = self._resolve_related_ids(
+                    db, organization_id, branch_values[valid], Branch, "name",
+                    lambda key: {"location": branch_location.get(key), "manager_id": None}
+                ).reindex(index)
+
+            departments = text(column("department"))[valid]
+            dept_branch = branch_ids[valid].groupby(departments.str.lower()).first()
+            dept_ids = self._resolve_related_ids(
+                db, organization_id, departments, Department, "name",
+                lambda key: {"branch_id": dept_branch.get(key)} if pd.notna(dept_branch.get(key)) else {}
+            )
+            frame.loc[dept_ids.dropna().index, "department_id"] = dept_ids.dropna()
+
+            rank_ids = self._resolve_related_ids(
+                db, organization_id, text(column("rank"))[valid], Rank, "name",
+                {"min_salary": 0, "max_salary": None, "currency": "GHS"}
+            )
+            frame.loc[rank_ids.dropna().index, "rank_id"] = rank_ids.dropna()
+
+            employee_types = text(column("employee type")).fillna(text(column("employment type")))
+            type_ids = self._resolve_related_ids(
+                db, organization_id, employee_types[valid], EmployeeType, "type_code", {}
+            )
+            frame.loc[type_ids.dropna().index, "employee_type_id"] = type_ids.dropna()
+
+            roles = text(column("role"))[valid]
+            role_ids = self._resolve_related_ids(
+                db, organization_id, roles, Role, "name",
+                lambda key: {"permissions": {"view": "own", "edit": "own"} if key == "staff" else {}}
+            )
+            if roles.isna().any():
+                role_ids = role_ids.fillna(self.get_or_create_default_role(db, organization_id))
+            db.commit()
+        except Exception as e:
+            # Same outcome as every row failing its lookups on the row-by-row path.
+            db.rollback()
+            flag(valid, str(e))
+            role_ids = pd.Series(None, index=index, dtype=object)
+
+        # -- Insert --
+        frame["organization_id"] = organization_id
+        employee_columns = [c for c in frame.columns if c in Employee.__table__.columns]
+        defaults = {
+            name: Employee.__table__.c[name].default.arg
+            for name in ("title", "gender", "marital_status")
+            if Employee.__table__.c[name].default is not None
+        }
+        valid_index = errors.index[errors == ""]
+        plain_passwords = [generate_random_string(6) for _ in range(len(valid_index))]
+        hashed_passwords = password_service.hash_many(plain_passwords)
+
+        rows = []
+        records = sanitize_series(frame.loc[valid_index, employee_columns]).to_dict("index")
+        for (idx, values), pwd, pwd_hash in zip(records.items(), plain_passwords, hashed_passwords):
+            for name, default in defaults.items():
+                if values.get(name) is None:
+                    values[name] = default
+            values["id"] = uuid.uuid4()
+            amount = salary.get(idx)
+            rows.append({
+                "index": idx,
+                "employee": values,
+                "role_id": role_ids.get(idx),
+                "password": pwd,
+                "hashed_password": pwd_hash,
+                "salary": None if pd.isna(amount) else float(amount),
+            })
+
+        failed = {}
+        for start in range(0, len(rows), chunk_size):
+            failed.update(self._insert_employee_chunk(db, organization_id, org, rows[start:start + chunk_size]))
+        for idx, message in failed.items():
+            errors.loc[idx] = message
+
+        # -- Report --
+        created = []
+        raw_rows = sanitize_series(df.loc[errors != ""]).to_dict("index")
+        for idx in index:
+            if errors[idx]:
+                report["errors"].append({
+                    "sheet": sheet_name,
+                    "row_index": idx,
+                    "model": "employee",
+                    "error": errors[idx],
+                    "data": raw_rows[idx]
+                })
+                report["failed_rows"].setdefault(sheet_name, []).append(idx)
+        for row in rows:
+            idx = row["index"]
+            if idx in failed:
+                continue
+            model_data = row["employee"]
+            report["employee_map"][model_data["email"].lower()] = model_data["id"]
+            report["employee_list"].append(model_data["id"])
+            report["success"].append({
+                "sheet": sheet_name,
+                "row_index": idx,
+                "model": "employee"
+            })
+            created.append((idx, model_data, row["password"]))
+        return created
+
+    def _insert_employee_chunk(self, db: Session, organization_id: str, org, rows: List[dict]) -> Dict[Any, str]:
+        """
+        Write one chunk of prepared rows in a single transaction. If the
+        database rejects it, the chunk is retried one row at a time.
+        Returns {row_index: error} for the rows that could not be inserted.
+        """
+        try:
+            self._write_employee_chunk(db, organization_id, org, rows)
+            db.commit()
+            return {}
+        except Exception as e:
+            db.rollback()
+            if len(rows) == 1:
+                return {rows[0]["index"]: str(e)}
+        failed = {}
+        for row in rows:
+            failed.update(self._insert_employee_chunk(db, organization_id, org, [row]))
+        return failed
+
+    def _write_employee_chunk(self, db: Session, organization_id: str, org, rows: List[dict]) -> None:
+        """
+        Multi-row INSERTs for a chunk of employees plus what the Employee
+        mapper listeners would have written for each of them: the User
+        account (create_user_for_employee), the profile image's FileStorage
+        row and the organization's summary counters.
+        """
+        from Models.models import FileStorage, _infer_file_type
+        from Service.summary_counters import apply_counter_deltas
+        from Apis.change_dispatcher import post_commit_dispatcher
+
+        employees = [row["employee"] for row in rows]
+        db.execute(Employee.__table__.insert().values(employees))
+
+        # Users: update the ones that already exist (matched by email and
+        # organization), insert the rest.
+        user_table = User.__table__
+        emails = [emp["email"] for emp in employees]
+        existing = set(db.execute(
+            select(user_table.c.email).where(
+                user_table.c.organization_id == organization_id,
+                user_table.c.email.in_(emails)
+            )
+        ).scalars())
+        new_users = []
+        for row in rows:
+            emp = row["employee"]
+            if emp["email"] in existing:
+                db.execute(
+                    update(user_table)
+                    .where((user_table.c.email == emp["email"]) & (user_table.c.organization_id == organization_id))
+                    .values(email=emp["email"], organization_id=organization_id,
+                            image_path=emp.get("profile_image_path"), role_id=row["role_id"])
+                )
+            else:
+                new_users.append({
+                    "username": emp["email"],
+                    "email": emp["email"],
+                    "hashed_password": row["hashed_password"],
+                    "role_id": row["role_id"],
+                    "organization_id": organization_id,
+                    "is_active": True,
+                    "image_path": None,
+                })
+        if new_users:
+            db.execute(user_table.insert().values(new_users))
+
+        salary_payments = [
+            {
+                "employee_id": row["employee"]["id"],
+                "rank_id": row["employee"].get("rank_id"),
+                "amount": row["salary"],
+                "currency": "GHS",
+                "payment_date": datetime.utcnow(),
+                "payment_method": "Bank Transfer",
+                "transaction_id": ''.join(random.choices(string.ascii_letters + string.digits, k=12)),
+                "status": "Success",
+            }
+            for row in rows if row["salary"]
+        ]
+        if salary_payments:
+            db.execute(SalaryPayment.__table__.insert().values(salary_payments))
+
+        files = [
+            {
+                "file_name": emp["profile_image_path"].split("/")[-1],
+                "file_path": emp["profile_image_path"],
+                "file_type": _infer_file_type(emp["profile_image_path"]),
+                "record_id": emp["id"],
+                "record_type": Employee.__tablename__,
+                "organization_id": organization_id,
+                "uploaded_by_id": None,
+            }
+            for emp in employees if emp.get("profile_image_path")
+        ]
+        if files:
+            db.execute(FileStorage.__table__.insert().values(files))
+
+        apply_counter_deltas(db.connection(), organization_id, {
+            "employees": len(employees),
+            "users": len(new_users),
+            "active_users": len(new_users),
+        })
+        # New employees have no cached record or watcher yet; only the
+        # organization summary needs a refresh once this commits.
+        post_commit_dispatcher.mark(org, "summary", str(organization_id))
+
     def bulk_insert_crud(self, organization_id: str, file: UploadFile,
-                         background_tasks: BackgroundTasks, db: Session) -> dict:
+                         background_tasks: BackgroundTasks, db: Session,
+                         pipeline: Optional[bool] = None,
+                         progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Import employees (and their related sheets) from a CSV/Excel upload.
+        `pipeline` picks the set-based employee import (_import_employee_frame)
+        or the row-by-row one (_import_employee_rows); None follows
+        config.BULK_IMPORT_PIPELINE.
+        `progress`, if given, is called after every chunk with the running
+        total_rows (estimate), processed_rows, success_count and error_count.
+        """
         # ---------------------- STEP 1: Validate and Read File ----------------------
-        sheets = self._read_file(file)
+        reader, sheets = self._read_file(file)
+        try:
+            return self._bulk_insert_sheets(reader, sheets, organization_id, file, background_tasks, db,
+                                            pipeline, progress)
+        finally:
+            reader.close()
+            LookupResolver.release(db)
+
+    def _bulk_insert_sheets(self, reader: UploadReader, sheets: Dict[str, List[str]], organization_id: str,
+                            file: UploadFile, background_tasks: BackgroundTasks, db: Session,
+                            pipeline: Optional[bool], progress: Optional[Callable[[dict], None]]) -> dict:
         if not sheets:
             raise HTTPException(status_code=400, detail="No sheets found in file.")
 
+        counts = {"total_rows": None, "processed_rows": 0, "success_count": 0, "error_count": 0}
+        if progress:
+            estimates = [reader.count_rows(sheet_name) for sheet_name in sheets]
+            counts["total_rows"] = None if None in estimates else sum(estimates)
+            progress(dict(counts))
+
+        def report_progress(rows: int) -> None:
+            if progress:
+                counts.update(processed_rows=counts["processed_rows"] + rows,
+                              success_count=len(success_records), error_count=len(error_records))
+                progress(dict(counts))
+
         # ---------------------- STEP 2: Retrieve Organization ----------------------
         org = db.query(Organization).filter(Organization.id == organization_id).first()
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found.")
 
-        logo_url = get_primary_logo(org.logos or {})
-        org_acronym = get_organization_acronym(org.name)
-        login_href = f"{org.access_url}/signin" if org.access_url else "https://example.com/login"
-
         # Initialize response data containers.
-        success_records: List[Dict] = []
-        error_records: List[Dict] = []
-        failed_rows_by_sheet: Dict[str, List[int]] = {}
-        employee_map: Dict[str, Any] = {}   # email (lowercase) -> employee_id
-        employee_list: List[Any] = []         # preserve insertion order
+        report = {
+            "success": [],
+            "errors": [],
+            "failed_rows": {},
+            "employee_map": {},   # email (lowercase) -> employee_id
+            "employee_list": [],  # preserve insertion order
+        }
+        success_records: List[Dict] = report["success"]
+        error_records: List[Dict] = report["errors"]
+        failed_rows_by_sheet: Dict[str, List[int]] = report["failed_rows"]
+
+        # Account emails: the organization's shell (logo, acronym, login link) is
+        # rendered once per org version; sent as one batch after the employee pass.
+        def account_email_shell() -> RenderedTemplate:
+            logo_url = get_primary_logo(org.logos or {})
+            org_acronym = get_organization_acronym(org.name)
+            login_href = f"{org.access_url}/signin" if org.access_url else "https://example.com/login"
+            return RenderedTemplate(
+                lambda fields: self.build_account_email_html(fields, org_acronym, logo_url, login_href,
+                                                             fields["password"]),
+                ACCOUNT_EMAIL_FIELDS,
+            )
+
+        account_emails = AccountEmailBatch(
+            email_templates.cached_shell(org_key(org, "bulk_insert.account_created"), account_email_shell),
+            "Account Created Successfully",
+            organization_id,
+        )
+        employee_map: Dict[str, Any] = report["employee_map"]
+        employee_list: List[Any] = report["employee_list"]
+
+        if pipeline is None:
+            pipeline = config.BULK_IMPORT_PIPELINE
+        import_employees = self._import_employee_frame if pipeline else self._import_employee_rows
 
         # ---------------------- STEP 3: Process Employee Records ----------------------
         # Sort sheets: process those with maximum overlap with employee fields first.
         ordered_sheets = sorted(
             sheets.items(),
-            key=lambda item: len(set(item[1].columns.str.lower()).intersection(self.model_field_map["employee"])),
+            key=lambda item: len(set(item[1]).intersection(self.model_field_map["employee"])),
             reverse=True
         )
 
         total_employee_rows = 0
-        for sheet_name, df in ordered_sheets:
-            sheet_id = sheet_name.strip().lower()
+        for sheet_name, columns in ordered_sheets:
             # Process only if this sheet appears to contain employee data.
-            if sheet_id in {"employee", "employees"} or \
-               len(set(df.columns.str.lower()).intersection(self.model_field_map["employee"])) >= 5:
-                df.columns = [col.strip().lower() for col in df.columns]
+            if not self._is_employee_sheet(sheet_name, columns):
+                continue
+            # Bounded chunks: only one chunk of the sheet is held at a time.
+            for df in reader.iter_chunks(sheet_name):
+                df.columns = [str(col).strip().lower() for col in df.columns]
                 total_employee_rows += len(df)
-                for idx, row in df.iterrows():
-                    row_data = sanitize_row_data(dict(row))
-                    try:
-                        model_data, transient_role_id, salary_value = self._prepare_employee_data(
-                            row_data, organization_id, org, db
-                        )
-                        # Generate a random password.
-                        transient_pwd = generate_random_string(6)
-
-                        # Build and insert Employee record.
-                        record = Employee(**model_data)
-                        if transient_role_id:
-                            setattr(record, "_role_id", transient_role_id)
-                            setattr(record, "_plain_password", transient_pwd)
-                        db.add(record)
-                        db.flush()  # Get primary key
-
-                        # Update mapping using lowercase email.
-                        if "email" in model_data and model_data["email"]:
-                            email_lower = model_data["email"].lower()
-                            employee_map[email_lower] = record.id
-                            employee_list.append(record.id)
-
-                        # Create salary payment record if applicable.
-                        if salary_value is not None:
-                            sp = SalaryPayment(
-                                employee_id=record.id,
-                                rank_id=model_data.get("rank_id"),
-                                amount=salary_value,
-                                currency="GHS",
-                                payment_date=datetime.utcnow(),
-                                payment_method="Bank Transfer",
-                                transaction_id=''.join(random.choices(string.ascii_letters + string.digits, k=12)),
-                                status="Success"
-                            )
-                            db.add(sp)
-                            db.flush()
+                created = import_employees(db, df, sheet_name, organization_id, org, report)
 
-                        db.commit()
-                        success_records.append({
-                            "sheet": sheet_name,
-                            "row_index": idx,
-                            "model": "employee",
-                            "data": row_data
-                        })
-
-                        # Send email notification asynchronously.
-                        if "email" in model_data and model_data["email"]:
-                            try:
-                                email_service = EmailService()
-                                email_body = self.build_account_email_html(
-                                    model_data, org_acronym, logo_url, login_href, transient_pwd
-                                )
-                                background_tasks.add_task(
-                                    email_service.send_html_email,
-                                    background_tasks,
-                                    [model_data["email"]],
-                                    "Account Created Successfully",
-                                    email_body
-                                )
-                            except Exception as email_exc:
-                                # Log but do not interrupt processing.
-                                print(f"[WARN] Failed to send email for row {idx}: {email_exc}")
-
-                    except Exception as e:
-                        db.rollback()
-                        error_records.append({
-                            "sheet": sheet_name,
-                            "row_index": idx,
-                            "error": str(e),
-                            "data": row_data
-                        })
-                        failed_rows_by_sheet.setdefault(sheet_name, []).append(idx)
+                # Queue the account emails of the created employees.
+                for idx, model_data, transient_pwd in created:
+                    if "email" in model_data and model_data["email"]:
+                        account_emails.add(model_data["email"], {**{f: model_data.get(f) for f in ACCOUNT_EMAIL_FIELDS},
+                                                         "password": transient_pwd})
+                report_progress(len(df))
+
+        # Send the account emails in the background, over a few SMTP connections.
+        if len(account_emails):
+            background_tasks.add_task(account_emails.send_all)
 
         # ---------------------- STEP 4: Process Additional (Dynamic) Sheets ----------------------
         if employee_map:
-            for sheet_name, df in sheets.items():
+            for sheet_name, columns in sheets.items():
                 # Skip sheets already processed as employee data.
-                sheet_id = sheet_name.strip().lower()
-                if sheet_id in {"employee", "employees"} or \
-                   len(set(df.columns.str.lower()).intersection(self.model_field_map["employee"])) >= 5:
+                if self._is_employee_sheet(sheet_name, columns):
                     continue
 
-                df.columns = [col.strip().lower() for col in df.columns]
-                # Determine the best matching model based on column overlap.
-                model_choice, expected_fields = self._determine_model_choice(df)
-                for idx, row in df.iterrows():
-                    row_data = sanitize_row_data(dict(row))
-                    try:
-                        model_data = self._prepare_dynamic_data(row_data, expected_fields)
-                        # Try to link the record to an employee via email; if not available, assume order mapping.
-                        if "email" in row_data and row_data["email"]:
-                            emp_id = employee_map.get(row_data["email"].lower())
-                            if emp_id:
-                                model_data["employee_id"] = emp_id
-                        elif "employee_id" not in model_data and idx < len(employee_list):
-                            model_data["employee_id"] = employee_list[idx]
-
-                        # Attach organization_id if applicable.
-                        ModelClass = self.model_classes.get(model_choice, None)
-                        if ModelClass and hasattr(ModelClass, "__table__") and "organization_id" in ModelClass.__table__.columns:
-                            model_data["organization_id"] = organization_id
-
-                        # Create and insert related record.
-                        if ModelClass:
-                            record = ModelClass(**model_data)
-                        else:
-                            # Fallback to dynamic data if no matching model was found.
-                            record = EmployeeDynamicData(
-                                employee_id=model_data.get("employee_id"),
-                                data_category=sheet_name,
-                                data=row_data
-                            )
-                        db.add(record)
-                        db.flush()
-                        db.commit()
-
-                        success_records.append({
-                            "sheet": sheet_name,
-                            "row_index": idx,
-                            "model": model_choice,
-                            "data": row_data
-                        })
-                    except Exception as e:
-                        db.rollback()
-                        error_records.append({
-                            "sheet": sheet_name,
-                            "row_index": idx,
-                            "error": str(e),
-                            "data": row_data
-                        })
-                        failed_rows_by_sheet.setdefault(sheet_name, []).append(idx)
+                for df in reader.iter_chunks(sheet_name):
+                    df.columns = [str(col).strip().lower() for col in df.columns]
+                    # Determine the best matching model based on column overlap.
+                    model_choice, expected_fields = self._determine_model_choice(df)
+                    for idx, row in df.iterrows():
+                        row_data = sanitize_row_data(dict(row))
+                        try:
+                            model_data = self._prepare_dynamic_data(row_data, expected_fields)
+                            # Try to link the record to an employee via email; if not available, assume order mapping.
+                            if "email" in row_data and row_data["email"]:
+                                emp_id = employee_map.get(row_data["email"].lower())
+                                if emp_id:
+                                    model_data["employee_id"] = emp_id
+                            elif "employee_id" not in model_data and idx < len(employee_list):
+                                model_data["employee_id"] = employee_list[idx]
+
+                            # Attach organization_id if applicable.
+                            ModelClass = self.model_classes.get(model_choice, None)
+                            if ModelClass and hasattr(ModelClass, "__table__") and "organization_id" in ModelClass.__table__.columns:
+                                model_data["organization_id"] = organization_id
+
+                            # Create and insert related record.
+                            if ModelClass:
+                                record = ModelClass(**model_data)
+                            else:
+                                # Fallback to dynamic data if no matching model was found.
+                                record = EmployeeDynamicData(
+                                    employee_id=model_data.get("employee_id"),
+                                    data_category=sheet_name,
+                                    data=row_data
+                                )
+                            db.add(record)
+                            db.flush()
+                            db.commit()
+
+                            success_records.append({
+                                "sheet": sheet_name,
+                                "row_index": idx,
+                                "model": model_choice
+                            })
+                        except Exception as e:
+                            db.rollback()
+                            error_records.append({
+                                "sheet": sheet_name,
+                                "row_index": idx,
+                                "model": model_choice,
+                                "error": str(e),
+                                "data": row_data
+                            })
+                            failed_rows_by_sheet.setdefault(sheet_name, []).append(idx)
+                    report_progress(len(df))
         else:
             print("No employee records processed; skipping processing of related sheets.")
 
         # ---------------------- STEP 5: Log Errors if Present ----------------------
+        err_log = None
         if error_records:
             err_log = BulkUploadError(
                 organization_id=organization_id,
@@ -909,12 +1359,11 @@ class BulkInsertService:
         success_count = len([r for r in success_records if r["model"] == "employee"])
         print(f"Success count: {success_count}")
         # Filter out errors related to employee records.
-        error_records = [r for r in error_records if r["model"] == "employee"]
+        error_records = [r for r in error_records if r.get("model") == "employee"]
         failure_count = len(error_records)
 
         print(f"Failure count: {failure_count}")
         print("error_records: ", error_records)
-        print("success_records: ", success_records)
 
         # Compose message based on results.
         if success_count and not failure_count:
@@ -922,7 +1371,7 @@ class BulkInsertService:
         elif success_count and failure_count:
             msg = (f"Employees should check their emails for access to the system; however, some records "
                    "failed. Please review the failed records (see details below) and try manual insertion.\n**************************************************\n\t\tDetails\n**************************************************")
-            msg += "\n".join([f"Sheet: {r['sheet']}, Row: {r['row_index']}, Error: {r['error']}" for r in failed_rows_by_sheet.values()])
+            msg += "\n".join([f"Sheet: {r['sheet']}, Row: {r['row_index']}, Error: {r['error']}" for r in error_records])
         else:
             msg = "All records failed. Please review the errors and try again or register the records manually."
 
@@ -932,6 +1381,8 @@ class BulkInsertService:
             "successful_inserts": len(success_records),
             "failed_inserts": failure_count,
             "failed_rows_by_sheet": failed_rows_by_sheet,
+            "error_log_id": str(err_log.id) if err_log is not None else None,
+            "account_emails": account_emails.summary(),
             "message": msg
         }
 
@@ -8,7 +8,9 @@ Supports two multi-tenant application models:
 Drop this file into `services/email_service.py`, instantiate with `schema_based=True` for App1 or `schema_based=False` for App2.
 """
 from abc import ABC, abstractmethod
-import smtplib
+import threading
+from collections import OrderedDict
+from email.utils import getaddresses, parseaddr
 import httpx
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -18,10 +20,10 @@ from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List, Optional
-import sendgrid
-from sendgrid.helpers.mail import Mail
-import ssl
+from typing import List, Optional, Tuple
+import smtplib
+from Utils.config import config
+from Utils.smtp_pool import SMTPConnectionPool
 
 
 
@@ -35,6 +37,71 @@ class EmailProvider(ABC):
     def test_connection(self) -> None:
         pass
 
+# ---------- Transports ----------
+# One bounded pool of authenticated SMTP connections per distinct tenant
+# configuration, shared by every SMTPProvider built from it, and one
+# keep-alive HTTP client for all SendGrid API calls.
+_MAX_SMTP_POOLS = 256
+_smtp_pools: "OrderedDict[Tuple, SMTPConnectionPool]" = OrderedDict()
+_transport_lock = threading.Lock()
+_sendgrid_client: Optional[httpx.Client] = None
+
+
+def get_smtp_pool(host: str, port: int, username: str, password: str, use_tls: bool = True) -> SMTPConnectionPool:
+    """The shared pool for these settings, created on first use."""
+    sendgrid_relay = host == "smtp.sendgrid.net"
+    key = (host, port, username, password, use_tls)
+    with _transport_lock:
+        pool = _smtp_pools.get(key)
+        if pool is None:
+            pool = _smtp_pools[key] = SMTPConnectionPool(
+                host,
+                port,
+                username="apikey" if sendgrid_relay else username,
+                password=password,
+                use_ssl=port == 465 and not sendgrid_relay,
+                starttls=use_tls,
+                size=config.TENANT_SMTP_POOL_SIZE,
+                health_check_after=config.SMTP_HEALTH_CHECK_SECONDS,
+            )
+            # Settings that changed or went unused age out.
+            while len(_smtp_pools) > _MAX_SMTP_POOLS:
+                _, stale = _smtp_pools.popitem(last=False)
+                stale.close()
+        else:
+            _smtp_pools.move_to_end(key)
+        return pool
+
+
+def get_sendgrid_client() -> httpx.Client:
+    global _sendgrid_client
+    if _sendgrid_client is None:
+        with _transport_lock:
+            if _sendgrid_client is None:
+                _sendgrid_client = httpx.Client(
+                    base_url="https://api.sendgrid.com",
+                    timeout=60,
+                    limits=httpx.Limits(
+                        max_connections=config.SENDGRID_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=config.SENDGRID_HTTP_MAX_CONNECTIONS,
+                    ),
+                )
+    return _sendgrid_client
+
+
+def close_transports() -> None:
+    """Close the pooled SMTP connections and the SendGrid client (application shutdown)."""
+    global _sendgrid_client
+    with _transport_lock:
+        pools = list(_smtp_pools.values())
+        _smtp_pools.clear()
+        client, _sendgrid_client = _sendgrid_client, None
+    for pool in pools:
+        pool.close()
+    if client is not None:
+        client.close()
+
+
 class SMTPProvider(EmailProvider):
     def __init__(self, host: str, port: int, username: str, password: str, use_tls: bool = True):
         self.host = host
@@ -42,46 +109,33 @@ class SMTPProvider(EmailProvider):
         self.username = username
         self.password = password
         self.use_tls = use_tls
-        self.context = ssl.create_default_context()
-
-    def _get_connection(self):
-        if self.host == "smtp.sendgrid.net":
-            server = smtplib.SMTP(self.host, self.port, timeout=60)
-            server.ehlo()
-            if self.use_tls:
-                server.starttls(context=self.context)
-                server.ehlo()
-            return server
-        elif self.port == 465:
-            return smtplib.SMTP_SSL(self.host, self.port, context=self.context, timeout=60)
-        else:
-            server = smtplib.SMTP(self.host, self.port, timeout=60)
-            server.ehlo()
-            if self.use_tls:
-                server.starttls(context=self.context)
-                server.ehlo()
-            return server
+        self.pool = get_smtp_pool(host, port, username, password, use_tls)
 
     def test_connection(self):
-        with self._get_connection() as server:
-            login_user = "apikey" if self.host == "smtp.sendgrid.net" else self.username
-            server.login(login_user, self.password)
+        # Borrowing a connection logs in (or NOOP-checks an idle one).
+        with self.pool.connection() as server:
+            server.noop()
 
     def send_message(self, msg):
-        with self._get_connection() as server:
-            login_user = "apikey" if self.host == "smtp.sendgrid.net" else self.username
-            server.login(login_user, self.password)
-            server.sendmail(msg["From"], msg["To"].split(","), msg.as_string())
+        recipients = [addr for _, addr in getaddresses([msg["To"]])]
+        try:
+            with self.pool.connection() as server:
+                server.sendmail(msg["From"], recipients, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between its health check and the send; retry once on a fresh connection.
+            with self.pool.connection() as server:
+                server.sendmail(msg["From"], recipients, msg.as_string())
 
 class SendGridProvider(EmailProvider):
     def __init__(self, api_key):
-        self.sg = sendgrid.SendGridAPIClient(api_key)
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.client = get_sendgrid_client()
 
     def test_connection(self):
         # Simple call to ensure credentials work
-        response = self.sg.client.user.profile.get()
+        response = self.client.get("/v3/user/profile", headers=self.headers)
         if response.status_code >= 400:
-            raise ConnectionError(f"SendGrid error: {response.status_code} - {response.body}")
+            raise ConnectionError(f"SendGrid error: {response.status_code} - {response.text}")
 
     def send_message(self, msg: MIMEMultipart):
         # ✅ Properly extract HTML content from MIME message
@@ -95,16 +149,18 @@ class SendGridProvider(EmailProvider):
         if not html_content:
             raise ValueError("No HTML content found in email message.")
 
-        mail = Mail(
-            from_email=msg['From'],
-            to_emails=[r.strip() for r in msg['To'].split(',')],
-            subject=msg['Subject'],
-            html_content=html_content
-        )
+        from_name, from_email = parseaddr(msg['From'])
+        sender = {"email": from_email, **({"name": from_name} if from_name else {})}
+        payload = {
+            "personalizations": [{"to": [{"email": addr} for _, addr in getaddresses([msg['To']])]}],
+            "from": sender,
+            "subject": msg['Subject'],
+            "content": [{"type": "text/html", "value": html_content}],
+        }
 
-        response = self.sg.send(mail)
+        response = self.client.post("/v3/mail/send", json=payload, headers=self.headers)
         if response.status_code >= 400:
-            raise RuntimeError(f"SendGrid send failed: {response.status_code} - {response.body}")
+            raise RuntimeError(f"SendGrid send failed: {response.status_code} - {response.text}")
 
 
 def get_provider(cfg):
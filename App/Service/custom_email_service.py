@@ -1,77 +1,47 @@
 
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
 import json
 import logging
 import os
 from fastapi import HTTPException
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+from jinja2 import Environment
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional
 from os import path as _p
 from Service.custom_email_provider import EmailProvider, SMTPProvider, SendGridProvider
+from Service.email_outbox import enqueue_email
 from Schemas.schemas import TenantEmailSettings
+from Utils.email_templates import APP_TEMPLATES_DIR, email_templates
 
 # ---------- Template Renderer ----------
 logger = logging.getLogger(__name__)
 
 
 class TemplateRenderer:
+    """
+    Renders tenant email templates from the shared registry: tenant dir →
+    global dir → App/templates, compiled once per process rather than per
+    EmailService (see Utils/email_templates.py).
+    """
+
     def __init__(
         self,
         tenant_templates_dir: str,
         global_templates_dir: str = "templates/emails"
     ):
-        loaders = []
-        if os.path.isdir(tenant_templates_dir):
-            loaders.append(FileSystemLoader(tenant_templates_dir))
-        if os.path.isdir(global_templates_dir):
-            loaders.append(FileSystemLoader(global_templates_dir))
-        if not loaders:
-            loaders.append(FileSystemLoader("."))  # fallback
-
-        # ✅ FIX: Pass the list of directories, not FileSystemLoader objects
-        self.env = Environment(
-            loader=FileSystemLoader([ld.searchpath[0] for ld in loaders if hasattr(ld, 'searchpath')]),
-            autoescape=select_autoescape(['html', 'xml'])
-        )
+        self.search_path = (tenant_templates_dir, global_templates_dir, APP_TEMPLATES_DIR)
 
-        # 🔁 Search paths: tenant → global → codebase fallback
-        # self.template_paths = [
-        #     tenant_templates_dir,
-        #     global_templates_dir,
-        #     os.path.abspath("app/templates")  # ✅ fallback to project root templates
-        # ]
-
-        # self.env = Environment(
-        #     loader=FileSystemLoader(self.template_paths),
-        #     autoescape=select_autoescape(['html', 'xml'])
-        # )
+    @property
+    def env(self) -> Environment:
+        return email_templates.environment(*self.search_path)
 
     def render(self, template_name: str, context: dict) -> str:
         if not template_name:
             # No template requested → inline
             return self._inline(context)
         try:
-            tmpl = self.env.get_template(template_name)
-            return tmpl.render(**context)
-        except (TemplateNotFound, Exception) as e:
-            # ✅ Dynamically determine the full fallback path
-            base_dir = os.path.dirname(os.path.abspath(__file__))  # resolves to /App/Service
-            fallback_path = os.path.join(base_dir, "..", "templates", template_name)
-            fallback_path = os.path.normpath(fallback_path)  # normalize to eliminate .., etc.
-
-            try:
-                if os.path.exists(fallback_path):
-                    with open(fallback_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    return Environment(autoescape=select_autoescape(['html', 'xml'])).from_string(content).render(**context)
-            except Exception as fallback_error:
-                logger.error(f"Failed to load template '{template_name}' from fallback path: {fallback_error}")
-
+            return email_templates.render(template_name, context, *self.search_path)
+        except Exception as e:
             logger.warning(f"Template '{template_name}' not found or failed to load; rendering inline. Error: {e}")
             return self._inline(context)
 
@@ -194,55 +164,20 @@ class EmailService:
         context: dict,
         attachments: List[str] = None
     ) -> None:
-        # Validate connectivity
-        self.test_connection()
-        print("\n\n\n\nFrom: ", self.settings.default_from)
-        # Build MIME message
-        msg = MIMEMultipart()
-        msg['From'] = self.settings.default_from
-        msg['To'] = ','.join(to)
-        msg['Subject'] = subject
-
         # Inject logo URL if available
         if self.settings.logo_path:
             context['logo_url'] = self.settings.logo_path
 
         body_html = self.renderer.render(template_name or "", context)
-        # if not body_html:
-        #     raise HTTPException(
-        #         status_code=500,
-        #         detail=f"Failed to render email template '{template_name}'."
-        #     )
-        msg.attach(MIMEText(body_html, 'html'))
 
-        # Attach extra files
-        for path in attachments or []:
-            try:
-                if not os.path.exists(path):
-                    logger.error(f"Attachment not found: {path}")
-                    continue
-                filename = os.path.basename(path)
-                with open(path, 'rb') as f:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(f.read())
-                encoders.encode_base64(part)
-                part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
-                msg.attach(part)
-            except Exception as e:
-                logger.exception(f"Failed to attach file: {path}. Reason: {str(e)}")
-            #     part = MIMEBase('application', 'octet-stream')
-            #     with open(path, 'rb') as f:
-            #         part.set_payload(f.read())
-            #     encoders.encode_base64(part)
-            #     # part.add_header('Content-Disposition', f'attachment; filename="{path.split('/')[-1]}"')
-            #     filename = _p.basename(path)
-            #     part.add_header(
-            #         'Content-Disposition',
-            #         f"attachment; filename=\"{filename}\""
-            #     )
-            #     msg.attach(part)
-            # except Exception as e:
-            #     logger.error(f"Failed to attach {path}: {e}")
-
-        # Dispatch
-        self.provider.send_message(msg)
\ No newline at end of file
+        # Queued; the outbox worker sends it through this tenant's provider
+        # (attachments are read at send time).
+        enqueue_email(
+            to,
+            subject,
+            body_html,
+            organization_id=self.tenant_id,
+            transport="tenant",
+            sender=self.settings.default_from,
+            attachments=attachments,
+        )
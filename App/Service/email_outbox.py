@@ -0,0 +1,385 @@
+# Service/email_outbox.py
+"""
+Durable outgoing-email queue.
+
+Request handlers call enqueue_email(), which only INSERTs an EmailOutbox
+row, so their latency no longer depends on the mail server. OutboxWorker
+claims due rows in batches (SELECT ... FOR UPDATE SKIP LOCKED, so several
+processes can drain one table), sends them over the pooled transports of
+Service.custom_email_provider with at most EMAIL_OUTBOX_TENANT_CONCURRENCY
+sends per organization, and records the outcome. Failures are retried with
+exponential backoff; after EMAIL_OUTBOX_MAX_ATTEMPTS, or on a permanent
+rejection, a row is dead-lettered (status "dead") until requeue_dead().
+Bodies can carry temporary passwords, so a sent row keeps only its
+envelope, and the worker runs purge_outbox() every
+EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS to delete sent and dead rows older
+than EMAIL_OUTBOX_RETENTION_DAYS.
+
+Run the worker in the API process (start_outbox_worker, on startup) or on
+its own with `python -m Service.email_outbox`.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from database.db_session import SessionLocal
+from Models.email_outbox import EmailOutbox
+from Service.custom_email_provider import EmailProvider, SMTPProvider
+from Utils.config import config
+from Utils.smtp_pool import is_permanent_error
+
+logger = logging.getLogger(__name__)
+
+_table = EmailOutbox.__table__
+
+# How long a tenant's resolved transport is reused before its settings are re-read.
+_TENANT_TRANSPORT_TTL = 60.0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# --------------------------------------------------------------------
+# Enqueue (request side)
+# --------------------------------------------------------------------
+
+def enqueue_email(recipients: Union[str, Iterable[str]], subject: str, body: str, subtype: str = "html",
+                  organization_id=None, transport: str = "default", sender: Optional[str] = None,
+                  attachments: Optional[List[str]] = None, db: Optional[Session] = None) -> uuid.UUID:
+    """
+    Queue one email and return its outbox id.
+
+    With `db` the row joins the caller's transaction (flushed, committed by
+    the caller); otherwise it is committed on a short session of its own.
+    transport "tenant" sends through the organization's email settings.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    row = EmailOutbox(
+        id=uuid.uuid4(),
+        organization_id=uuid.UUID(str(organization_id)) if organization_id else None,
+        transport=transport,
+        sender=sender,
+        recipients=[str(r) for r in recipients],
+        subject=subject,
+        body=body or "",
+        subtype=subtype,
+        attachments=list(attachments) if attachments else None,
+        status="pending",
+        attempts=0,
+        next_attempt_at=_now(),
+    )
+    outbox_id = row.id
+    if db is not None:
+        db.add(row)
+        db.flush()
+    else:
+        with SessionLocal() as own:
+            own.add(row)
+            own.commit()
+    if _worker is not None:
+        _worker.wake()
+    return outbox_id
+
+
+def requeue_dead(db: Session, organization_id=None, ids: Optional[Iterable] = None) -> int:
+    """Move dead-lettered rows back to pending with a fresh attempt budget."""
+    stmt = update(_table).where(_table.c.status == "dead")
+    if organization_id is not None:
+        stmt = stmt.where(_table.c.organization_id == organization_id)
+    if ids is not None:
+        stmt = stmt.where(_table.c.id.in_(list(ids)))
+    count = db.execute(stmt.values(status="pending", attempts=0, next_attempt_at=_now(), locked_at=None)).rowcount
+    db.commit()
+    if count and _worker is not None:
+        _worker.wake()
+    return count
+
+
+def purge_outbox(db: Session, older_than: Optional[timedelta] = None) -> int:
+    """Delete sent and dead rows last touched more than `older_than` (default: the retention) ago."""
+    cutoff = _now() - (older_than or timedelta(days=config.EMAIL_OUTBOX_RETENTION_DAYS))
+    count = db.execute(
+        delete(_table).where(
+            _table.c.status.in_(("sent", "dead")),
+            func.coalesce(_table.c.sent_at, _table.c.updated_at, _table.c.created_at) < cutoff,
+        )
+    ).rowcount
+    db.commit()
+    return count
+
+
+# --------------------------------------------------------------------
+# Claim and delivery (worker side)
+# --------------------------------------------------------------------
+
+def claim_batch(limit: int, per_tenant: int) -> list:
+    """
+    Mark up to `limit` due rows as sending and return them, taking at most
+    `per_tenant` rows of any organization. Rows another worker has locked
+    are skipped; rows whose lease has expired are claimed again.
+    """
+    now = _now()
+    due = or_(
+        and_(_table.c.status == "pending", _table.c.next_attempt_at <= now),
+        and_(_table.c.status == "sending",
+             _table.c.locked_at < now - timedelta(seconds=config.EMAIL_OUTBOX_LEASE_SECONDS)),
+    )
+    ranked = select(
+        _table.c.id,
+        func.row_number().over(partition_by=_table.c.organization_id,
+                               order_by=_table.c.next_attempt_at).label("rank"),
+    ).where(due).subquery()
+    candidates = (
+        select(_table.c.id)
+        .where(_table.c.id.in_(select(ranked.c.id).where(ranked.c.rank <= per_tenant)), due)
+        .order_by(_table.c.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    with SessionLocal() as db:
+        rows = db.execute(
+            update(_table)
+            .where(_table.c.id.in_(candidates))
+            .values(status="sending", locked_at=now, attempts=_table.c.attempts + 1)
+            .returning(*_table.c)
+        ).all()
+        db.commit()
+    return rows
+
+
+def _finish(row, **values) -> None:
+    # Only while this worker still holds the claim (the lease may have been taken over).
+    with SessionLocal() as db:
+        db.execute(
+            update(_table)
+            .where(_table.c.id == row.id, _table.c.status == "sending", _table.c.locked_at == row.locked_at)
+            .values(**values)
+        )
+        db.commit()
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(config.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+                config.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)  # spread retries of a failed batch
+
+
+_tenant_transports: Dict[str, Tuple[float, EmailProvider, str]] = {}
+_tenant_lock = threading.Lock()
+
+
+def _transport(row) -> Tuple[EmailProvider, str]:
+    """(provider, default From) for the row's transport."""
+    if row.transport != "tenant" or row.organization_id is None:
+        username = config.MAIL_USERNAME if config.USE_CREDENTIALS else ""
+        provider = SMTPProvider(config.MAIL_SERVER, config.MAIL_PORT, username,
+                                config.MAIL_PASSWORD, config.MAIL_STARTTLS)
+        return provider, config.MAIL_FROM
+
+    key = str(row.organization_id)
+    with _tenant_lock:
+        cached = _tenant_transports.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1], cached[2]
+
+    from Service.custom_email_service import EmailService as TenantEmailService
+    from Service.custom_email_settings import DEFAULT_EMAIL_SETTINGS
+
+    with SessionLocal() as db:
+        service = TenantEmailService(tenant_id=key, db=db, default_settings=DEFAULT_EMAIL_SETTINGS)
+    with _tenant_lock:
+        _tenant_transports[key] = (time.monotonic() + _TENANT_TRANSPORT_TTL,
+                                   service.provider, service.settings.default_from)
+    return service.provider, service.settings.default_from
+
+
+def _build_message(row, default_from: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = row.sender or default_from
+    msg["To"] = ", ".join(row.recipients)
+    msg["Subject"] = row.subject
+    msg.attach(MIMEText(row.body, "plain" if row.subtype == "plain" else "html", "utf-8"))
+    for path in row.attachments or []:
+        if not os.path.exists(path):
+            logger.error("Outbox %s: attachment not found: %s", row.id, path)
+            continue
+        part = MIMEBase("application", "octet-stream")
+        with open(path, "rb") as f:
+            part.set_payload(f.read())
+        encoders.encode_base64(part)
+        part.add_header("Content-Disposition", f'attachment; filename="{os.path.basename(path)}"')
+        msg.attach(part)
+    return msg
+
+
+def deliver(row) -> bool:
+    """Send one claimed row and record sent / retry / dead; True once sent."""
+    try:
+        provider, default_from = _transport(row)
+        provider.send_message(_build_message(row, default_from))
+    except Exception as e:
+        permanent = is_permanent_error(e) or isinstance(e, ValueError)
+        if permanent or row.attempts >= config.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            logger.error("Outbox %s dead-lettered after %d attempt(s): %s", row.id, row.attempts, e)
+            _finish(row, status="dead", locked_at=None, last_error=str(e))
+        else:
+            retry_at = _now() + timedelta(seconds=_backoff(row.attempts))
+            logger.warning("Outbox %s attempt %d failed, retrying at %s: %s",
+                           row.id, row.attempts, retry_at.isoformat(), e)
+            _finish(row, status="pending", locked_at=None, next_attempt_at=retry_at, last_error=str(e))
+        return False
+    # The body is no longer needed and may hold credentials.
+    _finish(row, status="sent", locked_at=None, sent_at=_now(), last_error=None, body="")
+    return True
+
+
+class OutboxWorker:
+    """
+    Drains the outbox on a pool of `workers` sender threads. A claimed row
+    of an organization that already has `tenant_concurrency` sends in
+    flight waits in a per-organization queue until one of them finishes.
+    """
+
+    def __init__(self, workers: int, tenant_concurrency: int, batch_size: int, poll_seconds: float):
+        self.tenant_concurrency = max(tenant_concurrency, 1)
+        self.batch_size = max(batch_size, 1)
+        self.poll_seconds = poll_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="email-outbox")
+        self._lock = threading.Lock()
+        self._active: Dict[Any, int] = {}
+        self._waiting: Dict[Any, Deque] = {}
+        self._claimed = 0  # claimed rows not yet finished
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._next_purge = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="email-outbox-claim", daemon=True)
+        self.stats = {"claimed": 0, "sent": 0, "failed": 0}
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop claiming; rows still in flight are reclaimed after their lease."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _purge(self) -> None:
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + config.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS
+        try:
+            with SessionLocal() as db:
+                purged = purge_outbox(db)
+            if purged:
+                logger.info("Email outbox: purged %d sent/dead row(s)", purged)
+        except Exception as e:
+            logger.error("Email outbox purge failed: %s", e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._purge()
+            with self._lock:
+                capacity = self.batch_size - self._claimed
+            rows = []
+            if capacity > 0:
+                try:
+                    rows = claim_batch(capacity, self.tenant_concurrency)
+                except Exception as e:
+                    logger.error("Email outbox claim failed: %s", e)
+                for row in rows:
+                    self._dispatch(row)
+            if len(rows) < capacity or capacity <= 0:
+                # Drained (or saturated): sleep until a poll, an enqueue or free capacity.
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _dispatch(self, row) -> None:
+        key = row.organization_id
+        with self._lock:
+            self._claimed += 1
+            self.stats["claimed"] += 1
+            if self._active.get(key, 0) >= self.tenant_concurrency:
+                self._waiting.setdefault(key, deque()).append(row)
+                return
+            self._active[key] = self._active.get(key, 0) + 1
+        self._executor.submit(self._send, row)
+
+    def _send(self, row) -> None:
+        try:
+            sent = deliver(row)
+        except Exception as e:  # recording the outcome failed; the lease will expire
+            logger.error("Email outbox %s: %s", row.id, e)
+            sent = False
+        key = row.organization_id
+        with self._lock:
+            self._claimed -= 1
+            self.stats["sent" if sent else "failed"] += 1
+            waiting = self._waiting.get(key)
+            following = waiting.popleft() if waiting else None
+            if waiting is not None and not waiting:
+                del self._waiting[key]
+            if following is None:
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+            low = self._claimed <= self.batch_size // 2
+        if following is not None and not self._stop.is_set():
+            self._executor.submit(self._send, following)
+        if low:
+            self._wake.set()
+
+
+_worker: Optional[OutboxWorker] = None
+
+
+def start_outbox_worker() -> Optional[OutboxWorker]:
+    """Start this process's outbox worker (unless EMAIL_OUTBOX_WORKER_ENABLED is off)."""
+    global _worker
+    if _worker is None and config.EMAIL_OUTBOX_WORKER_ENABLED:
+        _worker = OutboxWorker(
+            workers=config.EMAIL_OUTBOX_WORKERS,
+            tenant_concurrency=config.EMAIL_OUTBOX_TENANT_CONCURRENCY,
+            batch_size=config.EMAIL_OUTBOX_BATCH_SIZE,
+            poll_seconds=config.EMAIL_OUTBOX_POLL_SECONDS,
+        )
+        _worker.start()
+    return _worker
+
+
+def stop_outbox_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    config.EMAIL_OUTBOX_WORKER_ENABLED = True
+    worker = start_outbox_worker()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        stop_outbox_worker()
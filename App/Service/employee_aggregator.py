@@ -1,5 +1,5 @@
 # src/services/employee_aggregator.py
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from Models.models import (
     Employee,
     AcademicQualification,
@@ -14,58 +14,94 @@ from Models.models import (
     EmployeePaymentDetail,
 )
 from Models.dynamic_models import EmployeeDynamicData
-from Models.Tenants.organization import Organization, Rank
-from Models.Tenants.role import Role
 from Models.models import User
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from Service.employee_record_cache import employee_record_cache
+
+# Uncached employees assembled per round of IN-list queries
+RECORD_BATCH_SIZE = 200
 
 def get_employee_full_record(db: Session, employee_id: str) -> Dict[str, Any]:
     """
     Load all related data for the given employee_id and
     return a nested dict keyed by the categories you specified.
+    Served from the employee record cache when the employee and its
+    organization lookups are unchanged since it was last built.
+    """
+    return employee_record_cache.get_or_build(
+        employee_id, lambda: _build_employee_full_record(db, employee_id)
+    )
+
+def get_employee_full_records(db: Session, employee_ids: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Full records for many employees, yielded as (employee_id, record) in the
+    order given ({} for unknown ids). Uncached employees are assembled
+    RECORD_BATCH_SIZE at a time: one joined query plus one IN-list query per
+    collection for the whole batch, so the query count does not grow with N.
     """
-    # Eager-load relationships to minimize SQL round-trips:
-    emp = (
-        db.query(Employee)
-        .filter(Employee.id == employee_id)
-        .options(
-            joinedload(Employee.academic_qualifications),
-            joinedload(Employee.professional_qualifications),
-            joinedload(Employee.employment_history),
-            joinedload(Employee.emergency_contacts),
-            joinedload(Employee.next_of_kins),
-            joinedload(Employee.promotion_requests),
-            joinedload(Employee.salary_payments),
-            joinedload(Employee.payment_details),
-            joinedload(Employee.employee_type),
-            joinedload(Employee.rank),
-            joinedload(Employee.department).joinedload(Department.branch),
-            #joinedload(Employee.organization).joinedload(Role.users),  # for Role via user->role
-            joinedload(Employee.dynamic_data),
+    employee_ids = [str(e) for e in employee_ids]
+    for start in range(0, len(employee_ids), RECORD_BATCH_SIZE):
+        yield from employee_record_cache.get_or_build_many(
+            employee_ids[start:start + RECORD_BATCH_SIZE],
+            lambda missing: _build_employee_full_records(db, missing),
         )
-        .first()
+
+# Many-to-one lookups are joined (one row per employee, no fan-out); every
+# collection gets its own SELECT ... WHERE employee_id IN (...), so a heavy
+# employee costs rows proportional to its data instead of their product.
+# Built per call: payment_details/dynamic_data are backrefs that only exist
+# once the mappers are configured.
+def employee_record_options():
+    return (
+        joinedload(Employee.organization),
+        joinedload(Employee.rank),
+        joinedload(Employee.employee_type),
+        joinedload(Employee.department).joinedload(Department.branch),
+        selectinload(Employee.academic_qualifications),
+        selectinload(Employee.professional_qualifications),
+        selectinload(Employee.employment_history),
+        selectinload(Employee.emergency_contacts),
+        selectinload(Employee.next_of_kins),
+        selectinload(Employee.promotion_requests),
+        selectinload(Employee.salary_payments),
+        selectinload(Employee.payment_details),
+        selectinload(Employee.dynamic_data),
     )
-    if not emp:
-        return {}
-    
-     # fetch the corresponding User by email
-    user = db.query(User).filter(User.email == emp.email).options(
-        joinedload(User.role)
-    ).first()
 
-    org_type = None
-    #fetch organization details
-    if emp.organization:
-        emp.organization = db.query(Organization).filter(Organization.id == emp.organization_id).first()
-        #check type of organization whether it is Private or Public or Government or NGO
-        if emp.organization.type == "Private":
-            org_type = "Private"
-        elif emp.organization.type == "Public":
-            org_type = "Public"
-        elif emp.organization.type == "Government":
-            org_type = "Government"
-        elif emp.organization.type == "NGO":
-            org_type = "NGO"
+
+def _employee_with_user_query(db: Session):
+    """
+    Employee plus its login User (matched by email) and that user's Role,
+    all in the same first round-trip as the many-to-one lookups.
+    """
+    return (
+        db.query(Employee, User)
+        .outerjoin(User, User.email == Employee.email)
+        .options(joinedload(User.role), *employee_record_options())
+    )
+
+
+def _build_employee_full_record(db: Session, employee_id: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Assemble the record from the database; returns (record, organization_id)."""
+    row = _employee_with_user_query(db).filter(Employee.id == employee_id).first()
+    if not row:
+        return {}, None
+    emp, user = row
+    return _serialize_employee(emp, user), str(emp.organization_id)
+
+
+def _build_employee_full_records(db: Session, employee_ids: List[str]) -> Dict[str, Tuple[Dict[str, Any], Optional[str]]]:
+    """Assemble many records at once; returns {employee_id: (record, organization_id)}."""
+    rows = _employee_with_user_query(db).filter(Employee.id.in_(employee_ids)).all()
+    return {
+        str(emp.id): (_serialize_employee(emp, user), str(emp.organization_id))
+        for emp, user in rows
+    }
+
+
+def _serialize_employee(emp: Employee, user: Optional[User]) -> Dict[str, Any]:
+    # Salary payments are only exposed for private organizations
+    org_type = emp.organization.type if emp.organization else None
 
     # Build structure
     out = {
@@ -208,4 +244,4 @@ def get_employee_full_record(db: Session, employee_id: str) -> Dict[str, Any]:
         },
     }
 
-    return out
\ No newline at end of file
+    return out
@@ -0,0 +1,198 @@
+# src/services/employee_record_cache.py
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Utils.config import config
+from Utils.serialize_4_json import dumps_json
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeRecordCache:
+    """
+    Read-through cache for assembled employee records (get_employee_full_record).
+
+    Entries are keyed by (employee_id, employee version, organization version).
+    The ORM listeners bump the employee version when any of the employee's own
+    rows change, and the organization version when shared lookups change
+    (departments, ranks, roles, users, ...). A bump makes older keys
+    unreachable, so a record built concurrently with a change can never be
+    served after it.
+
+    Tiers: an in-process LRU, plus an optional Redis tier that also holds the
+    version counters. Run with Redis when there is more than one worker;
+    otherwise each worker only sees its own invalidations.
+
+    Records are stored JSON-normalized (UUIDs/dates as strings); treat them as
+    read-only.
+    """
+
+    def __init__(self, maxsize: int = 2048, redis_url: Optional[str] = None, ttl: int = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._employee_versions: Dict[str, int] = {}
+        self._org_versions: Dict[str, int] = {}
+        # employee_id → organization_id, learned on first build
+        self._employee_orgs: Dict[str, str] = {}
+        self._redis = None
+        if redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(redis_url)
+        self.stats = {"hits": 0, "redis_hits": 0, "misses": 0}
+
+    # ---------------- versions ----------------
+
+    def _versions(self, employee_id: str, org_id: str) -> Optional[Tuple[int, int]]:
+        if self._redis is None:
+            return self._employee_versions.get(employee_id, 0), self._org_versions.get(org_id, 0)
+        try:
+            emp_ver, org_ver = self._redis.mget(f"emp_rec:ver:{employee_id}", f"emp_rec:orgver:{org_id}")
+            return int(emp_ver or 0), int(org_ver or 0)
+        except Exception as e:
+            logger.warning("Employee record cache: redis unavailable (%s); bypassing cache", e)
+            return None
+
+    def invalidate_employees(self, employee_ids: Iterable[str]) -> None:
+        employee_ids = [str(e) for e in employee_ids]
+        if not employee_ids:
+            return
+        with self._lock:
+            for employee_id in employee_ids:
+                self._employee_versions[employee_id] = self._employee_versions.get(employee_id, 0) + 1
+        self._incr_remote("emp_rec:ver:", employee_ids)
+
+    def invalidate_organizations(self, org_ids: Iterable[str]) -> None:
+        org_ids = [str(o) for o in org_ids]
+        if not org_ids:
+            return
+        with self._lock:
+            for org_id in org_ids:
+                self._org_versions[org_id] = self._org_versions.get(org_id, 0) + 1
+        self._incr_remote("emp_rec:orgver:", org_ids)
+
+    def _incr_remote(self, prefix: str, ids) -> None:
+        if self._redis is None:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key in ids:
+                pipe.incr(f"{prefix}{key}")
+            pipe.execute()
+        except Exception as e:
+            logger.error("Employee record cache: failed to bump %s versions in redis: %s", prefix, e)
+
+    # ---------------- reads ----------------
+
+    def get_or_build(self, employee_id, build: Callable[[], Tuple[Dict[str, Any], Optional[str]]]) -> Dict[str, Any]:
+        """
+        Return the cached record for employee_id, or call `build()` (which
+        returns (record, organization_id)) and cache the result.
+        """
+        employee_id = str(employee_id)
+        org_id, key, record = self._lookup(employee_id)
+        if record is not None:
+            return record
+        self.stats["misses"] += 1
+        record, built_org_id = build()
+        return self._store(employee_id, org_id, key, record, built_org_id)
+
+    def get_or_build_many(
+        self,
+        employee_ids: Iterable,
+        build_many: Callable[[List[str]], Dict[str, Tuple[Dict[str, Any], Optional[str]]]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Batch form of get_or_build: `build_many(missing_ids)` is called once
+        with every id that missed and returns {employee_id: (record,
+        organization_id)}. Yields (employee_id, record) in the order given;
+        ids build_many does not return yield {}.
+        """
+        employee_ids = [str(e) for e in employee_ids]
+        looked_up = {employee_id: self._lookup(employee_id) for employee_id in employee_ids}
+        missing = [employee_id for employee_id, (_, _, record) in looked_up.items() if record is None]
+        built = {}
+        if missing:
+            self.stats["misses"] += len(missing)
+            built = build_many(missing)
+        for employee_id in employee_ids:
+            org_id, key, record = looked_up[employee_id]
+            if record is None:
+                record, built_org_id = built.get(employee_id, ({}, None))
+                record = self._store(employee_id, org_id, key, record, built_org_id)
+            yield employee_id, record
+
+    def _lookup(self, employee_id: str) -> Tuple[Optional[str], Optional[Tuple[str, int, int]], Optional[Dict[str, Any]]]:
+        """(organization_id, key, cached record or None) for employee_id."""
+        org_id = self._employee_orgs.get(employee_id)
+        # Versions are read *before* building, so a change committed mid-build
+        # bumps past this key instead of being masked by it.
+        versions = self._versions(employee_id, org_id) if org_id else None
+        key = (employee_id, *versions) if versions else None
+        if key is None:
+            return org_id, None, None
+
+        with self._lock:
+            record = self._lru.get(key)
+            if record is not None:
+                self._lru.move_to_end(key)
+                self.stats["hits"] += 1
+                return org_id, key, record
+        record = self._redis_get(key)
+        if record is not None:
+            self.stats["redis_hits"] += 1
+            self._put_local(key, record)
+        return org_id, key, record
+
+    def _store(self, employee_id: str, org_id, key, record, built_org_id) -> Dict[str, Any]:
+        if not record:
+            return record
+        record = json.loads(dumps_json(record))
+        if built_org_id:
+            # First sight of this employee only learns its org; caching starts
+            # with the next read, once versions were read up front.
+            self._employee_orgs[employee_id] = str(built_org_id)
+        if key is not None and str(built_org_id) == org_id:
+            self._put_local(key, record)
+            self._redis_set(key, record)
+        return record
+
+    def _put_local(self, key, record) -> None:
+        with self._lock:
+            self._lru[key] = record
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    @staticmethod
+    def _redis_key(key) -> str:
+        return "emp_rec:data:{}:{}:{}".format(*key)
+
+    def _redis_get(self, key) -> Optional[Dict[str, Any]]:
+        if self._redis is None:
+            return None
+        try:
+            raw = self._redis.get(self._redis_key(key))
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning("Employee record cache: redis read failed: %s", e)
+            return None
+
+    def _redis_set(self, key, record) -> None:
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(self._redis_key(key), dumps_json(record), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Employee record cache: redis write failed: %s", e)
+
+
+employee_record_cache = EmployeeRecordCache(
+    maxsize=config.EMPLOYEE_RECORD_CACHE_SIZE,
+    redis_url=config.REDIS_URL if config.EMPLOYEE_RECORD_CACHE_REDIS else None,
+    ttl=config.EMPLOYEE_RECORD_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,142 @@
+# Service/lookup_resolver.py
+"""
+Import-scoped name → id resolution for the lookup tables a bulk import
+links employees to (Branch, Department, Rank, EmployeeType, Role).
+
+process_related_field used to run one SELECT per row and field, plus an
+INSERT and COMMIT for every new name. LookupResolver loads each (table,
+column) map of the organization once, serves rows from memory and creates
+all missing names of a call in one INSERT ... ON CONFLICT DO NOTHING
+RETURNING. Names another import created concurrently are re-read instead.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+_INFO_KEY = "lookup_resolver"
+
+Defaults = Union[dict, Callable[[str], dict], None]
+
+
+class LookupResolver:
+    """
+    Case-insensitive {name: id} maps for one organization.
+
+    Matching follows process_related_field (`ilike(value)` on the stripped
+    value). Created rows are committed before their ids are handed out, so
+    a later row's rollback never leaves the maps pointing at missing rows.
+    Core inserts skip the mapper listeners; the summary counters and the
+    summary refresh are applied here instead.
+    """
+
+    def __init__(self, db: Session, organization_id):
+        self.db = db
+        self.organization_id = organization_id
+        self._maps: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+        self.stats = {"loads": 0, "inserts": 0, "created": 0}
+
+    # ---------------- import scope ----------------
+
+    @classmethod
+    def for_session(cls, db: Session, organization_id) -> "LookupResolver":
+        """The resolver of the import running on `db`, created on first use."""
+        resolvers = db.info.setdefault(_INFO_KEY, {})
+        resolver = resolvers.get(str(organization_id))
+        if resolver is None:
+            resolver = resolvers[str(organization_id)] = cls(db, organization_id)
+        return resolver
+
+    @staticmethod
+    def release(db: Session) -> None:
+        """End the import scope on `db`; the next import reloads the maps."""
+        db.info.pop(_INFO_KEY, None)
+
+    # ---------------- lookups ----------------
+
+    @staticmethod
+    def _key(value) -> str:
+        return str(value).strip().lower()
+
+    def _map(self, ModelClass, lookup_field: str) -> Dict[str, Any]:
+        ids = self._maps.get((ModelClass, lookup_field))
+        if ids is None:
+            column = getattr(ModelClass, lookup_field)
+            ids = {}
+            for obj_id, name in self.db.query(ModelClass.id, column).filter(
+                ModelClass.organization_id == self.organization_id
+            ):
+                if name is not None:
+                    ids.setdefault(str(name).lower(), obj_id)
+            self._maps[(ModelClass, lookup_field)] = ids
+            self.stats["loads"] += 1
+        return ids
+
+    def resolve(self, value, ModelClass, lookup_field: str, defaults: Defaults = None) -> Optional[Any]:
+        """Id of the row named `value`, creating it if needed; None for a blank value."""
+        if value is None or not str(value).strip():
+            return None
+        return self.resolve_many([value], ModelClass, lookup_field, defaults).get(self._key(value))
+
+    def resolve_many(self, values: Iterable, ModelClass, lookup_field: str,
+                     defaults: Defaults = None) -> Dict[str, Any]:
+        """
+        {lowercased name: id} covering every non-blank value of `values`,
+        with the missing names created in one statement. `defaults` is a dict
+        or a callable(lowercased name) returning one.
+        """
+        ids = self._map(ModelClass, lookup_field)
+        missing: Dict[str, str] = {}
+        for value in values:
+            if value is None:
+                continue
+            value = str(value).strip()
+            key = value.lower()
+            if key and key not in ids:
+                missing.setdefault(key, value)  # as first written
+        if missing:
+            ids.update(self._create(ModelClass, lookup_field, missing, defaults))
+        return ids
+
+    def _create(self, ModelClass, lookup_field: str, missing: Dict[str, str], defaults: Defaults) -> Dict[str, Any]:
+        from Service.summary_counters import COUNTER_FOR_MODEL, apply_counter_deltas
+        from Apis.change_dispatcher import post_commit_dispatcher
+
+        table = ModelClass.__table__
+        column = table.c[lookup_field]
+        # A multi-row VALUES needs the same keys in every row.
+        groups: Dict[Tuple[str, ...], list] = {}
+        for key, value in missing.items():
+            extra = defaults(key) if callable(defaults) else (defaults or {})
+            row = {lookup_field: value, "organization_id": self.organization_id, **extra}
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        created: Dict[str, Any] = {}
+        try:
+            for rows in groups.values():
+                stmt = pg_insert(table).values(rows).on_conflict_do_nothing().returning(table.c.id, column)
+                created.update((str(name).lower(), obj_id) for obj_id, name in self.db.execute(stmt))
+                self.stats["inserts"] += 1
+
+            counter = COUNTER_FOR_MODEL.get(ModelClass)
+            if counter and created:
+                apply_counter_deltas(self.db.connection(), self.organization_id, {counter: len(created)})
+                post_commit_dispatcher.mark(self.db, "summary", str(self.organization_id))
+
+            found = dict(created)
+            lost = [key for key in missing if key not in found]
+            if lost:
+                # Inserted by a concurrent import (or a unique constraint hit).
+                lookup = getattr(ModelClass, lookup_field)
+                for obj_id, name in self.db.query(ModelClass.id, lookup).filter(
+                    ModelClass.organization_id == self.organization_id,
+                    func.lower(lookup).in_(lost),
+                ):
+                    found.setdefault(str(name).lower(), obj_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.stats["created"] += len(created)
+        return found
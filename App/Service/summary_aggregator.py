@@ -0,0 +1,112 @@
+# src/services/summary_aggregator.py
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from Models.models import Department, User, Employee
+from Models.Tenants.organization import Organization, Branch, Rank, PromotionPolicy, Tenancy, Bill, Payment
+from Models.Tenants.role import Role
+
+
+# Order matters: it is the order the counts are emitted to the dashboard.
+SUMMARY_COUNT_KEYS = (
+    "branches",
+    "departments",
+    "ranks",
+    "roles",
+    "users",
+    "active_users",
+    "inactive_users",
+    "employees",
+    "promotion_policies",
+    "tenancies",
+    "bills",
+    "payments",
+)
+
+
+def _count_by_org(model, org_id: UUID):
+    """Scalar sub-select counting the rows of `model` that belong to org_id."""
+    return (
+        select(func.count())
+        .select_from(model)
+        .where(model.organization_id == org_id)
+        .scalar_subquery()
+    )
+
+
+def build_organization_counts_query(org_id: UUID):
+    """
+    One SELECT that returns the organization's `nature` plus every summary count.
+
+    Each table is counted in its own scalar sub-select and the user split is
+    done with `COUNT(*) FILTER (WHERE is_active)` in a single pass over users,
+    so Postgres plans it as one statement / one round-trip instead of twelve.
+    """
+    user_counts = (
+        select(
+            func.count().label("users"),
+            func.count().filter(User.is_active.is_(True)).label("active_users"),
+            func.count().filter(User.is_active.is_(False)).label("inactive_users"),
+        )
+        .where(User.organization_id == org_id)
+        .subquery("user_counts")
+    )
+
+    # bills/payments join through tenancy → bill → payment
+    bill_ct = (
+        select(func.count())
+        .select_from(Bill)
+        .join(Tenancy, Bill.tenancy_id == Tenancy.id)
+        .where(Tenancy.organization_id == org_id)
+        .scalar_subquery()
+    )
+    payment_ct = (
+        select(func.count())
+        .select_from(Payment)
+        .join(Bill, Payment.bill_id == Bill.id)
+        .join(Tenancy, Bill.tenancy_id == Tenancy.id)
+        .where(Tenancy.organization_id == org_id)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            Organization.nature,
+            _count_by_org(Branch, org_id).label("branches"),
+            _count_by_org(Department, org_id).label("departments"),
+            _count_by_org(Rank, org_id).label("ranks"),
+            _count_by_org(Role, org_id).label("roles"),
+            user_counts.c.users,
+            user_counts.c.active_users,
+            user_counts.c.inactive_users,
+            _count_by_org(Employee, org_id).label("employees"),
+            _count_by_org(PromotionPolicy, org_id).label("promotion_policies"),
+            _count_by_org(Tenancy, org_id).label("tenancies"),
+            bill_ct.label("bills"),
+            payment_ct.label("payments"),
+        )
+        .select_from(Organization)
+        .join(user_counts, true())
+        .where(Organization.id == org_id)
+    )
+
+
+def get_organization_counts(db: Session, org_id: UUID, by_nature: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Compute all summary counts for org_id in a single round-trip.
+
+    Returns None when the organization does not exist. With `by_nature` the
+    branch count is dropped for organizations that are not "branch managed",
+    matching what the dashboard sockets expect.
+    """
+    row = db.execute(build_organization_counts_query(org_id)).mappings().first()
+    if row is None:
+        return None
+
+    counts = {key: row[key] for key in SUMMARY_COUNT_KEYS}
+    if by_nature and (row["nature"] or "").strip().lower() != "branch managed":
+        counts.pop("branches")
+    return counts
@@ -0,0 +1,235 @@
+# src/services/summary_counters.py
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from database.db_session import SessionLocal
+from Models.models import Department, User, Employee
+from Models.organization_counter import OrganizationCounter
+from Models.Tenants.organization import Organization, Branch, Rank, PromotionPolicy, Tenancy, Bill, Payment
+from Models.Tenants.role import Role
+from Service.summary_aggregator import SUMMARY_COUNT_KEYS, get_organization_counts
+
+logger = logging.getLogger(__name__)
+
+# Which counter column each model feeds. User additionally feeds the
+# active/inactive split (see _user_deltas).
+COUNTER_FOR_MODEL = {
+    Branch: "branches",
+    Department: "departments",
+    Rank: "ranks",
+    Role: "roles",
+    User: "users",
+    Employee: "employees",
+    PromotionPolicy: "promotion_policies",
+    Tenancy: "tenancies",
+    Bill: "bills",
+    Payment: "payments",
+}
+
+
+# --------------------------------------------------------------------
+# Delta maintenance (runs inside the flushing transaction)
+# --------------------------------------------------------------------
+
+def apply_counter_deltas(connection, org_id, deltas: Dict[str, int]) -> None:
+    """
+    Add `deltas` to the organization's counter row on the given connection,
+    so the change commits or rolls back together with the rows it counts.
+
+    Only existing rows are touched: an organization without a counter row is
+    seeded from a full recount on its first read (read_organization_counts).
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if org_id is None or not deltas:
+        return
+    table = OrganizationCounter.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.organization_id == org_id)
+        .values({key: func.greatest(table.c[key] + value, 0) for key, value in deltas.items()})
+    )
+
+
+def resolve_organization_id(connection, target):
+    """
+    Organization a summary-model row belongs to. Bills and payments only
+    reach their organization through the tenancy.
+    """
+    if isinstance(target, Payment):
+        return connection.execute(
+            select(Tenancy.organization_id)
+            .join(Bill, Bill.tenancy_id == Tenancy.id)
+            .where(Bill.id == target.bill_id)
+        ).scalar()
+    if isinstance(target, Bill):
+        return connection.execute(
+            select(Tenancy.organization_id).where(Tenancy.id == target.tenancy_id)
+        ).scalar()
+    return getattr(target, "organization_id", None)
+
+
+def _user_deltas(is_active, sign: int) -> Dict[str, int]:
+    deltas = {"users": sign}
+    if is_active is True:
+        deltas["active_users"] = sign
+    elif is_active is False:
+        deltas["inactive_users"] = sign
+    return deltas
+
+
+def _row_deltas(mapper, target, sign: int) -> Dict[str, int]:
+    if mapper.class_ is User:
+        return _user_deltas(target.is_active, sign)
+    return {COUNTER_FOR_MODEL[mapper.class_]: sign}
+
+
+def _counter_after_insert(mapper, connection, target):
+    apply_counter_deltas(connection, resolve_organization_id(connection, target), _row_deltas(mapper, target, +1))
+
+
+def _counter_after_delete(mapper, connection, target):
+    apply_counter_deltas(connection, resolve_organization_id(connection, target), _row_deltas(mapper, target, -1))
+
+
+def _counter_after_update(mapper, connection, target):
+    """
+    Only two kinds of update move the counters: a row changing organization,
+    and a User.is_active flip.
+    """
+    state = inspect(target)
+    org_hist = state.attrs.organization_id.history if "organization_id" in state.attrs else None
+    if org_hist is not None and org_hist.deleted and org_hist.added:
+        old_org, new_org = org_hist.deleted[0], org_hist.added[0]
+        if old_org != new_org:
+            if mapper.class_ is User:
+                active_hist = state.attrs.is_active.history
+                old_active = active_hist.deleted[0] if active_hist.deleted else target.is_active
+                apply_counter_deltas(connection, old_org, _user_deltas(old_active, -1))
+            else:
+                apply_counter_deltas(connection, old_org, _row_deltas(mapper, target, -1))
+            apply_counter_deltas(connection, new_org, _row_deltas(mapper, target, +1))
+            return
+
+    if mapper.class_ is User:
+        active_hist = state.attrs.is_active.history
+        if active_hist.deleted and active_hist.added and active_hist.deleted[0] != active_hist.added[0]:
+            deltas = _user_deltas(active_hist.added[0], +1)
+            for key, value in _user_deltas(active_hist.deleted[0], -1).items():
+                deltas[key] = deltas.get(key, 0) + value
+            apply_counter_deltas(connection, target.organization_id, deltas)
+
+
+# --------------------------------------------------------------------
+# Reads & reconciliation
+# --------------------------------------------------------------------
+
+def _ensure_counter_row(org_id: UUID) -> bool:
+    """
+    Create org_id's counter row (zeros, never reconciled) and commit it on a
+    session of its own, so delta writers start updating it before it is
+    recounted. Returns False if the organization does not exist.
+    """
+    table = OrganizationCounter.__table__
+    with SessionLocal() as own:
+        if own.execute(select(Organization.id).where(Organization.id == org_id)).first() is None:
+            return False
+        own.execute(pg_insert(table).values(organization_id=org_id)
+                    .on_conflict_do_nothing(index_elements=["organization_id"]))
+        own.commit()
+    return True
+
+
+def reconcile_organization_counters(db: Session, org_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    Recount org_id from the source tables (one query) and overwrite its
+    counter row. Returns the fresh, unfiltered counts, or None if the
+    organization does not exist. The caller owns the commit.
+
+    The counter row is locked (FOR UPDATE) before counting: transactions
+    that already applied a delta to it commit first and are included in the
+    count, later ones wait and add theirs on top, so no delta is lost to
+    the overwrite.
+    """
+    table = OrganizationCounter.__table__
+    lock = select(table.c.organization_id).where(table.c.organization_id == org_id).with_for_update()
+    if db.execute(lock).first() is None:
+        if not _ensure_counter_row(org_id):
+            return None
+        db.execute(lock)
+    counts = get_organization_counts(db, org_id, by_nature=False)
+    if counts is None:
+        return None
+    db.execute(
+        update(table)
+        .where(table.c.organization_id == org_id)
+        .values(**counts, reconciled_at=datetime.now(timezone.utc))
+    )
+    return counts
+
+
+def read_organization_counts(db: Session, org_id: UUID, by_nature: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    O(1) summary read: the organization row joined to its counter row by
+    primary key. Returns None if the organization does not exist.
+
+    The first read for an organization seeds its counter row on a separate
+    session, so the caller's transaction is never committed from here.
+    Until that seed commits, other reads recount the organization as well.
+    """
+    counter = OrganizationCounter.__table__
+    row = db.execute(
+        select(
+            Organization.nature,
+            counter.c.organization_id.label("counter_org_id"),
+            counter.c.reconciled_at,
+            *[counter.c[key] for key in SUMMARY_COUNT_KEYS],
+        )
+        .select_from(Organization)
+        .outerjoin(counter, counter.c.organization_id == Organization.id)
+        .where(Organization.id == org_id)
+    ).mappings().first()
+    if row is None:
+        return None
+
+    # A row that was never reconciled is still being seeded.
+    if row["counter_org_id"] is None or row["reconciled_at"] is None:
+        with SessionLocal() as seed_db:
+            counts = reconcile_organization_counters(seed_db, org_id)
+            seed_db.commit()
+        if counts is None:
+            return None
+    else:
+        counts = {key: row[key] for key in SUMMARY_COUNT_KEYS}
+
+    if by_nature and (row["nature"] or "").strip().lower() != "branch managed":
+        counts.pop("branches")
+    return counts
+
+
+def reconcile_all_organization_counters() -> None:
+    """
+    Periodic job: recount every organization and correct drift left by
+    writes that bypass the ORM (raw SQL, DB-level cascades, core inserts).
+    """
+    try:
+        with SessionLocal() as db:
+            org_ids = [org_id for (org_id,) in db.query(Organization.id).all()]
+            for org_id in org_ids:
+                reconcile_organization_counters(db, org_id)
+                db.commit()
+        logger.info("Reconciled summary counters for %s organizations", len(org_ids))
+    except Exception as e:
+        logger.exception("Error reconciling summary counters: %s", e)
+
+
+def register_counter_listeners(models) -> None:
+    for model in models:
+        event.listen(model, "after_insert", _counter_after_insert)
+        event.listen(model, "after_update", _counter_after_update)
+        event.listen(model, "after_delete", _counter_after_delete)
@@ -361,11 +361,71 @@ class BaseConfig(BaseSettings):
 
     # Bulk Operation Configurations
     BULK_OPERATION_CONCURRENCY_LIMIT: int = Field(10, description="Maximum number of concurrent tasks for bulk operations.")
+    BULK_IMPORT_PIPELINE: bool = Field(True, env="BULK_IMPORT_PIPELINE", description="Import employee sheets column-wise with set-based lookups and multi-row INSERTs; False falls back to the row-by-row ORM path.")
+    BULK_IMPORT_CHUNK_SIZE: int = Field(500, env="BULK_IMPORT_CHUNK_SIZE", description="Employees per INSERT statement and transaction in the pipeline import.")
+    BULK_IMPORT_READ_CHUNK_ROWS: int = Field(5000, env="BULK_IMPORT_READ_CHUNK_ROWS", description="Rows read from an uploaded sheet at a time; bounds the memory an import holds.")
+    BULK_IMPORT_SPOOL_MAX_BYTES: int = Field(8 * 1024 * 1024, env="BULK_IMPORT_SPOOL_MAX_BYTES", description="Upload bytes kept in memory before spooling to a temporary file.")
+    BULK_IMPORT_JOB_EXECUTOR: str = Field("thread", env="BULK_IMPORT_JOB_EXECUTOR", description="Where bulk-import jobs run: 'thread' (in-process pool) or 'celery'.")
+    BULK_IMPORT_JOB_WORKERS: int = Field(2, env="BULK_IMPORT_JOB_WORKERS", description="Concurrent bulk-import jobs per process with the 'thread' executor.")
+    BULK_IMPORT_JOB_DIR: str = Field("uploads/import_jobs", env="BULK_IMPORT_JOB_DIR", description="Directory where uploads are kept until their import job has run (shared with Celery workers).")
+    BULK_IMPORT_JOB_LEASE_SECONDS: float = Field(900.0, env="BULK_IMPORT_JOB_LEASE_SECONDS", description="A running job with no progress for this long is treated as abandoned (its worker died) and claimed again.")
+    BULK_IMPORT_JOB_MAX_ATTEMPTS: int = Field(2, env="BULK_IMPORT_JOB_MAX_ATTEMPTS", description="Claims per job; an abandoned job that has used them all is marked failed.")
+    BULK_IMPORT_PROGRESS_INTERVAL_SECONDS: float = Field(1.0, env="BULK_IMPORT_PROGRESS_INTERVAL_SECONDS", description="How often the job progress socket checks for new progress.")
+
+    # Summary Counters
+    SUMMARY_COUNTER_RECONCILE_MINUTES: int = Field(15, env="SUMMARY_COUNTER_RECONCILE_MINUTES", description="Interval (minutes) between full recounts that correct drift in organization_counters.")
+    SUMMARY_BROADCAST_DEBOUNCE_MS: int = Field(250, env="SUMMARY_BROADCAST_DEBOUNCE_MS", description="Window (ms) in which summary change events for one organization are coalesced into a single broadcast.")
+
+    # Employee record cache
+    EMPLOYEE_RECORD_CACHE_SIZE: int = Field(2048, env="EMPLOYEE_RECORD_CACHE_SIZE", description="In-process LRU size (records) for assembled employee records.")
+    EMPLOYEE_RECORD_CACHE_REDIS: bool = Field(False, env="EMPLOYEE_RECORD_CACHE_REDIS", description="Add a Redis tier (and Redis-held versions) to the employee record cache; needed with several workers.")
+    EMPLOYEE_RECORD_CACHE_TTL_SECONDS: int = Field(3600, env="EMPLOYEE_RECORD_CACHE_TTL_SECONDS", description="TTL of employee records in the Redis tier.")
+
+    # WebSockets
+    WS_SEND_TIMEOUT_SECONDS: float = Field(5.0, env="WS_SEND_TIMEOUT_SECONDS", description="Per-socket send timeout during fan-out; slower sockets are dropped.")
+    WS_BACKPLANE: str = Field("local", env="WS_BACKPLANE", description="Cross-worker broadcast relay: 'local' (single worker), 'redis' or 'memory' (tests).")
+    WS_BACKPLANE_CHANNEL: str = Field("ws:broadcast", env="WS_BACKPLANE_CHANNEL", description="Redis pub/sub channel used by the WebSocket backplane.")
+    REDIS_URL: str = Field("redis://localhost:6379/0", env="REDIS_URL", description="Redis URL (shared with Celery).")
+
+    # Authentication
+    AUTH_ACTIVITY_STORE: str = Field("memory", env="AUTH_ACTIVITY_STORE", description="Where token last-activity is tracked: 'memory' (per worker), 'redis' (shared) or 'db' (legacy UPDATE per request).")
+    AUTH_ACTIVITY_FLUSH_SECONDS: int = Field(30, env="AUTH_ACTIVITY_FLUSH_SECONDS", description="Interval (seconds) between batched writes of token last-activity to the tokens table.")
+    AUTH_USER_CACHE_SIZE: int = Field(10000, env="AUTH_USER_CACHE_SIZE", description="Maximum authenticated users (with role) kept in the auth cache.")
+    AUTH_USER_CACHE_TTL_SECONDS: int = Field(60, env="AUTH_USER_CACHE_TTL_SECONDS", description="TTL of cached users; bounds staleness of role/user changes across workers.")
+    AUTH_TOKEN_CACHE_SIZE: int = Field(10000, env="AUTH_TOKEN_CACHE_SIZE", description="Maximum decoded token payloads cached per Security instance (LRU; entries expire at the token's exp).")
+    AUTH_REVOCATION_BROADCAST: bool = Field(False, env="AUTH_REVOCATION_BROADCAST", description="Relay token revocations (logout, expiry) to every worker over Redis pub/sub.")
+
+    # Password hashing
+    PASSWORD_BCRYPT_ROUNDS: int = Field(12, env="PASSWORD_BCRYPT_ROUNDS", description="bcrypt cost factor for new password hashes.")
+    PASSWORD_HASH_WORKERS: Optional[int] = Field(None, env="PASSWORD_HASH_WORKERS", description="Size of the bcrypt worker pool (defaults to the CPU count).")
+    PASSWORD_HASH_EXECUTOR: str = Field("thread", env="PASSWORD_HASH_EXECUTOR", description="bcrypt worker pool kind: 'thread' or 'process'.")
 
     # Email Retry Logic
     EMAIL_RETRY_ATTEMPTS: int = Field(3, description="Number of retry attempts for sending emails.")
     EMAIL_RETRY_DELAY: float = Field(1.0, description="Delay between email retries (in seconds).")
 
+    # Batched account emails (bulk imports)
+    ACCOUNT_EMAIL_SMTP_CONNECTIONS: int = Field(3, env="ACCOUNT_EMAIL_SMTP_CONNECTIONS", description="Persistent SMTP connections used to send one import's account emails.")
+    ACCOUNT_EMAIL_RATE_PER_SECOND: float = Field(10.0, env="ACCOUNT_EMAIL_RATE_PER_SECOND", description="Upper bound on account emails sent per second per import (0 = unlimited).")
+
+    # Tenant email transports (Service/custom_email_provider.py)
+    TENANT_SMTP_POOL_SIZE: int = Field(2, env="TENANT_SMTP_POOL_SIZE", description="Authenticated SMTP connections kept open per tenant email configuration.")
+    SMTP_HEALTH_CHECK_SECONDS: float = Field(30.0, env="SMTP_HEALTH_CHECK_SECONDS", description="Idle time after which a pooled SMTP connection is probed with NOOP before reuse.")
+    SENDGRID_HTTP_MAX_CONNECTIONS: int = Field(10, env="SENDGRID_HTTP_MAX_CONNECTIONS", description="Keep-alive connections of the shared SendGrid HTTP client.")
+
+    # Email outbox (Service/email_outbox.py)
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = Field(True, env="EMAIL_OUTBOX_WORKER_ENABLED", description="Run the outbox worker in this process; disable on API replicas when a dedicated process drains the outbox.")
+    EMAIL_OUTBOX_WORKERS: int = Field(4, env="EMAIL_OUTBOX_WORKERS", description="Concurrent sends of the outbox worker.")
+    EMAIL_OUTBOX_TENANT_CONCURRENCY: int = Field(2, env="EMAIL_OUTBOX_TENANT_CONCURRENCY", description="Concurrent sends per organization (system mail counts as one tenant).")
+    EMAIL_OUTBOX_BATCH_SIZE: int = Field(50, env="EMAIL_OUTBOX_BATCH_SIZE", description="Rows claimed from the outbox per poll.")
+    EMAIL_OUTBOX_POLL_SECONDS: float = Field(2.0, env="EMAIL_OUTBOX_POLL_SECONDS", description="Idle wait between outbox polls; enqueues in this process wake the worker early.")
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = Field(6, env="EMAIL_OUTBOX_MAX_ATTEMPTS", description="Send attempts before an outbox row is dead-lettered.")
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = Field(30.0, env="EMAIL_OUTBOX_BACKOFF_SECONDS", description="Delay before the first retry; doubles on every further failure.")
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: float = Field(3600.0, env="EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", description="Upper bound on the delay between retries.")
+    EMAIL_OUTBOX_LEASE_SECONDS: float = Field(600.0, env="EMAIL_OUTBOX_LEASE_SECONDS", description="A row claimed longer ago than this (worker died mid-send) is claimed again.")
+    EMAIL_OUTBOX_RETENTION_DAYS: float = Field(14.0, env="EMAIL_OUTBOX_RETENTION_DAYS", description="Sent and dead-lettered outbox rows older than this are deleted.")
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: float = Field(3600.0, env="EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS", description="How often the outbox worker deletes rows past EMAIL_OUTBOX_RETENTION_DAYS.")
+
     GCS_CREDENTIALS: dict = Field(..., env="GCS_CREDENTIALS")  # We want this as a dict
     @field_validator("GCS_CREDENTIALS", mode="before")
     def parse_gcs_credentials(cls, value):
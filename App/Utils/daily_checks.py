@@ -11,6 +11,9 @@ import logging
 
 # Import the new log model
 from Models.daily_check_log import DailyCheckLog
+from Service.summary_counters import reconcile_all_organization_counters
+from Service.auth_session import flush_session_activity
+from Utils.config import config
 
 
 # APScheduler imports
@@ -135,6 +138,20 @@ def schedule_daily_checks():
     }
     scheduler = AsyncIOScheduler(jobstores=jobstores)
     scheduler.add_job(daily_checks_wrapper, trigger='interval', days=1, id='daily_checks', replace_existing=True)
+    scheduler.add_job(
+        reconcile_all_organization_counters,
+        trigger='interval',
+        minutes=config.SUMMARY_COUNTER_RECONCILE_MINUTES,
+        id='summary_counter_reconciliation',
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        flush_session_activity,
+        trigger='interval',
+        seconds=config.AUTH_ACTIVITY_FLUSH_SECONDS,
+        id='session_activity_flush',
+        replace_existing=True,
+    )
     scheduler.start()
-    logger.info("APScheduler started with daily checks job.")
+    logger.info("APScheduler started with daily checks, summary counter reconciliation and session activity flush jobs.")
     return scheduler
\ No newline at end of file
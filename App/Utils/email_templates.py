@@ -0,0 +1,147 @@
+# Utils/email_templates.py
+"""
+Compiled and cached email templates.
+
+TemplateRegistry keeps one Jinja2 environment per template search path, so
+a template is compiled once per process instead of on every send (load()
+precompiles them at startup). Built-in templates are registered from source
+with register().
+
+A "shell" is a template rendered once with everything that is the same for
+all recipients of an organization (logo, names, links) and placeholders
+for the per-recipient fields; RenderedTemplate.fill() splices a
+recipient's values in. Shells are cached under a caller-chosen key,
+usually org_key(org, ...), which changes with the organization's
+updated_at so edited logos or names produce a new shell.
+"""
+import html
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Sequence, Tuple, Union
+
+from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemLoader, Template, select_autoescape
+
+APP_TEMPLATES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "templates"))
+
+_PLACEHOLDER = "\x00{}\x00"
+_PLACEHOLDER_RE = re.compile("\x00(\\w+)\x00")
+
+
+class RenderedTemplate:
+    """
+    An HTML template rendered once, with placeholders where the
+    per-recipient `fields` go; fill() splices a recipient's values in.
+    `render` receives {field: placeholder} and returns the HTML.
+    """
+
+    def __init__(self, render: Callable[[Dict[str, str]], str], fields: Sequence[str]):
+        # Alternating literal text and field names.
+        self._parts = _PLACEHOLDER_RE.split(render({f: _PLACEHOLDER.format(f) for f in fields}))
+
+    def fill(self, values: Dict[str, Any]) -> str:
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            value = values.get(parts[i])
+            parts[i] = html.escape(str(value)) if value is not None else ""
+        return "".join(parts)
+
+
+def org_key(org, *parts: Hashable) -> Tuple:
+    """Shell cache key for an organization; changes whenever the row is updated."""
+    version = org.updated_at.isoformat() if getattr(org, "updated_at", None) else ""
+    return (str(org.id), version, *parts)
+
+
+class TemplateRegistry:
+    """Shared Jinja2 environments and an LRU of rendered shells."""
+
+    def __init__(self, default_dirs: Sequence[str] = (APP_TEMPLATES_DIR,), shell_cache_size: int = 1024):
+        self.default_dirs = tuple(default_dirs)
+        self.shell_cache_size = shell_cache_size
+        self._sources: Dict[str, str] = {}
+        self._builtin = DictLoader(self._sources)  # reads the dict live, so later register() calls apply
+        self._envs: Dict[Tuple[str, ...], Environment] = {}
+        self._shells: "OrderedDict[Hashable, RenderedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"shell_hits": 0, "shell_misses": 0}
+
+    # ---------------- templates ----------------
+
+    def register(self, name: str, source: str) -> None:
+        """Add a built-in template; files with the same name on a search path take precedence."""
+        with self._lock:
+            self._sources[name] = source
+            for env in self._envs.values():
+                if env.cache is not None:
+                    env.cache.clear()
+
+    def environment(self, *dirs: str) -> Environment:
+        """The shared environment searching `dirs` (missing ones skipped), then the built-ins."""
+        search = tuple(d for d in (dirs or self.default_dirs) if d and os.path.isdir(d))
+        env = self._envs.get(search)
+        if env is None:
+            with self._lock:
+                env = self._envs.get(search)
+                if env is None:
+                    env = self._envs[search] = Environment(
+                        loader=ChoiceLoader([FileSystemLoader(list(search)), self._builtin]),
+                        autoescape=select_autoescape(["html", "xml"]),
+                        cache_size=-1,       # never evict a compiled template
+                        auto_reload=False,   # templates ship with the release
+                    )
+        return env
+
+    def get_template(self, name: str, *dirs: str) -> Template:
+        return self.environment(*dirs).get_template(name)
+
+    def render(self, name: str, context: Mapping[str, Any], *dirs: str) -> str:
+        return self.get_template(name, *dirs).render(**context)
+
+    def load(self, *dirs: str) -> int:
+        """Compile every template on the search path now; returns how many."""
+        env = self.environment(*dirs)
+        names = [n for n in env.list_templates() if n.endswith((".html", ".htm", ".xml", ".txt"))]
+        for name in names:
+            env.get_template(name)
+        return len(names)
+
+    # ---------------- shells ----------------
+
+    def cached_shell(self, key: Hashable, build: Callable[[], RenderedTemplate]) -> RenderedTemplate:
+        """The shell cached under `key`, built (once) by `build` on a miss."""
+        with self._lock:
+            shell = self._shells.get(key)
+            if shell is not None:
+                self._shells.move_to_end(key)
+                self.stats["shell_hits"] += 1
+                return shell
+        shell = build()
+        with self._lock:
+            self.stats["shell_misses"] += 1
+            self._shells[key] = shell
+            while len(self._shells) > self.shell_cache_size:
+                self._shells.popitem(last=False)
+        return shell
+
+    def shell(self, key: Hashable, name: str, context: Union[Mapping[str, Any], Callable[[], Mapping[str, Any]]],
+              fields: Sequence[str], *dirs: str) -> RenderedTemplate:
+        """
+        Template `name` rendered with the shared `context` and placeholders
+        for `fields`. `context` may be a callable, evaluated only on a miss
+        (for values that are costly to resolve, such as logo URLs).
+        """
+        def build() -> RenderedTemplate:
+            shared = dict(context() if callable(context) else context)
+            return RenderedTemplate(lambda placeholders: self.render(name, {**shared, **placeholders}, *dirs), fields)
+
+        return self.cached_shell((name, dirs, key), build)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shells.clear()
+            self._envs.clear()
+
+
+email_templates = TemplateRegistry()
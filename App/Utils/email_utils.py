@@ -1,5 +1,4 @@
-import os
-from jinja2 import Template
+from Utils.email_templates import email_templates
 
 def parse_html_from_template(template_name: str, template_data: dict) -> str:
     """
@@ -10,22 +9,8 @@ def parse_html_from_template(template_name: str, template_data: dict) -> str:
     :return: The parsed HTML content as a string.
     """
     try:
-        # Define template directory
-        template_dir = os.path.join(os.path.dirname(__file__), '../templates')
-        
-        # Construct the full path to the template
-        template_path = os.path.join(template_dir, template_name)
-        
-        # Check if template file exists
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"Template file not found: {template_path}")
-        
-        with open(template_path, encoding='utf-8') as file_:
-            template_content = file_.read()
-        
-        # Create a Jinja2 template and render it with data
-        template = Template(template_content)
-        return template.render(**template_data)
+        # Compiled once and cached by the shared registry (App/templates).
+        return email_templates.render(template_name, template_data)
         
     except Exception as e:
         # Log the error and return a fallback HTML
@@ -0,0 +1,77 @@
+# Utils/header_matcher.py
+"""
+Compiled synonym index for mapping upload column headers to field concepts.
+
+The synonym tables are normalized once into a {normalized synonym: concept}
+dict, so a header that is already a known synonym resolves with one dict
+lookup; only unknown headers fall through to RapidFuzz. resolve() is
+memoized per header, and resolve_many() scores all of a sheet's unknown
+headers against the synonyms in a single process.cdist call.
+"""
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+
+from rapidfuzz import fuzz, process
+
+
+class SynonymIndex:
+    """
+    Header → concept resolution, in order:
+      1. `date_synonyms` lookup on the normalized header.
+      2. Exact match against the normalized synonyms.
+      3. Best fuzz.ratio match scoring at least `threshold`; ties go to
+         the synonym listed first in `synonyms_map`.
+      4. A field of `fields` whose normalized name equals the header.
+      5. The normalized header itself.
+    """
+
+    def __init__(self, synonyms_map: Mapping[str, Iterable[str]], date_synonyms: Mapping[str, str],
+                 fields: Iterable[str], normalize: Callable[[str], str], cache_size: int = 4096):
+        self._normalize = normalize
+        self._date_synonyms = dict(date_synonyms)
+        # A synonym listed under several concepts belongs to the first one.
+        self._concepts: Dict[str, str] = {}
+        for concept, synonyms in synonyms_map.items():
+            for synonym in synonyms:
+                self._concepts.setdefault(normalize(synonym), concept)
+        self._choices: List[str] = list(self._concepts)
+        self._fields: Dict[str, str] = {}
+        for field in fields:
+            self._fields.setdefault(normalize(field), field)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _exact(self, norm: str) -> Optional[str]:
+        if norm in self._date_synonyms:
+            return self._date_synonyms[norm]
+        return self._concepts.get(norm)
+
+    def _fallback(self, norm: str) -> str:
+        return self._fields.get(norm, norm)
+
+    def _resolve(self, col_name: str, threshold: int = 85) -> str:
+        norm = self._normalize(col_name)
+        concept = self._exact(norm)
+        if concept is not None:
+            return concept
+        match = process.extractOne(norm, self._choices, scorer=fuzz.ratio, score_cutoff=threshold)
+        if match is not None:
+            return self._concepts[match[0]]
+        return self._fallback(norm)
+
+    def resolve_many(self, col_names: Iterable[str], threshold: int = 85) -> List[str]:
+        """resolve() for every header of a sheet, fuzzy-matching the unknown ones in one batch."""
+        norms = [self._normalize(c) for c in col_names]
+        concepts = [self._exact(norm) for norm in norms]
+        pending = [i for i, concept in enumerate(concepts) if concept is None]
+        if pending and self._choices:
+            scores = process.cdist([norms[i] for i in pending], self._choices,
+                                   scorer=fuzz.ratio, score_cutoff=threshold)
+            best = scores.argmax(axis=1)
+            for row, i in enumerate(pending):
+                if scores[row, best[row]] >= threshold:
+                    concepts[i] = self._concepts[self._choices[best[row]]]
+        return [concept if concept is not None else self._fallback(norm)
+                for concept, norm in zip(concepts, norms)]
+
+    def cache_info(self):
+        return self.resolve.cache_info()
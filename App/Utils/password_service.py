@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from passlib.context import CryptContext
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# One CryptContext per (process, cost factor); workers of a process pool
+# build their own on first use.
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    ctx = _contexts.get(rounds)
+    if ctx is None:
+        ctx = _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return ctx
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    return _context(rounds).verify(plain_password, hashed_password)
+
+
+class PasswordService:
+    """
+    bcrypt hashing/verification behind a dedicated, bounded worker pool.
+
+    - hash()/verify() stay synchronous for sync code paths (ORM listeners,
+      threadpool endpoints).
+    - hash_async()/verify_async() run on the pool so a 200-300 ms bcrypt
+      call never blocks the event loop.
+    - hash_many() hashes a batch in parallel across cores (bulk imports).
+
+    bcrypt releases the GIL, so the default thread pool already spreads
+    work across cores; "process" isolates it completely.
+    Existing hashes verify whatever cost factor they were created with.
+    """
+
+    def __init__(self, rounds: int = 12, workers: Optional[int] = None, executor: str = "thread"):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 2
+        self.executor_kind = (executor or "thread").strip().lower()
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    # ---------------- sync ----------------
+
+    def hash(self, password: str) -> str:
+        return _hash(password, self.rounds)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return _verify(plain_password, hashed_password, self.rounds)
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Hash a batch in parallel on the pool; results keep the input order."""
+        if not passwords:
+            return []
+        return list(self.executor.map(_hash, passwords, [self.rounds] * len(passwords)))
+
+    # ---------------- async ----------------
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, _hash, password, self.rounds)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, _verify, plain_password, hashed_password, self.rounds
+        )
+
+    async def hash_many_async(self, passwords: Sequence[str]) -> List[str]:
+        return list(await asyncio.gather(*(self.hash_async(p) for p in passwords)))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_service = PasswordService(
+    rounds=config.PASSWORD_BCRYPT_ROUNDS,
+    workers=config.PASSWORD_HASH_WORKERS,
+    executor=config.PASSWORD_HASH_EXECUTOR,
+)
@@ -2,13 +2,19 @@ import secrets
 from fastapi import HTTPException, WebSocketDisconnect, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from Models import models
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError, ExpiredSignatureError
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
 import logging
-from .config import DevelopmentConfig
+import threading
+import time
+import weakref
+from .config import DevelopmentConfig, config
+from .password_service import password_service
 from database.db_session import get_db
 
 
@@ -25,16 +31,158 @@ logger = logging.getLogger(__name__)
 
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Try to use cachetools for TTL caching; if unavailable, fall back to a plain dict.
-try:
-    from cachetools import TTLCache
-except ImportError:
-    TTLCache = None
+# Longest token lifetime issued at login (8 hours); bounds revocation entries without a known exp
+TOKEN_MAX_LIFETIME_SECONDS = 28800
+
+class DecodedTokenCache:
+    """
+    Bounded LRU of decoded JWT payloads.
+
+    - Keyed by a short SHA-256 of the token, so raw tokens are not held as keys.
+    - Every entry expires at its token's own `exp`; payloads without `exp`
+      are never cached.
+    - Revoked tokens (logout, expired sessions) are remembered until their
+      `exp` and never served again, on any Security instance in the process
+      (and, with AUTH_REVOCATION_BROADCAST, on every worker).
+    """
+
+    # Every live cache, so one revocation reaches all Security instances
+    _instances: "weakref.WeakSet[DecodedTokenCache]" = weakref.WeakSet()
+    # key → exp of revoked tokens, shared process-wide
+    _revoked: Dict[str, float] = {}
+    _revoked_lock = threading.Lock()
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "revocations": 0}
+        DecodedTokenCache._instances.add(self)
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            exp, payload = entry
+            if exp <= time.time():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return payload
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        key = self.key(token)
+        if not exp or self.is_revoked_key(key):
+            return
+        with self._lock:
+            self._entries[key] = (float(exp), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _drop(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.stats["revocations"] += 1
+        return entry[0] if entry else None
+
+    @classmethod
+    def is_revoked_key(cls, key: str) -> bool:
+        exp = cls._revoked.get(key)
+        return exp is not None and exp > time.time()
+
+    @classmethod
+    def revoke_key(cls, key: str, exp: Optional[float] = None) -> None:
+        """Drop key from every cache and refuse it until exp (default: longest token lifetime)."""
+        for cache in list(cls._instances):
+            dropped_exp = cache._drop(key)
+            exp = exp or dropped_exp
+        now = time.time()
+        with cls._revoked_lock:
+            cls._revoked[key] = exp or now + TOKEN_MAX_LIFETIME_SECONDS
+            for stale in [k for k, e in cls._revoked.items() if e <= now]:
+                del cls._revoked[stale]
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "revoked": len(DecodedTokenCache._revoked),
+            "hit_ratio": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def revoke_decoded_token(token: str, exp: Optional[float] = None) -> None:
+    """
+    Stop serving token's cached payload in this process and, when
+    AUTH_REVOCATION_BROADCAST is on, in every other worker too.
+    """
+    key = DecodedTokenCache.key(token)
+    DecodedTokenCache.revoke_key(key, exp)
+    revocation_broadcaster.publish(key, DecodedTokenCache._revoked.get(key))
+
+
+class TokenRevocationBroadcaster:
+    """Relays revoked token keys (never raw tokens) between workers over Redis pub/sub."""
+
+    def __init__(self, url: Optional[str], channel: str = "auth:revocations"):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._thread = None
+
+    def start(self) -> None:
+        if not self.url or self._thread is not None:
+            return
+        import redis
+        self._redis = redis.Redis.from_url(self.url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: self._on_message})
+        self._thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        logger.info("Token revocations subscribed to redis channel %s", self.channel)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+    def publish(self, key: str, exp: Optional[float]) -> None:
+        if self._redis is None:
+            return
+        try:
+            self._redis.publish(self.channel, json.dumps({"key": key, "exp": exp}))
+        except Exception as e:
+            logger.error("Failed to broadcast token revocation: %s", e)
 
+    def _on_message(self, message) -> None:
+        try:
+            data = json.loads(message["data"])
+            DecodedTokenCache.revoke_key(data["key"], data.get("exp"))
+        except Exception:
+            logger.exception("Invalid token revocation message")
+
+
+revocation_broadcaster = TokenRevocationBroadcaster(
+    config.REDIS_URL if config.AUTH_REVOCATION_BROADCAST else None
+)
 
 
 class Security:
@@ -43,11 +191,8 @@ class Security:
         self.algorithm = algorithm
         self.token_expire_minutes = token_expire_minutes
         # self.length =length
-        # Setup a TTL cache for decoded tokens if possible
-        if TTLCache:
-            self.token_cache = TTLCache(maxsize=1024, ttl=token_expire_minutes * 60)
-        else:
-            self.token_cache = {}
+        # Decoded payloads, each expiring at its token's own exp
+        self.token_cache = DecodedTokenCache(maxsize=config.AUTH_TOKEN_CACHE_SIZE)
 
 
 
@@ -56,7 +201,11 @@ class Security:
     #     return pwd_context.hash(password)
 
     def hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
+        return password_service.hash(password)
+
+    async def hash_password_async(self, password: str) -> str:
+        """hash_password on the bcrypt worker pool, without blocking the event loop."""
+        return await password_service.hash_async(password)
 
     # @staticmethod
     # def get_user(organization_id: Any,  db: Session):
@@ -84,14 +233,18 @@ class Security:
     #     return pwd_context.verify(plain_password, hashed_password)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_service.verify(plain_password, hashed_password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password on the bcrypt worker pool, without blocking the event loop."""
+        return await password_service.verify_async(plain_password, hashed_password)
         
     # @staticmethod 
     # def get_password_hash(password='password'):
     #     return pwd_context.hash(password)
 
     def get_password_hash(self, password: str = 'password') -> str:
-        return pwd_context.hash(password)
+        return password_service.hash(password)
     
 
     # @staticmethod
@@ -187,7 +340,10 @@ class Security:
             logger.error("WebSocket token invalid")
             raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
 
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        # Principal + user from the auth caches (no query when cached)
+        from Service.auth_session import auth_user_cache, principal_cache
+        principal = principal_cache.resolve(token, user_id)
+        user = auth_user_cache.get(db, principal.user_id) if principal else None
         print("user: ", user)
         # If user not found, raise WebSocketDisconnect with policy violation code
         if not user:
@@ -214,16 +370,21 @@ class Security:
         Asynchronously decodes a JWT token using a threadpool to offload the synchronous operation.
         Uses caching to speed up repeated decodes.
         """
-        if token_str in self.token_cache:
+        if DecodedTokenCache.is_revoked_key(DecodedTokenCache.key(token_str)):
+            logger.debug("Rejecting revoked token")
+            return None
+
+        payload = self.token_cache.get(token_str)
+        if payload is not None:
             logger.debug("Returning cached token payload")
-            return self.token_cache[token_str]
+            return payload
 
         try:
             payload = await run_in_threadpool(
                 jwt.decode, token_str, self.secret_key, algorithms=[self.algorithm]
             )
             logger.debug(f"Decoded token payload: {payload}")
-            self.token_cache[token_str] = payload
+            self.token_cache.put(token_str, payload)
             return payload
         except JWTError as e:
             logger.error(f"JWT decoding error: {e}")
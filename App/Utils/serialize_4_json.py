@@ -15,4 +15,27 @@ def serialize_for_json(data):
         return str(data)
     elif isinstance(data, datetime):
         return data.isoformat()
-    return data
\ No newline at end of file
+    return data
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+import json
+
+
+def dumps_json(data, sort_keys: bool = False) -> str:
+    """
+    Encode `data` to a JSON string once, for sending the same text to many sockets.
+    Uses orjson when installed (UUID/datetime/date handled natively); anything
+    else it cannot encode (Decimal, enums, ...) falls back to str(), like the
+    `json.dumps(default=str)` calls it replaces.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=str, option=option).decode("utf-8")
+    return json.dumps(data, default=str, sort_keys=sort_keys)
@@ -0,0 +1,139 @@
+# Utils/smtp_pool.py
+"""
+Persistent SMTP connections.
+
+SMTPConnectionPool keeps up to `size` logged-in smtplib connections and
+lends them out one at a time, so a batch of messages pays the TCP/TLS
+handshake and AUTH once per connection instead of once per message. A
+connection that drops while lent is discarded and the next checkout opens
+a fresh one; SMTP-level errors (refused recipient, 4xx/5xx reply) leave the
+connection in the pool. A connection idle for longer than
+`health_check_after` seconds is probed with NOOP before it is lent, and
+replaced if the server has dropped it.
+"""
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    # smtplib.SMTPException subclasses OSError; only a disconnect or a
+    # socket-level error means the connection itself is gone.
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+def is_permanent_error(exc: BaseException) -> bool:
+    """A refusal that retrying will not fix: refused recipients or a 5xx reply."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and 500 <= exc.smtp_code < 600
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of at most `size` open SMTP connections to one server."""
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_ssl: bool = False, starttls: bool = True, validate_certs: bool = True,
+                 size: int = 3, timeout: float = 60, health_check_after: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self.size = max(size, 1)
+        self.health_check_after = health_check_after
+        self.context = ssl.create_default_context()
+        if not validate_certs:
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+        # (connection, monotonic time it was returned)
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.stats = {"connects": 0, "reused": 0, "health_checks": 0, "discarded": 0}
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, context=self.context, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            server.ehlo()
+            if self.starttls:
+                server.starttls(context=self.context)
+                server.ehlo()
+        try:
+            if self.username:
+                server.login(self.username, self.password or "")
+        except Exception:
+            self._quit(server)
+            raise
+        self.stats["connects"] += 1
+        return server
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _alive(self, server: smtplib.SMTP) -> bool:
+        self.stats["health_checks"] += 1
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - returned_at < self.health_check_after or self._alive(server):
+                self.stats["reused"] += 1
+                return server
+            self.stats["discarded"] += 1
+            self._quit(server)
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        self._idle.put((server, time.monotonic()))
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a connection, opening one if none is idle; blocks while all `size` are lent."""
+        with self._slots:
+            server = self._checkout()
+            try:
+                yield server
+            except BaseException as exc:
+                if _is_connection_error(exc):
+                    self.stats["discarded"] += 1
+                    self._quit(server)
+                else:
+                    self._checkin(server)
+                raise
+            else:
+                self._checkin(server)
+
+    def close(self) -> None:
+        """QUIT every idle connection."""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(server)
+
+    def __enter__(self) -> "SMTPConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
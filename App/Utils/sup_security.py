@@ -3,21 +3,22 @@ import os
 import uuid
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from Utils.config import ProductionConfig
+from Utils.password_service import password_service
 
 settings = ProductionConfig()
 # from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_service.hash(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return password_service.verify(plain, hashed)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await password_service.verify_async(plain, hashed)
 
 
 def create_access_token(*, subject: str) -> str:
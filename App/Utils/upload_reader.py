@@ -0,0 +1,169 @@
+# Utils/upload_reader.py
+"""
+Bounded-memory reading of CSV/Excel uploads.
+
+UploadReader walks an upload sheet by sheet and yields DataFrames of at most
+`chunk_size` rows, so a large HR migration is never held in memory as a
+whole:
+
+- .xlsx: openpyxl read_only mode, rows parsed lazily from the archive.
+- .csv:  pandas read_csv(chunksize=...).
+- .xls:  xlrd cannot stream; each sheet is loaded on its own, then chunked.
+
+Uploads that are not seekable are first spooled to a SpooledTemporaryFile
+(RAM up to `spool_max_bytes`, then disk). Chunk indexes continue across
+chunks, so a row keeps the index it would have had in a full read_excel /
+read_csv of the sheet (blank Excel rows are skipped but still counted).
+"""
+import shutil
+from tempfile import SpooledTemporaryFile
+from typing import IO, Iterator, List, Optional
+
+import pandas as pd
+from fastapi import HTTPException, UploadFile
+
+from .config import config
+
+CSV_SHEET = "default"
+
+
+def spool_upload(fileobj: IO[bytes], max_bytes: Optional[int] = None) -> IO[bytes]:
+    """
+    Return a seekable binary stream positioned at the start of the upload.
+    Starlette already spools UploadFile bodies; anything else is copied
+    into a SpooledTemporaryFile in fixed-size blocks.
+    """
+    if getattr(fileobj, "seekable", lambda: False)():
+        fileobj.seek(0)
+        return fileobj
+    spooled = SpooledTemporaryFile(max_size=max_bytes or config.BULK_IMPORT_SPOOL_MAX_BYTES)
+    shutil.copyfileobj(fileobj, spooled, length=1024 * 1024)
+    spooled.seek(0)
+    return spooled
+
+
+class UploadReader:
+    """Chunked, sheet-by-sheet reader over one CSV/Excel upload."""
+
+    def __init__(self, fileobj: IO[bytes], filename: str, chunk_size: Optional[int] = None,
+                 spool_max_bytes: Optional[int] = None, kind: Optional[str] = None):
+        self.filename = filename
+        self.chunk_size = max(chunk_size or config.BULK_IMPORT_READ_CHUNK_ROWS, 1)
+        # "csv", "xlsx" or "xls"; taken from the file extension unless given.
+        self.kind = kind or (filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else "")
+        self._stream = spool_upload(fileobj, spool_max_bytes)
+        self._workbook = None
+
+    @classmethod
+    def from_upload(cls, file: UploadFile, chunk_size: Optional[int] = None,
+                    kind: Optional[str] = None) -> "UploadReader":
+        return cls(file.file, file.filename, chunk_size, kind=kind)
+
+    # ---------------- workbook ----------------
+
+    def _xlsx(self):
+        if self._workbook is None:
+            from openpyxl import load_workbook
+
+            self._stream.seek(0)
+            self._workbook = load_workbook(self._stream, read_only=True, data_only=True)
+        return self._workbook
+
+    def sheet_names(self) -> List[str]:
+        if self.kind == "csv":
+            return [CSV_SHEET]
+        if self.kind == "xlsx":
+            return list(self._xlsx().sheetnames)
+        self._stream.seek(0)
+        return list(pd.ExcelFile(self._stream).sheet_names)
+
+    def columns(self, sheet: str) -> List[str]:
+        """Header row of `sheet`, read without loading its rows."""
+        if self.kind == "csv":
+            self._stream.seek(0)
+            return [str(c) for c in pd.read_csv(self._stream, nrows=0).columns]
+        if self.kind == "xlsx":
+            header = next(self._xlsx()[sheet].iter_rows(max_row=1, values_only=True), ())
+            return self._header_names(header)
+        self._stream.seek(0)
+        return [str(c) for c in pd.read_excel(self._stream, sheet_name=sheet, nrows=0).columns]
+
+    @staticmethod
+    def _header_names(header) -> List[str]:
+        # Same placeholder pandas gives a blank header cell.
+        return [str(h).strip() if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+    def count_rows(self, sheet: str) -> Optional[int]:
+        """
+        Estimated data rows in `sheet` without parsing it (xlsx dimension,
+        CSV line count); None when unknown. Used for progress/ETA only.
+        """
+        if self.kind == "csv":
+            self._stream.seek(0)
+            lines, last = 0, b""
+            for block in iter(lambda: self._stream.read(1024 * 1024), b""):
+                lines += block.count(b"\n")
+                last = block
+            if last and not last.endswith(b"\n"):
+                lines += 1
+            return max(lines - 1, 0)
+        if self.kind == "xlsx":
+            max_row = self._xlsx()[sheet].max_row
+            return max(max_row - 1, 0) if max_row else None
+        return None
+
+    # ---------------- rows ----------------
+
+    def iter_chunks(self, sheet: str) -> Iterator[pd.DataFrame]:
+        """Yield `sheet` as DataFrames of at most chunk_size rows."""
+        if self.kind == "csv":
+            self._stream.seek(0)
+            yield from pd.read_csv(self._stream, chunksize=self.chunk_size)
+        elif self.kind == "xlsx":
+            yield from self._iter_xlsx_chunks(sheet)
+        else:
+            self._stream.seek(0)
+            df = pd.read_excel(self._stream, sheet_name=sheet)
+            for start in range(0, len(df), self.chunk_size):
+                yield df.iloc[start:start + self.chunk_size]
+
+    def _iter_xlsx_chunks(self, sheet: str) -> Iterator[pd.DataFrame]:
+        rows = self._xlsx()[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = self._header_names(header)
+        width = len(columns)
+        batch, positions = [], []
+        for position, row in enumerate(rows):
+            if not any(cell is not None for cell in row):
+                continue
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            batch.append(row)
+            positions.append(position)
+            if len(batch) >= self.chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns, index=positions)
+                batch, positions = [], []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns, index=positions)
+
+    # ---------------- lifecycle ----------------
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def __enter__(self) -> "UploadReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_upload(file: UploadFile, allowed_extensions, chunk_size: Optional[int] = None) -> UploadReader:
+    """Validate the upload's extension and return a chunked reader for it."""
+    if not file.filename or "." not in file.filename or \
+            file.filename.rsplit(".", 1)[1].lower() not in allowed_extensions:
+        raise HTTPException(status_code=400, detail="Only CSV or Excel files are allowed.")
+    return UploadReader.from_upload(file, chunk_size)
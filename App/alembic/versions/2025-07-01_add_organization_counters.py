@@ -0,0 +1,36 @@
+"""Add organization_counters table for materialized summary counts
+
+Revision ID: 3b8e1f0c9d2a
+Revises: 2a7d9b3c8e4f
+Create Date: 2025-07-01 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1f0c9d2a'
+down_revision = '2a7d9b3c8e4f'
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = (
+    'branches', 'departments', 'ranks', 'roles', 'users', 'active_users',
+    'inactive_users', 'employees', 'promotion_policies', 'tenancies', 'bills', 'payments',
+)
+
+
+def upgrade():
+    op.create_table(
+        'organization_counters',
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('organizations.id', ondelete='CASCADE'), primary_key=True),
+        *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in COUNTER_COLUMNS],
+        sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('organization_counters')
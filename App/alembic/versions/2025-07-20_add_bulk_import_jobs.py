@@ -0,0 +1,50 @@
+"""Add bulk_import_jobs table for asynchronous bulk employee imports
+
+Revision ID: 5c2e8a7f1b3d
+Revises: 3b8e1f0c9d2a
+Create Date: 2025-07-20 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8a7f1b3d'
+down_revision = '3b8e1f0c9d2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bulk_import_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('organization_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('file_name', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False, server_default='queued'),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('success_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('message', sa.String(), nullable=True),
+        sa.Column('result', postgresql.JSONB(), nullable=True),
+        sa.Column('error_log_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('bulk_upload_errors.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_by', postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_index('ix_bulk_import_jobs_id', 'bulk_import_jobs', ['id'])
+    op.create_index('ix_bulk_import_jobs_organization_id', 'bulk_import_jobs', ['organization_id'])
+
+
+def downgrade():
+    op.drop_index('ix_bulk_import_jobs_organization_id', table_name='bulk_import_jobs')
+    op.drop_index('ix_bulk_import_jobs_id', table_name='bulk_import_jobs')
+    op.drop_table('bulk_import_jobs')
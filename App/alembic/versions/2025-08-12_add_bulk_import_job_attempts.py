@@ -0,0 +1,23 @@
+"""Add attempts to bulk_import_jobs for reclaiming abandoned jobs
+
+Revision ID: 8e5b2d0a3f7c
+Revises: 7d4f1a9c2e6b
+Create Date: 2025-08-12 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8e5b2d0a3f7c'
+down_revision = '7d4f1a9c2e6b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('bulk_import_jobs', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('bulk_import_jobs', 'attempts')
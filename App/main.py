@@ -13,6 +13,15 @@ from Apis.routers import api
 from Apis.deps_ws import get_current_user_ws
 from Apis.summary import _build_summary_payload
 from Apis.summary_listeners import register_summary_listeners
+from Apis.summary_broadcaster import summary_debouncer
+from Apis.change_dispatcher import post_commit_dispatcher
+from Service.auth_session import activity_store, register_auth_cache_listeners
+from Utils.security import revocation_broadcaster
+from Utils.password_service import password_service
+from Service.bulk_import_jobs import resume_import_jobs, shutdown_import_jobs
+from Service.custom_email_provider import close_transports as close_email_transports
+from Service.email_outbox import start_outbox_worker, stop_outbox_worker
+from Utils.email_templates import email_templates
 from migration_script import run_migrations
 from Models.Tenants.organization import Organization
 from Service.data_input_handlers import autodiscover_handlers
@@ -20,7 +29,7 @@ from Models.models import Dashboard, User, Employee, EmployeeDataInput
 from Models.Tenants.role import Role
 from database.db_session import get_db, temp_db, SessionLocal
 from sqlalchemy.orm import Session, joinedload
-from notification.socket import manager
+from notification.socket import manager, start_backplane
 from Utils.daily_checks import schedule_daily_checks
 import logging
 from Utils.config import config
@@ -378,11 +387,22 @@ async def on_startup():
         # Start the APScheduler job for daily checks.
         schedule_daily_checks()
 
+        summary_debouncer.bind_loop()
+        await start_backplane()
+        post_commit_dispatcher.bind_loop()
         register_summary_listeners()
+        register_auth_cache_listeners()
+        revocation_broadcaster.start()
         
         # Register employee listeners for automatic updates
         from Apis.employee_listeners import register_employee_listeners
         register_employee_listeners()
+
+        # Pick up bulk-import jobs queued before a restart
+        await asyncio.to_thread(resume_import_jobs)
+        start_outbox_worker()
+        # Compile the email templates now rather than on the first send
+        email_templates.load()
         
         print("Application startup tasks completed successfully.")
 
@@ -405,6 +425,14 @@ async def on_shutdown():
     Example: Closing database connections, releasing resources, etc.
     """
     # app.state.db.close()
+    await manager.stop_backplane()
+    revocation_broadcaster.stop()
+    password_service.shutdown()
+    shutdown_import_jobs()
+    stop_outbox_worker()
+    close_email_transports()
+    # Persist the last batch of token activity
+    await asyncio.to_thread(activity_store.flush)
     print("Application shutdown tasks completed.")
     
 
@@ -0,0 +1,124 @@
+# notification/backplane.py
+"""
+Cross-process relay for ConnectionManager broadcasts.
+
+Each uvicorn worker only holds its own sockets. When a worker broadcasts, it
+fans out to its local sockets and publishes an envelope on the backplane;
+every other worker receives it and fans out to *its* local sockets.
+
+Envelope:
+    {"origin": <worker id>, "org": <organization_id>, "user": <user_id or None>,
+     "text": <str>}  or  {..., "bytes": <base64 str>}
+"""
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[Dict], Awaitable[None]]
+
+
+class Backplane:
+    """No-op backplane: a single process, nothing to relay."""
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, envelope: Dict) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+
+class InMemoryBackplane(Backplane):
+    """
+    Relays envelopes between ConnectionManagers in the same process that share
+    a hub list. Stands in for Redis in tests (one manager per fake "worker").
+    """
+
+    def __init__(self, hub: Optional[List["InMemoryBackplane"]] = None):
+        self.hub = hub if hub is not None else []
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self.hub.append(self)
+
+    async def publish(self, envelope: Dict) -> None:
+        for peer in list(self.hub):
+            if peer is not self:
+                await peer._deliver(envelope)
+
+    async def stop(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+
+
+class RedisBackplane(Backplane):
+    """Redis pub/sub on one channel; reuses the Redis that backs Celery."""
+
+    def __init__(self, url: str, channel: str = "ws:broadcast"):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        import redis.asyncio as aioredis
+
+        await super().start(deliver)
+        self._redis = aioredis.from_url(self.url)
+        self._reader = asyncio.create_task(self._listen())
+        logger.info("WebSocket backplane subscribed to redis channel %s", self.channel)
+
+    async def publish(self, envelope: Dict) -> None:
+        try:
+            await self._redis.publish(self.channel, json.dumps(envelope))
+        except Exception as e:
+            # Local sockets were already served; only other workers miss out.
+            logger.error("WebSocket backplane publish failed: %s", e)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "message":
+                        continue
+                    try:
+                        await self._deliver(json.loads(msg["data"]))
+                    except Exception:
+                        logger.exception("WebSocket backplane delivery failed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("WebSocket backplane connection lost (%s); resubscribing", e)
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        if self._redis is not None:
+            await self._redis.close()
+
+
+def build_backplane(kind: str, redis_url: str, channel: str) -> Backplane:
+    """Pick the backplane from config: 'local' (default), 'memory' or 'redis'."""
+    kind = (kind or "local").strip().lower()
+    if kind == "redis":
+        return RedisBackplane(redis_url, channel)
+    if kind == "memory":
+        return InMemoryBackplane()
+    return Backplane()
@@ -10,7 +10,7 @@ load_dotenv()  # load environment variables from .env
 broker_url = os.getenv("REDIS_URL", "redis://:yourpassword@localhost:6379/0")
 result_backend = os.getenv("REDIS_URL", "redis://:yourpassword@localhost:6379/0")
 
-celery_app = Celery("worker", broker=broker_url, backend=result_backend)
+celery_app = Celery("worker", broker=broker_url, backend=result_backend, include=["notification.tasks"])
 
 celery_app.conf.update(
     task_serializer="json",
@@ -0,0 +1,37 @@
+# notification/employee_stream.py
+"""
+Section-level diffs for the employee record stream (/ws/employee).
+
+The record from get_employee_full_record is a dict of sections ("Bio-data",
+"Qualifications", "Salary-payments", ...). Most edits touch one section, so
+after the initial snapshot each socket is sent only the sections that changed:
+
+    {"type": "patch", "employee_id": ..., "version": 7, "base_version": 6,
+     "changes": {"Next-of-kin": [...]}, "removed": []}
+
+A client applies a patch only if `base_version` equals the version it holds;
+otherwise it sends "resync" (or "refresh") and gets a full
+{"type": "update", "version": ..., "payload": {...}}.
+"""
+import json
+from typing import Any, Dict, List, Tuple
+
+from Utils.serialize_4_json import dumps_json
+
+
+def normalize_record(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON round-trip, so records built locally (UUIDs, dates) compare equal to
+    records received over the backplane (already plain JSON).
+    """
+    return json.loads(dumps_json(payload))
+
+
+def diff_sections(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Top-level sections of `new` that differ from `old`, and sections dropped from it."""
+    changes = {key: value for key, value in new.items() if old.get(key, _MISSING) != value}
+    removed = [key for key in old if key not in new]
+    return changes, removed
+
+
+_MISSING = object()
@@ -1,8 +1,15 @@
 import asyncio
+import base64
 import datetime
 import json
+import uuid
+import zlib
 from fastapi import APIRouter, WebSocketDisconnect, WebSocket
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from Utils.config import config
+from Utils.serialize_4_json import dumps_json
+from notification.backplane import Backplane, build_backplane
+from notification.employee_stream import diff_sections, normalize_record
 
 
 router = APIRouter()
@@ -71,17 +78,124 @@ configuration, and logging as needed in your environment.
 
 
 
-class ConnectionManager:
+class _OrgShard:
+    """
+    All sockets of one organization. Each org has its own lock, so connects,
+    disconnects and fan-outs in one tenant never wait on another tenant.
+    """
+    __slots__ = ("sockets", "users", "employees", "lock")
+
     def __init__(self):
-        # Active connections keyed by organization_id.
-        # Keyed by organization_id → list of all WebSockets in that org
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-        # Keyed by (organization_id, user_id) → list of WebSockets for that user
-        self.user_connections: Dict[Tuple[str, str], List[WebSocket]] = {}
-        # Lock to prevent race conditions during connect/disconnect
-        self._lock = asyncio.Lock()
+        # Every WebSocket in the org (set → O(1) add/discard)
+        self.sockets: Set[WebSocket] = set()
+        # user_id → that user's WebSockets
+        self.users: Dict[str, Set[WebSocket]] = {}
+        # employee_id → sockets watching that employee's record (/ws/employee)
+        self.employees: Dict[str, Set[WebSocket]] = {}
+        self.lock = asyncio.Lock()
+
+
+class ConnectionManager:
+    def __init__(self, send_timeout: float = 5.0):
+        # Sharded by organization_id
+        self._shards: Dict[str, _OrgShard] = {}
+        # Reverse index: WebSocket → (organization_id, user_id or None), so
+        # a dead socket found during fan-out can be dropped from every index.
+        self._owners: Dict[WebSocket, Tuple[str, Optional[str]]] = {}
+        # WebSocket → employee_id it is subscribed to
+        self._subscriptions: Dict[WebSocket, str] = {}
+        # WebSocket → (version, record) last sent to it; patches are diffed against this
+        self._employee_views: Dict[WebSocket, Tuple[int, Dict]] = {}
+        # employee_id → last version issued on this worker (monotonic)
+        self._employee_versions: Dict[str, int] = {}
+        # A send slower than this drops the socket instead of stalling the fan-out
+        self.send_timeout = send_timeout
+        # Relays broadcasts to the other workers; no-op until start_backplane()
+        self.backplane: Backplane = Backplane()
+        self.worker_id = uuid.uuid4().hex
+
+    async def start_backplane(self, backplane: Backplane):
+        self.backplane = backplane
+        await backplane.start(self._deliver_remote)
+
+    async def stop_backplane(self):
+        await self.backplane.stop()
+        self.backplane = Backplane()
+
+    async def _publish(self, organization_id: str, message: Union[str, bytes],
+                       user_id: Optional[str] = None, employee_id: Optional[str] = None):
+        envelope = {"origin": self.worker_id, "org": organization_id, "user": user_id, "employee": employee_id}
+        if isinstance(message, bytes):
+            envelope["bytes"] = base64.b64encode(message).decode("ascii")
+        else:
+            envelope["text"] = message
+        await self.backplane.publish(envelope)
+
+    async def _deliver_remote(self, envelope: Dict):
+        """Another worker broadcast: fan out to the sockets this worker holds."""
+        if envelope.get("origin") == self.worker_id:
+            return
+        message = envelope["text"] if "text" in envelope else base64.b64decode(envelope["bytes"])
+        if envelope.get("employee") is not None:
+            await self._local_employee_record(envelope["org"], envelope["employee"], json.loads(message))
+        elif envelope.get("user") is not None:
+            await self._local_send_personal(envelope["org"], envelope["user"], message)
+        else:
+            await self._local_broadcast(envelope["org"], message)
+
+    def _shard(self, organization_id: str) -> _OrgShard:
+        shard = self._shards.get(organization_id)
+        if shard is None:
+            shard = self._shards[organization_id] = _OrgShard()
+        return shard
+
+    @property
+    def active_connections(self) -> Dict[str, Set[WebSocket]]:
+        """organization_id → WebSockets (read-only view kept for older callers)."""
+        return {org_id: shard.sockets for org_id, shard in self._shards.items()}
+
+    @property
+    def user_connections(self) -> Dict[Tuple[str, str], Set[WebSocket]]:
+        """(organization_id, user_id) → WebSockets (read-only view kept for older callers)."""
+        return {
+            (org_id, user_id): conns
+            for org_id, shard in self._shards.items()
+            for user_id, conns in shard.users.items()
+        }
+
+    def _add(self, shard: _OrgShard, organization_id: str, user_id: Optional[str], websocket: WebSocket):
+        shard.sockets.add(websocket)
+        if user_id is not None:
+            shard.users.setdefault(user_id, set()).add(websocket)
+        self._owners[websocket] = (organization_id, user_id)
+
+    @staticmethod
+    def _discard_from(index: Dict[str, Set[WebSocket]], key: str, websocket: WebSocket):
+        conns = index.get(key)
+        if conns is not None:
+            conns.discard(websocket)
+            if not conns:
+                del index[key]
+
+    def _discard(self, websocket: WebSocket):
+        owner = self._owners.pop(websocket, None)
+        if owner is None:
+            return
+        organization_id, user_id = owner
+        shard = self._shards.get(organization_id)
+        if shard is None:
+            return
+        shard.sockets.discard(websocket)
+        employee_id = self._subscriptions.pop(websocket, None)
+        self._employee_views.pop(websocket, None)
+        if employee_id is not None:
+            self._discard_from(shard.employees, employee_id, websocket)
+            if employee_id not in shard.employees:
+                self._employee_versions.pop(employee_id, None)
+        if user_id is not None:
+            self._discard_from(shard.users, user_id, websocket)
+        # Empty shards are kept (one per org) so their lock stays stable for waiters.
 
-    
     async def register(self, organization_id: str, user_id: str, websocket: WebSocket):
         """
         Call this _after_ you have validated the token and decided to accept() the WebSocket.
@@ -89,37 +203,55 @@ class ConnectionManager:
           - organization_id (for broadcasting to entire org)
           - (organization_id, user_id) (for sending personal messages).
         """
-        async with self._lock:
-            self.active_connections.setdefault(organization_id, []).append(websocket)
-            self.user_connections.setdefault((organization_id, user_id), []).append(websocket)
+        shard = self._shard(organization_id)
+        async with shard.lock:
+            self._add(shard, organization_id, user_id, websocket)
 
     async def unregister(self, organization_id: str, user_id: str, websocket: WebSocket):
         """
-        Remove this WebSocket from both the org’s list and the user’s list.
-        """
-        async with self._lock:
-            # Remove from active_connections
-            conns = self.active_connections.get(organization_id, [])
-            if websocket in conns:
-                conns.remove(websocket)
-                if not conns:
-                    del self.active_connections[organization_id]
-
-            # Remove from user_connections
-            key = (organization_id, user_id)
-            user_conns = self.user_connections.get(key, [])
-            if websocket in user_conns:
-                user_conns.remove(websocket)
-                if not user_conns:
-                    del self.user_connections[key]
+        Remove this WebSocket from both the org’s set and the user’s set.
+        """
+        shard = self._shards.get(organization_id)
+        if shard is None:
+            return
+        async with shard.lock:
+            self._discard(websocket)
     
+    async def subscribe_employee(self, organization_id: str, employee_id: str, websocket: WebSocket):
+        """
+        Route updates for employee_id to this (already registered) WebSocket.
+        The subscription is dropped together with the socket on unregister.
+        """
+        shard = self._shard(organization_id)
+        async with shard.lock:
+            if websocket not in self._owners:
+                return
+            previous = self._subscriptions.get(websocket)
+            if previous is not None:
+                self._discard_from(shard.employees, previous, websocket)
+            shard.employees.setdefault(employee_id, set()).add(websocket)
+            self._subscriptions[websocket] = employee_id
+
+    def has_employee_subscribers(self, organization_id: str, employee_id: str) -> bool:
+        """
+        False only when nobody anywhere can be watching employee_id. With a
+        cross-worker backplane, subscribers on other workers are unknown here,
+        so this stays True.
+        """
+        if type(self.backplane) is not Backplane:
+            return True
+        shard = self._shards.get(organization_id)
+        return bool(shard and shard.employees.get(employee_id))
+
     async def unregister_user(self, organization_id: str, user_id: str):
         """
         Force-close ALL WebSockets for this (org, user).
         """
-        key = (organization_id, user_id)
-        # snapshot the list so we can mutate the original safely
-        conns = list(self.user_connections.get(key, []))
+        shard = self._shards.get(organization_id)
+        if shard is None:
+            return
+        # snapshot the set so we can mutate the original safely
+        conns = list(shard.users.get(user_id, ()))
         for ws in conns:
             # 1) remove it from our maps immediately
             await self.unregister(organization_id, user_id, ws)
@@ -133,60 +265,172 @@ class ConnectionManager:
 
     async def connect(self, organization_id: str, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.setdefault(organization_id, []).append(websocket)
+        self._add(self._shard(organization_id), organization_id, None, websocket)
 
     def disconnect(self, organization_id: str, websocket: WebSocket):
-        if organization_id in self.active_connections and websocket in self.active_connections[organization_id]:
-            self.active_connections[organization_id].remove(websocket)
+        self._discard(websocket)
+
+    async def _send(self, websocket: WebSocket, send) -> bool:
+        try:
+            await asyncio.wait_for(send(websocket), timeout=self.send_timeout)
+            return True
+        except Exception:
+            # Timed out, closed or broken: drop it so the next fan-out skips it
+            self._discard(websocket)
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+            return False
+
+    async def _fan_out(self, sockets, send) -> int:
+        """
+        Send to every socket concurrently; a slow or dead client only costs
+        its own send_timeout. Returns how many sends succeeded.
+        """
+        sockets = list(sockets)
+        if not sockets:
+            return 0
+        results = await asyncio.gather(*(self._send(ws, send) for ws in sockets))
+        return sum(results)
 
     # async def send_personal_message(self, message: str, websocket: WebSocket):
     #     await websocket.send_text(message)
 
-    async def send_personal_message(self, organization_id: str, user_id: str, message: str):
+    async def send_personal_message(self, organization_id: str, user_id: str, message: Union[str, bytes]):
         """
-        Send `message` to every WebSocket that belongs to (organization_id, user_id).
-        If that user is offline (no entry in user_connections), this is a no-op.
+        Send `message` to every WebSocket that belongs to (organization_id, user_id),
+        on this worker and, via the backplane, on every other worker.
+        If that user is offline, this is a no-op.
         """
-        key = (organization_id, user_id)
-        print(f"key in send_personal_message:: {key}")
-        if key not in self.user_connections:
-            return
-        print(f"user connections:: {self.user_connections}")
-        for ws in list(self.user_connections[key]):
-            try:
-                await ws.send_text(message)
-            except Exception:
-                # If sending fails, we ignore; the next heartbeat/disconnect will clean it up.
-                pass
+        await asyncio.gather(
+            self._local_send_personal(organization_id, user_id, message),
+            self._publish(organization_id, message, user_id=user_id),
+        )
 
-    # async def broadcast(self, organization_id: str, message: str):
-    #     if organization_id in self.active_connections:
-    #         for connection in self.active_connections[organization_id]:
-    #             await connection.send_text(message)
+    async def broadcast(self, organization_id: str, message: Union[str, bytes]):
+        """
+        Send `message` to every WebSocket currently connected under organization_id,
+        on this worker and, via the backplane, on every other worker.
+        `bytes` go out as binary frames, `str` as text frames; either way the
+        same object is sent to every socket.
+        """
+        await asyncio.gather(
+            self._local_broadcast(organization_id, message),
+            self._publish(organization_id, message),
+        )
+    
+    async def broadcast_json(self, organization_id: str, obj: Any, compress: bool = False):
+        """
+        Serialize `obj` once and send the result to every socket in the org.
+        With `compress`, the JSON is zlib-deflated and sent as a binary frame
+        (clients opt in by inflating binary frames).
+        """
+        await self.broadcast(organization_id, encode_message(obj, compress))
 
-    async def broadcast(self, organization_id: str, message: str):
+    def _next_version(self, employee_id: str) -> int:
+        version = self._employee_versions.get(employee_id, 0) + 1
+        self._employee_versions[employee_id] = version
+        return version
+
+    async def send_employee_snapshot(self, websocket: WebSocket, employee_id: str,
+                                     record: Dict, message_type: str = "initial"):
+        """
+        Send the full record to one socket and make it the base for its next
+        patch. Used for the initial payload and for client "refresh"/"resync".
+        """
+        record = normalize_record(record)
+        version = self._next_version(employee_id)
+        self._employee_views[websocket] = (version, record)
+        await websocket.send_text(encode_message(
+            {"type": message_type, "employee_id": employee_id, "version": version, "payload": record}
+        ))
+
+    async def publish_employee_record(self, organization_id: str, employee_id: str, record: Dict):
         """
-        Send `message` to every WebSocket currently connected under organization_id.
+        Push a freshly built record to the sockets subscribed to employee_id
+        (on every worker), instead of to the whole organization. Each worker
+        sends its sockets only the sections that changed since their version.
         """
-        if organization_id not in self.active_connections:
+        record = normalize_record(record)
+        await asyncio.gather(
+            self._local_employee_record(organization_id, employee_id, record),
+            self._publish(organization_id, dumps_json(record), employee_id=employee_id),
+        )
+
+    async def _local_employee_record(self, organization_id: str, employee_id: str, record: Dict):
+        shard = self._shards.get(organization_id)
+        if shard is None or not shard.employees.get(employee_id):
             return
-        for ws in list(self.active_connections[organization_id]):
-            try:
-                await ws.send_text(message)
-            except Exception:
-                # If sending fails, ignore; cleanup happens in disconnect.
-                pass
-    
-    async def broadcast_json(self, organization_id: str, obj: Any):
-        if organization_id not in self.active_connections:
+
+        # Sockets holding the same version get the same patch: diff and encode once per group.
+        groups: Dict[Optional[int], List[WebSocket]] = {}
+        bases: Dict[Optional[int], Dict] = {}
+        for ws in list(shard.employees[employee_id]):
+            view = self._employee_views.get(ws)
+            base_version = view[0] if view else None
+            groups.setdefault(base_version, []).append(ws)
+            if view:
+                bases[base_version] = view[1]
+
+        version = None
+        for base_version, sockets in groups.items():
+            if base_version is None:
+                # Subscribed but never got a snapshot: send the full record
+                version = version or self._next_version(employee_id)
+                message = {"type": "update", "employee_id": employee_id, "version": version, "payload": record}
+            else:
+                changes, removed = diff_sections(bases[base_version], record)
+                if not changes and not removed:
+                    continue
+                version = version or self._next_version(employee_id)
+                message = {
+                    "type": "patch",
+                    "employee_id": employee_id,
+                    "version": version,
+                    "base_version": base_version,
+                    "changes": changes,
+                    "removed": removed,
+                }
+            for ws in sockets:
+                self._employee_views[ws] = (version, record)
+            await self._fan_out(sockets, _sender(encode_message(message)))
+
+    async def _local_send_personal(self, organization_id: str, user_id: str, message: Union[str, bytes]):
+        shard = self._shards.get(organization_id)
+        if shard is None or user_id not in shard.users:
             return
-        for ws in list(self.active_connections[organization_id]):
-            try:
-                await ws.send_json(obj)
-            except:
-                pass
+        await self._fan_out(shard.users[user_id], _sender(message))
+
+    async def _local_broadcast(self, organization_id: str, message: Union[str, bytes]):
+        shard = self._shards.get(organization_id)
+        if shard is None:
+            return
+        await self._fan_out(shard.sockets, _sender(message))
+
+
+def encode_message(obj: Any, compress: bool = False) -> Union[str, bytes]:
+    """Encode a WebSocket message once: JSON text, or deflated JSON bytes."""
+    text = dumps_json(obj)
+    if compress:
+        return zlib.compress(text.encode("utf-8"))
+    return text
+
+
+def _sender(message: Union[str, bytes]):
+    if isinstance(message, bytes):
+        return lambda ws: ws.send_bytes(message)
+    return lambda ws: ws.send_text(message)
+
+
+manager = ConnectionManager(send_timeout=config.WS_SEND_TIMEOUT_SECONDS)
+
 
-manager = ConnectionManager()
+async def start_backplane():
+    """Call on startup so broadcasts reach sockets held by other workers."""
+    await manager.start_backplane(
+        build_backplane(config.WS_BACKPLANE, config.REDIS_URL, config.WS_BACKPLANE_CHANNEL)
+    )
 
 @router.websocket("/ws/notifications/{organization_id}/{user_id}")
 async def websocket_notifications(websocket: WebSocket, organization_id: str, user_id: str):
@@ -0,0 +1,9 @@
+# notification/tasks.py
+from notification.celery_app import celery_app
+from Service.bulk_import_jobs import RUN_JOB_TASK, run_import_job
+
+
+@celery_app.task(name=RUN_JOB_TASK)
+def run_bulk_import_job(job_id: str):
+    """Celery entry point for BULK_IMPORT_JOB_EXECUTOR="celery"."""
+    run_import_job(job_id)
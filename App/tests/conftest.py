@@ -0,0 +1,8 @@
+# Models.Tenants.organization and database.db_session import each other;
+# the cycle only resolves when database.db_session is imported first, so load
+# it before any test module pulls in a Service or Crud module.
+try:
+    import database.db_session  # noqa: F401
+except ImportError:
+    # Without the application's dependencies the tests that need them skip themselves.
+    pass
@@ -0,0 +1,125 @@
+import pytest
+from unittest.mock import MagicMock
+
+pd = pytest.importorskip("pandas")
+
+from Service import bulk_insert_service as bis
+from Service.bulk_insert_service import BulkInsertService
+
+ORG_ID = "7f0c4c3e-1d9a-4b55-9a55-0b1f9b0f2a11"
+SHEET = "Staff"
+
+
+def new_report(**employee_map):
+    return {"success": [], "errors": [], "failed_rows": {}, "employee_map": dict(employee_map), "employee_list": []}
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    # Employees already in the database (email / staff_id lookups)
+    db.execute.return_value.scalars.return_value = ["taken@x.com"]
+    return db
+
+
+@pytest.fixture
+def org():
+    org = MagicMock()
+    org.name, org.nature = "Acme", "Multi Managed"
+    return org
+
+
+@pytest.fixture
+def written():
+    return []
+
+
+@pytest.fixture
+def service(monkeypatch, written):
+    service = BulkInsertService()
+    monkeypatch.setattr(bis.config, "BULK_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(bis.password_service, "hash_many", lambda passwords: ["hash"] * len(passwords))
+    monkeypatch.setattr(service, "_resolve_related_ids",
+                        lambda db, org_id, values, *args: pd.Series(None, index=values.index, dtype=object))
+    monkeypatch.setattr(service, "get_or_create_default_role", lambda db, org_id: "role-staff")
+
+    def write(db, organization_id, org, rows):
+        # The database rejects any chunk holding clash@x.com
+        if any(row["employee"]["email"] == "clash@x.com" for row in rows):
+            raise Exception("duplicate key value violates unique constraint")
+        written.append([row["index"] for row in rows])
+
+    monkeypatch.setattr(service, "_write_employee_chunk", write)
+    return service
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["First Name", "Last Name", "email", "staff_id", "dob"])
+
+
+def errors_by_row(report):
+    return {error["row_index"]: error["error"] for error in report["errors"]}
+
+
+def test_import_employee_frame_reports_each_bad_row(service, mock_db, org, written):
+    df = frame([
+        ("Ama", "Mensah", "a@x.com", "S1", "1990-01-31"),
+        (None, "Owusu", "no-first@x.com", "S2", None),
+        ("Kofi", "Boateng", "bad-date@x.com", "S3", "not a date"),
+        ("Esi", "Asante", "A@x.com", "S4", None),
+        ("Yaw", "Darko", "dup-staff@x.com", "S1", None),
+        ("Abena", "Ofori", "taken@x.com", "S5", None),
+        ("Kwame", "Addo", "prior@x.com", "S6", None),
+        ("Akua", "Sarpong", "clash@x.com", "S7", None),
+        ("Kojo", "Antwi", "b@x.com", "S8", None),
+    ])
+    report = new_report(**{"prior@x.com": "employee-from-sheet-1"})
+
+    created = service._import_employee_frame(mock_db, df, SHEET, ORG_ID, org, report)
+
+    assert errors_by_row(report) == {
+        1: "Missing required field: first_name",
+        2: "Invalid date for date_of_birth: not a date",
+        3: "Duplicate email in file: A@x.com",
+        4: "Duplicate staff_id in file: S1",
+        5: "Employee with this email already exists: taken@x.com",
+        6: "Email already imported from another sheet: prior@x.com",
+        7: "duplicate key value violates unique constraint",
+    }
+    assert report["failed_rows"] == {SHEET: [1, 2, 3, 4, 5, 6, 7]}
+    assert all(error["sheet"] == SHEET and error["model"] == "employee" for error in report["errors"])
+    assert report["errors"][0]["data"]["Last Name"] == "Owusu"
+
+    assert [idx for idx, _, _ in created] == [0, 8]
+    assert [success["row_index"] for success in report["success"]] == [0, 8]
+    assert set(report["employee_map"]) == {"prior@x.com", "a@x.com", "b@x.com"}
+    # [0, 7] was rejected as a chunk, then retried one row at a time
+    assert written == [[0], [8]]
+
+
+def test_import_employee_frame_all_valid(service, mock_db, org, written):
+    df = frame([
+        ("Ama", "Mensah", "a@x.com", "S1", "1990-01-31"),
+        ("Kojo", "Antwi", "b@x.com", "S2", None),
+        ("Esi", "Asante", "c@x.com", None, None),
+    ])
+    report = new_report()
+
+    created = service._import_employee_frame(mock_db, df, SHEET, ORG_ID, org, report)
+
+    assert report["errors"] == [] and report["failed_rows"] == {}
+    assert written == [[0, 1], [2]]
+    employee = created[0][1]
+    assert employee["email"] == "a@x.com" and str(employee["date_of_birth"]) == "1990-01-31"
+
+
+def test_insert_employee_chunk_retries_row_by_row(service, mock_db, org, written):
+    rows = [{"index": i, "employee": {"email": email}} for i, email in enumerate(["a@x.com", "clash@x.com", "b@x.com"])]
+
+    failed = service._insert_employee_chunk(mock_db, ORG_ID, org, rows)
+
+    assert failed == {1: "duplicate key value violates unique constraint"}
+    assert written == [[0], [2]]
+    # One rollback for the chunk, one for the failing row
+    assert mock_db.rollback.call_count == 2
+    assert mock_db.commit.call_count == 2
@@ -0,0 +1,118 @@
+import re
+
+import pytest
+from rapidfuzz import fuzz, process
+
+from Utils.header_matcher import SynonymIndex
+
+
+def normalize(col_name: str) -> str:
+    col_name = col_name.strip().lower()
+    col_name = re.sub(r'[^a-z0-9\s]', '', col_name)
+    return re.sub(r'\s+', ' ', col_name)
+
+
+SYNONYMS_MAP = {
+    "first_name": ["first name", "firstname", "given name", "forename"],
+    "last_name": ["last name", "lastname", "surname", "family name"],
+    "staff_id": ["staff id", "staff number", "employee id", "emp no"],
+    "middle_name": ["middle name", "other names"],
+    # "unit c" scores the same against "unit a" and "unit b"
+    "department": ["department", "unit a"],
+    "branch": ["branch", "unit b"],
+    # Listed under two concepts; the first one owns it
+    "email": ["email", "e-mail", "mail address"],
+    "contact_info": ["phone", "mobile", "mail address"],
+}
+DATE_SYNONYMS = {"dob": "date_of_birth", "date of birth": "date_of_birth"}
+FIELDS = ["hire_date", "salary", "gender"]
+
+
+def reference_concept(col_name: str, threshold: int = 85) -> str:
+    """find_standard_concept as it was before the index: a scan of the flat synonym list."""
+    flat = [normalize(s) for synonyms in SYNONYMS_MAP.values() for s in synonyms]
+    norm = normalize(col_name)
+    if norm in DATE_SYNONYMS:
+        return DATE_SYNONYMS[norm]
+    best, score, _ = process.extractOne(norm, flat, scorer=fuzz.ratio)
+    if best and score >= threshold:
+        for concept, synonyms in SYNONYMS_MAP.items():
+            if best in {normalize(s) for s in synonyms}:
+                return concept
+    for field in FIELDS:
+        if normalize(field) == norm:
+            return field
+    return norm
+
+
+HEADERS = [
+    # exact synonyms, after normalization
+    "First Name", "  SURNAME ", "E-Mail", "Staff No.", "emp no", "Mail Address", "DOB", "Date of Birth",
+    # fuzzy matches
+    "Frist Name", "lastnme", "Employe ID", "mobil", "given-names",
+    # fuzzy ties between equally close synonyms
+    "unit c", "Unit-C", "mail adress",
+    # fallbacks: employee field, then the normalized header
+    "Hire_Date", "Salary", "Nationality", "Years of Service!", "",
+]
+
+
+@pytest.fixture
+def index():
+    return SynonymIndex(SYNONYMS_MAP, DATE_SYNONYMS, FIELDS, normalize)
+
+
+@pytest.mark.parametrize("header", HEADERS)
+def test_resolve_matches_reference(index, header):
+    assert index.resolve(header) == reference_concept(header)
+
+
+@pytest.mark.parametrize("threshold", [60, 85, 95])
+def test_resolve_many_matches_resolve(index, threshold):
+    assert index.resolve_many(HEADERS, threshold) == [reference_concept(h, threshold) for h in HEADERS]
+    assert index.resolve_many(HEADERS, threshold) == [index.resolve(h, threshold) for h in HEADERS]
+
+
+def test_shared_synonym_belongs_to_first_concept(index):
+    assert index.resolve("mail address") == "email"
+    assert index.resolve_many(["mail address"]) == ["email"]
+
+
+def test_fuzzy_tie_goes_to_first_listed_synonym(index):
+    assert fuzz.ratio("unit c", "unit a") == fuzz.ratio("unit c", "unit b")
+    assert index.resolve("unit c", 80) == reference_concept("unit c", 80) == "department"
+    assert index.resolve_many(["unit c"], 80) == ["department"]
+
+
+def test_fallbacks(index):
+    assert index.resolve("Hire_Date") == "hire_date"
+    assert index.resolve("Nationality") == "nationality"
+    assert index.resolve_many(["Hire_Date", "Nationality"]) == ["hire_date", "nationality"]
+
+
+def test_resolve_is_memoized(index):
+    index.resolve("Frist Name")
+    index.resolve("Frist Name")
+    assert index.cache_info().hits == 1
+
+
+def test_application_index_matches_flat_scan():
+    pytest.importorskip("pandas")
+    # Loaded first so the model imports resolve (see conftest.py).
+    pytest.importorskip("database.db_session")
+    from Service import bulk_insert_service as bis
+
+    flat = [bis.normalize_column_name(s) for synonyms in bis.SYNONYMS_MAP.values() for s in synonyms]
+    headers = flat + [h.upper() for h in flat] + [h[:-1] for h in flat if len(h) > 4] + HEADERS
+    for header in headers:
+        norm = bis.normalize_column_name(header)
+        expected = bis.DATE_SYNONYMS.get(norm)
+        if expected is None:
+            best, score, _ = process.extractOne(norm, flat, scorer=fuzz.ratio)
+            if score >= 85:
+                expected = next(c for c, synonyms in bis.SYNONYMS_MAP.items()
+                                if best in {bis.normalize_column_name(s) for s in synonyms})
+            else:
+                expected = next((f for f in bis.EMPLOYEE_FIELDS if bis.normalize_column_name(f) == norm), norm)
+        assert bis.find_standard_concept(header) == expected, header
+    assert bis.find_standard_concepts(headers) == [bis.find_standard_concept(h) for h in headers]
@@ -0,0 +1,120 @@
+import io
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from Utils.upload_reader import CSV_SHEET, UploadReader
+
+
+class FakeSheet:
+    """Hands out rows exactly as given, including ragged ones openpyxl would pad."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.max_row = len(rows)
+
+    def iter_rows(self, max_row=None, values_only=True):
+        return iter(self.rows[:max_row] if max_row else self.rows)
+
+
+class FakeWorkbook:
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.sheetnames = list(sheets)
+        self.closed = False
+
+    def __getitem__(self, name):
+        return self.sheets[name]
+
+    def close(self):
+        self.closed = True
+
+
+def xlsx_bytes(rows, title="Staff"):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = title
+    for row in rows:
+        sheet.append(row)
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+def fake_reader(rows, chunk_size=2):
+    reader = UploadReader(io.BytesIO(), "staff.xlsx", chunk_size=chunk_size)
+    reader._workbook = FakeWorkbook({"Staff": FakeSheet(rows)})
+    return reader
+
+
+def indexes(chunks):
+    return [list(chunk.index) for chunk in chunks]
+
+
+def test_csv_chunks_keep_row_index():
+    data = b"name,email\n" + b"".join(b"n%d,e%d@x.com\n" % (i, i) for i in range(5))
+    with UploadReader(io.BytesIO(data), "staff.csv", chunk_size=2) as reader:
+        assert reader.sheet_names() == [CSV_SHEET]
+        chunks = list(reader.iter_chunks(CSV_SHEET))
+    assert indexes(chunks) == [[0, 1], [2, 3], [4]]
+    assert list(pd.concat(chunks)["name"]) == [f"n{i}" for i in range(5)]
+
+
+def test_csv_count_rows_without_trailing_newline():
+    reader = UploadReader(io.BytesIO(b"name\na\nb\nc"), "staff.csv")
+    assert reader.count_rows(CSV_SHEET) == 3
+
+
+def test_xlsx_chunks_keep_row_index_and_skip_blank_rows():
+    data = xlsx_bytes([
+        ("name", "email"),
+        ("a", "a@x.com"),
+        ("b", "b@x.com"),
+        (None, None),
+        ("d", "d@x.com"),
+        ("e", "e@x.com"),
+    ])
+    with UploadReader(io.BytesIO(data), "staff.xlsx", chunk_size=2) as reader:
+        assert reader.sheet_names() == ["Staff"]
+        assert reader.columns("Staff") == ["name", "email"]
+        chunks = list(reader.iter_chunks("Staff"))
+    # The blank row is dropped but still counted, as in a full read_excel.
+    assert indexes(chunks) == [[0, 1], [3, 4]]
+    assert list(pd.concat(chunks)["name"]) == ["a", "b", "d", "e"]
+
+
+def test_xlsx_rows_fitted_to_header_width():
+    reader = fake_reader([
+        ("name", "email", "phone"),
+        ("a",),
+        ("b", "b@x.com", "0200000000", "extra", "cells"),
+        ("c", None, None),
+    ], chunk_size=10)
+    (chunk,) = reader.iter_chunks("Staff")
+    assert list(chunk.columns) == ["name", "email", "phone"]
+    # Padded cells are missing values (None or NaN, depending on the pandas version).
+    assert chunk.loc[0, "name"] == "a" and chunk.loc[0, ["email", "phone"]].isna().all()
+    assert chunk.loc[1].tolist() == ["b", "b@x.com", "0200000000"]
+    assert chunk.loc[2, "name"] == "c" and chunk.loc[2, ["email", "phone"]].isna().all()
+
+
+def test_xlsx_blank_header_cells_get_pandas_placeholder():
+    reader = fake_reader([(" name ", None, "email", None), ("a", 1, "a@x.com", 2)])
+    expected = ["name", "Unnamed: 1", "email", "Unnamed: 3"]
+    assert reader.columns("Staff") == expected
+    (chunk,) = reader.iter_chunks("Staff")
+    assert list(chunk.columns) == expected
+
+
+def test_xlsx_sheet_without_rows_yields_nothing():
+    reader = fake_reader([])
+    assert list(reader.iter_chunks("Staff")) == []
+
+
+def test_close_releases_workbook():
+    reader = fake_reader([("name",)])
+    workbook = reader._workbook
+    reader.close()
+    assert workbook.closed and reader._workbook is None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark the tenant email transports in Service.custom_email_provider
+against local stand-ins: an aiosmtpd SMTP server and a keep-alive HTTP
+server answering like the SendGrid v3 API.
+
+SMTP: a new connection per message (the previous SMTPProvider) vs the
+pooled SMTPProvider. HTTP: a new httpx client per call vs the shared
+keep-alive client SendGridProvider uses. --latency-ms delays the SMTP
+greeting/EHLO on the stand-in to model a remote server's handshake.
+
+Usage:
+    python benchmark_email_transport.py [--messages N] [--threads T] [--latency-ms L]
+"""
+import argparse
+import asyncio
+import smtplib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append('App')
+
+import httpx
+from aiosmtpd.controller import Controller
+
+import Service.custom_email_provider as provider_module
+from Service.custom_email_provider import SMTPProvider, SendGridProvider
+
+
+class SinkHandler:
+    """Accepts every message; optionally delays EHLO like a remote server."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+class SendGridStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _reply(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(202)
+
+    def do_GET(self):
+        self._reply(200, b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def message(i: int) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = "bench@example.com"
+    msg["To"] = f"user{i}@example.com"
+    msg["Subject"] = f"Benchmark {i}"
+    msg.attach(MIMEText(f"<p>Message {i}</p>", "html"))
+    return msg
+
+
+def unpooled_smtp_send(host: str, port: int, msg) -> None:
+    """The previous SMTPProvider.send_message: connect, EHLO, send, QUIT."""
+    with smtplib.SMTP(host, port, timeout=60) as server:
+        server.ehlo()
+        server.sendmail(msg["From"], msg["To"].split(","), msg.as_string())
+
+
+def unpooled_http_send(base_url: str, msg) -> None:
+    with httpx.Client(base_url=base_url) as client:
+        client.post("/v3/mail/send", json={"subject": msg["Subject"]}).raise_for_status()
+
+
+def timed(send, messages: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(send, (message(i) for i in range(messages))))
+    return time.perf_counter() - start
+
+
+def report(name: str, messages: int, seconds: float, extra: str = "") -> None:
+    print(f"{name:28} {messages:>8} {seconds * 1000:>10.1f} {messages / seconds:>10.1f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=2, help="concurrent senders (match TENANT_SMTP_POOL_SIZE)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated SMTP handshake latency")
+    args = parser.parse_args()
+
+    handler = SinkHandler(args.latency_ms / 1000)
+    smtpd = Controller(handler, hostname="127.0.0.1", port=0)
+    smtpd.start()
+    http = ThreadingHTTPServer(("127.0.0.1", 0), SendGridStandIn)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{http.server_address[1]}"
+    smtp_port = smtpd.server.sockets[0].getsockname()[1]
+
+    try:
+        print(f"{'transport':28} {'messages':>8} {'total ms':>10} {'msg/s':>10}")
+        print("-" * 72)
+
+        seconds = timed(lambda m: unpooled_smtp_send("127.0.0.1", smtp_port, m), args.messages, args.threads)
+        report("smtp: connection per msg", args.messages, seconds)
+
+        smtp = SMTPProvider("127.0.0.1", smtp_port, "", "", use_tls=False)
+        seconds = timed(smtp.send_message, args.messages, args.threads)
+        report("smtp: pooled", args.messages, seconds, f"connects={smtp.pool.stats['connects']}")
+
+        seconds = timed(lambda m: unpooled_http_send(base_url, m), args.messages, args.threads)
+        report("http: client per call", args.messages, seconds)
+
+        provider_module._sendgrid_client = httpx.Client(base_url=base_url)
+        sendgrid = SendGridProvider("bench-key")
+        seconds = timed(sendgrid.send_message, args.messages, args.threads)
+        report("http: shared keep-alive", args.messages, seconds)
+        print(f"\nSMTP stand-in received {handler.received} messages.")
+    finally:
+        provider_module.close_transports()
+        smtpd.stop()
+        http.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark the employee aggregator: legacy chained joinedload vs the
+selectinload batches in Service.employee_aggregator.
+
+Reports, per employee, the statements issued, the rows the database sent
+back, and the median latency of each loader. By default the employees with
+the most qualifications/history/salary rows are picked.
+
+Usage:
+    python benchmark_employee_aggregator.py [--employees N] [--repeat R] [employee_id ...]
+"""
+import argparse
+import statistics
+import sys
+import time
+sys.path.append('App')
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import joinedload
+
+from database.db_session import SessionLocal, engine
+from Models.models import (
+    Employee, User, Department, AcademicQualification, ProfessionalQualification,
+    EmploymentHistory, SalaryPayment,
+)
+from Models.Tenants.organization import Organization
+from Service.employee_aggregator import _build_employee_full_record
+
+
+class QueryCounter:
+    """Counts statements and result rows on the engine while active."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.active = False
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active:
+            self.statements += 1
+            self.rows += max(cursor.rowcount or 0, 0)
+
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+
+
+def legacy_load(db, employee_id):
+    """The previous aggregator query: every relationship joined into one statement."""
+    emp = (
+        db.query(Employee)
+        .filter(Employee.id == employee_id)
+        .options(
+            joinedload(Employee.academic_qualifications),
+            joinedload(Employee.professional_qualifications),
+            joinedload(Employee.employment_history),
+            joinedload(Employee.emergency_contacts),
+            joinedload(Employee.next_of_kins),
+            joinedload(Employee.promotion_requests),
+            joinedload(Employee.salary_payments),
+            joinedload(Employee.payment_details),
+            joinedload(Employee.employee_type),
+            joinedload(Employee.rank),
+            joinedload(Employee.department).joinedload(Department.branch),
+            joinedload(Employee.dynamic_data),
+        )
+        .first()
+    )
+    if emp is None:
+        return None
+    db.query(User).filter(User.email == emp.email).options(joinedload(User.role)).first()
+    db.query(Organization).filter(Organization.id == emp.organization_id).first()
+    return emp
+
+
+def selectin_load(db, employee_id):
+    record, _ = _build_employee_full_record(db, employee_id)
+    return record
+
+
+def heaviest_employees(db, limit):
+    weight = None
+    for model in (AcademicQualification, ProfessionalQualification, EmploymentHistory, SalaryPayment):
+        count = (
+            select(func.count()).select_from(model)
+            .where(model.employee_id == Employee.id)
+            .correlate(Employee).scalar_subquery()
+        )
+        weight = count if weight is None else weight + count
+    return [emp_id for (emp_id,) in db.query(Employee.id).order_by(weight.desc()).limit(limit).all()]
+
+
+def run(loader, employee_id, counter, repeat):
+    timings = []
+    for _ in range(repeat):
+        # Fresh session each pass so the identity map never serves a row.
+        with SessionLocal() as db:
+            counter.reset()
+            counter.active = True
+            start = time.perf_counter()
+            loader(db, employee_id)
+            timings.append((time.perf_counter() - start) * 1000)
+            counter.active = False
+    return counter.statements, counter.rows, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("employee_ids", nargs="*")
+    parser.add_argument("--employees", type=int, default=5, help="heaviest employees to benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per loader (median reported)")
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    event.listen(engine, "after_cursor_execute", counter.after_cursor_execute)
+
+    employee_ids = args.employee_ids
+    if not employee_ids:
+        with SessionLocal() as db:
+            employee_ids = heaviest_employees(db, args.employees)
+    if not employee_ids:
+        print("No employees found.")
+        return
+
+    print(f"{'employee':38} {'loader':10} {'stmts':>6} {'rows':>8} {'median ms':>10}")
+    print("-" * 76)
+    for employee_id in employee_ids:
+        for name, loader in (("joinedload", legacy_load), ("selectin", selectin_load)):
+            statements, rows, median_ms = run(loader, employee_id, counter, args.repeat)
+            print(f"{str(employee_id):38} {name:10} {statements:>6} {rows:>8} {median_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()